@@ -0,0 +1,83 @@
+# benchmarks/bench_chat_view.py
+"""Kosten einer neuen Blase in Abhängigkeit von der Länge des Chatverlaufs.
+
+Gemessen wird ChatTranscriptView.append_message (Nachfolger von _insert_html_bubble)
+inklusive Layout und Zeichnen, also bis die Event-Schleife wieder frei ist.
+"""
+import pytest
+
+from chatty_app.chat_view import ChatTranscriptView
+
+SHORT_TEXT = "Hallo Chatty, wie geht es dir heute?"
+LONG_TEXT = " ".join(["Das ist eine etwas längere Antwort mit mehreren Zeilen."] * 12)
+
+
+def _make_view(qapp, transcript_length):
+    view = ChatTranscriptView()
+    view.resize(550, 650)
+    view.show()
+    entries = []
+    for i in range(transcript_length):
+        if i % 2:
+            entries.append(("Chatty", LONG_TEXT, "bot", None))
+        else:
+            entries.append(("bench", SHORT_TEXT, "user", None))
+    view.append_messages(entries)
+    view.scrollToBottom()
+    qapp.processEvents()
+    return view
+
+
+@pytest.mark.parametrize("transcript_length", [0, 500, 3000])
+def test_append_bubble(benchmark, qapp, transcript_length):
+    view = _make_view(qapp, transcript_length)
+
+    def append():
+        view.append_message("Chatty", LONG_TEXT, "bot")
+        qapp.processEvents()
+
+    benchmark.extra_info['transcript_length'] = transcript_length
+    benchmark.pedantic(append, rounds=50, iterations=1, warmup_rounds=5)
+    view.deleteLater()
+
+
+@pytest.mark.parametrize("transcript_length", [0, 3000])
+def test_update_streaming_bubble(benchmark, qapp, transcript_length):
+    view = _make_view(qapp, transcript_length)
+    message = view.append_message("Chatty", "", "bot")
+    chunks = iter(range(10 ** 6))
+
+    def update():
+        view.update_message(message, message.text + f" Abschnitt {next(chunks)}")
+        qapp.processEvents()
+
+    benchmark.extra_info['transcript_length'] = transcript_length
+    benchmark.pedantic(update, rounds=100, iterations=1, warmup_rounds=5)
+    view.deleteLater()
+
+
+MARKDOWN_SECTION = (
+    "## Abschnitt\n"
+    "Ein Absatz mit **fetten** und *kursiven* Wörtern sowie `code`.\n\n"
+    "- erster Punkt\n- zweiter Punkt mit [Link](https://example.com)\n  - Unterpunkt\n\n"
+    "```\nprint('hallo')\n```\n\n"
+)
+
+
+@pytest.mark.parametrize("markdown", [False, True])
+def test_stream_long_markdown_reply(benchmark, qapp, monkeypatch, markdown):
+    """Streaming einer langen Antwort: mit Markdown wird pro Abschnitt nur der offene Block übersetzt."""
+    from chatty_app import config
+    monkeypatch.setattr(config, "MARKDOWN_RENDERING", markdown)
+    view = _make_view(qapp, 0)
+    message = view.append_message("Chatty", MARKDOWN_SECTION * 20, "bot")
+    chunks = iter(range(10 ** 6))
+
+    def update():
+        section = next(chunks)
+        view.update_message(message, message.text + MARKDOWN_SECTION[:40 + section % 40] + "\n\n")
+        qapp.processEvents()
+
+    benchmark.extra_info['markdown'] = markdown
+    benchmark.pedantic(update, rounds=50, iterations=1, warmup_rounds=5)
+    view.deleteLater()
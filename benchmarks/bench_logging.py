@@ -0,0 +1,44 @@
+# benchmarks/bench_logging.py
+"""Durchsatz von firebase_logger.log_to_firestore gegen einen Firestore-Ersatz."""
+from chatty_app import config, firebase_logger
+
+ENTRIES_PER_ROUND = 200
+
+
+def _record_throughput(benchmark, client):
+    benchmark.extra_info['entries_per_round'] = ENTRIES_PER_ROUND
+    benchmark.extra_info['rpc_count'] = client.rpc_count
+    if benchmark.stats:  # None bei --benchmark-disable
+        benchmark.extra_info['entries_per_second'] = ENTRIES_PER_ROUND / benchmark.stats.stats.mean
+
+
+def test_log_enqueue_batched(benchmark, fake_firestore):
+    """Aufwand pro Aufruf im GUI-Thread: Journal-Eintrag plus Einreihen in den Batch-Writer."""
+    firebase_logger.start_log_writer()
+    benchmark(firebase_logger.log_to_firestore, "Du", "Eine Testnachricht", username="bench")
+    assert firebase_logger.flush_logs(timeout=10)
+
+
+def test_log_throughput_batched(benchmark, fake_firestore):
+    """Zeit, bis ENTRIES_PER_ROUND Einträge in Firestore bestätigt sind."""
+    firebase_logger.start_log_writer()
+
+    def write_and_flush():
+        for i in range(ENTRIES_PER_ROUND):
+            firebase_logger.log_to_firestore("Du", f"Nachricht {i}", username="bench")
+        assert firebase_logger.flush_logs(timeout=30)
+
+    benchmark.pedantic(write_and_flush, rounds=5, iterations=1, warmup_rounds=1)
+    _record_throughput(benchmark, fake_firestore)
+
+
+def test_log_throughput_direct(benchmark, fake_firestore, monkeypatch):
+    """Vergleichswert ohne Batching: ein Firestore-Aufruf pro Eintrag."""
+    monkeypatch.setattr(config, "LOG_BATCHING_ENABLED", False)
+
+    def write_all():
+        for i in range(ENTRIES_PER_ROUND):
+            firebase_logger.log_to_firestore("Du", f"Nachricht {i}", username="bench")
+
+    benchmark.pedantic(write_all, rounds=5, iterations=1, warmup_rounds=1)
+    _record_throughput(benchmark, fake_firestore)
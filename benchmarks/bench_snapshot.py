@@ -0,0 +1,112 @@
+# benchmarks/bench_snapshot.py
+"""Gesprächs-Snapshots: Wiederherstellen beim Login und was dabei nicht zurückkommen darf."""
+import time
+import types
+from datetime import datetime, timedelta, timezone
+
+import fakes
+from chatty_app import config, conversation_snapshot
+from chatty_app.chat_view import ChatTranscriptView
+from chatty_app.transcript_pager import TranscriptPager
+
+TURN_TIMEOUT_S = 30.0
+
+
+def _make_window(qapp, monkeypatch, user_id="snap"):
+    from chatty_app.main_app import ChattyApp
+    monkeypatch.setattr(config, "BACKEND_INIT_DELAY_MS", 10 ** 6)
+    window = ChattyApp()
+    window.firebase_initialized = False
+    window._firebase_init_pending = False
+    window.current_user = user_id
+    window.current_user_id = user_id
+    return window
+
+
+def _show_chat(qapp, window):
+    """Öffnet den Chat und wartet, bis Snapshot und Gemini-Sitzung im Worker bereitstehen."""
+    window._show_chat_screen()
+    deadline = time.monotonic() + TURN_TIMEOUT_S
+    while window._chat_init_pending:
+        assert time.monotonic() < deadline, "Chat wurde nicht rechtzeitig initialisiert"
+        qapp.processEvents()
+        time.sleep(0.0005)
+
+
+def _entries(count, start):
+    return [conversation_snapshot.TranscriptEntry(
+        "Chatty" if i % 2 else "snap", f"Nachricht {i}", "bot" if i % 2 else "user",
+        start + timedelta(seconds=i), None, None) for i in range(count)]
+
+
+def test_restore_snapshot_on_login(benchmark, qapp, fake_genai, monkeypatch):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    conversation_snapshot.save_turn("snap", [], _entries(200, start))
+    window = _make_window(qapp, monkeypatch)
+    window.show()
+
+    def login():
+        _show_chat(qapp, window)
+
+    benchmark.pedantic(login, rounds=20, iterations=1, warmup_rounds=2)
+    assert window.chat_window.message_count() == 200
+    window._show_start_screen()
+    window.close()
+
+
+def test_failed_stream_is_not_restored(qapp, fake_genai, monkeypatch):
+    """Eine abgebrochene Streaming-Antwort steht weder im Verlauf noch im Snapshot."""
+    def broken_stream(self):
+        yield types.SimpleNamespace(text="Angefangene Antwort")
+        raise RuntimeError("Verbindung abgebrochen")
+
+    monkeypatch.setattr(fakes.FakeResponse, "__iter__", broken_stream)
+    window = _make_window(qapp, monkeypatch)
+    _show_chat(qapp, window)
+    window.entry.setText("Hallo")
+    window._send_message_command()
+    deadline = time.monotonic() + TURN_TIMEOUT_S
+    while window._request_in_flight:
+        assert time.monotonic() < deadline, "Antwort kam nicht rechtzeitig"
+        qapp.processEvents()
+        time.sleep(0.0005)
+
+    model = window.chat_window.transcript_model
+    shown = [model.message(row) for row in range(model.rowCount())]
+    assert [message.kind for message in shown][-2:] == ["user", "error"]
+    assert all(message.timestamp is not None for message in shown)
+    snapshot = conversation_snapshot.load_snapshot("snap")
+    assert [entry.kind for entry in snapshot.transcript][-2:] == ["user", "error"]
+    assert all(entry.timestamp is not None for entry in snapshot.transcript)
+    window._show_start_screen()
+    window.close()
+
+
+def test_restore_skips_entries_without_timestamp(qapp, fake_genai, monkeypatch):
+    """Ältere Snapshots können ungeloggte Blasen ohne Zeitstempel enthalten; sie werden übergangen."""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    orphan = conversation_snapshot.TranscriptEntry("Chatty", "Angefangene Antwort", "bot", None, None, None)
+    conversation_snapshot.save_turn("snap", [], [orphan] + _entries(3, start))
+    window = _make_window(qapp, monkeypatch)
+    _show_chat(qapp, window)
+    assert window.chat_window.message_count() == 3
+    assert window.chat_window.first_message().timestamp == start
+    window._show_start_screen()
+    window.close()
+
+
+def test_pager_anchor_ignores_rows_without_timestamp(qapp, monkeypatch):
+    """Ohne Zeitstempel in der obersten Zeile darf nicht die neueste Seite erneut geladen werden."""
+    view = ChatTranscriptView()
+    pager = TranscriptPager(view, page_size=5, max_rows=50)
+    anchors = []
+    monkeypatch.setattr(pager, "_start_fetch", lambda anchor, older: anchors.append((anchor, older)))
+    pager.reset("snap")
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    view.append_message("Chatty", "Ohne Zeitstempel", "bot")
+    pager._load_older()
+    assert anchors == []
+    view.append_message("snap", "Mit Zeitstempel", "user", start)
+    pager._load_older()
+    assert anchors == [(start, True)]
+    view.deleteLater()
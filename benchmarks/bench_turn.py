@@ -0,0 +1,53 @@
+# benchmarks/bench_turn.py
+"""Latenz einer Gesprächsrunde: von der Eingabe bis zur fertigen Bot-Blase."""
+import time
+
+from chatty_app import config, firebase_logger, gemini_interface
+
+TURN_TIMEOUT_S = 30.0
+
+
+def test_send_message_to_gemini(benchmark, fake_genai):
+    assert gemini_interface.initialize_gemini("bench")[0]
+    result = benchmark(gemini_interface.send_message_to_gemini, "Wie wird das Wetter morgen?", user_id="bench")
+    assert result[0]
+
+
+def test_stream_message_to_gemini(benchmark, fake_genai):
+    assert gemini_interface.initialize_gemini("bench")[0]
+    chunks = []
+    result = benchmark(gemini_interface.stream_message_to_gemini, "Erzähl mir einen Witz.",
+                       progress_callback=chunks.append, user_id="bench")
+    assert result[0] and chunks
+
+
+def test_gui_turn_end_to_end(benchmark, qapp, fake_genai, fake_firestore, monkeypatch):
+    """Kompletter Ablauf in ChattyApp: Blase, Logging, Worker-Thread, Streaming, finale Blase."""
+    from chatty_app.main_app import ChattyApp
+    monkeypatch.setattr(config, "BACKEND_INIT_DELAY_MS", 10 ** 6)
+    firebase_logger.start_log_writer()
+    window = ChattyApp()
+    window.firebase_initialized = True
+    window._firebase_init_pending = False
+    window.current_user = "bench"
+    window.current_user_id = "bench"
+    window._show_chat_screen()
+    window.show()
+    deadline = time.monotonic() + TURN_TIMEOUT_S
+    while window._chat_init_pending:
+        assert time.monotonic() < deadline, "Chat wurde nicht rechtzeitig initialisiert"
+        qapp.processEvents()
+        time.sleep(0.0005)
+
+    def turn():
+        window.entry.setText("Wie wird das Wetter morgen?")
+        window._send_message_command()
+        deadline = time.monotonic() + TURN_TIMEOUT_S
+        while window._request_in_flight:
+            assert time.monotonic() < deadline, "Antwort kam nicht rechtzeitig"
+            qapp.processEvents()
+            time.sleep(0.0005)
+
+    benchmark.pedantic(turn, rounds=30, iterations=1, warmup_rounds=2)
+    window._show_start_screen()
+    window.close()
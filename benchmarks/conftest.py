@@ -0,0 +1,77 @@
+# benchmarks/conftest.py
+import os
+import sys
+
+# Muss vor dem ersten Qt-Import gesetzt sein
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-dummy-key")
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_PATH = os.path.join(os.path.dirname(BENCHMARKS_DIR), "src")
+for path in (SRC_PATH, BENCHMARKS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import pytest
+from PyQt6.QtWidgets import QApplication
+
+import fakes
+
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, ".results")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # Ergebnisse (JSON) unabhängig vom Arbeitsverzeichnis unter benchmarks/.results ablegen
+    if hasattr(config.option, "benchmark_storage") and config.option.benchmark_storage == "file://./.benchmarks":
+        config.option.benchmark_storage = "file://" + RESULTS_DIR
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    app = QApplication.instance() or QApplication([])
+    yield app
+
+
+@pytest.fixture
+def fake_firestore(monkeypatch, tmp_path):
+    """Firestore-Client ohne Netzwerk; Journal und Batching wie in der Standardkonfiguration."""
+    from chatty_app import config, firebase_logger, search_index, storage_firestore
+    client = fakes.FakeFirestoreClient(latency=float(os.environ.get("CHATTY_BENCH_FIRESTORE_LATENCY", "0")))
+    monkeypatch.setattr(storage_firestore, "firestore", fakes.make_fake_firestore_module())
+    monkeypatch.setattr(storage_firestore, "api_exceptions", fakes.make_fake_api_exceptions())
+    monkeypatch.setattr(firebase_logger, "_storage", storage_firestore.FirestoreStorage(client))
+    monkeypatch.setattr(firebase_logger, "_journal", None)
+    monkeypatch.setattr(firebase_logger, "_log_writer", None)
+    monkeypatch.setattr(config, "LOG_JOURNAL_PATH", str(tmp_path / "log_journal.sqlite3"))
+    # Der Suchindex wird mitgemessen, liegt aber im Testverzeichnis
+    monkeypatch.setattr(config, "SEARCH_INDEX_PATH", str(tmp_path / "search_index.sqlite3"))
+    monkeypatch.setattr(search_index, "_index", None)
+    yield client
+    firebase_logger.stop_log_writer()
+    if firebase_logger._journal is not None:
+        firebase_logger._journal.close()
+    if search_index._index is not None:
+        search_index._index.close()
+
+
+@pytest.fixture
+def fake_genai(monkeypatch, tmp_path):
+    """Ersetzt das Gemini SDK; Latenz pro Anfrage bzw. pro Streaming-Abschnitt per Umgebungsvariable."""
+    from chatty_app import config, conversation_snapshot, gemini_interface
+    module = fakes.make_fake_genai(
+        latency=float(os.environ.get("CHATTY_BENCH_GEMINI_LATENCY", "0")),
+        chunk_latency=float(os.environ.get("CHATTY_BENCH_GEMINI_CHUNK_LATENCY", "0")),
+    )
+    monkeypatch.setattr(gemini_interface, "genai", module)
+    monkeypatch.setattr(gemini_interface, "_model", None)
+    monkeypatch.setattr(config, "GEMINI_RESPONSE_CACHE_ENABLED", False)
+    # Gemessen wird der Client selbst, nicht das Kontingent der Free-Tier-Modelle
+    monkeypatch.setattr(config, "GEMINI_RATE_LIMITS", {})
+    gemini_interface._rate_limiters.clear()
+    gemini_interface._sessions.clear()
+    # Snapshots landen im Testverzeichnis, nicht in data/
+    monkeypatch.setattr(config, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    monkeypatch.setattr(conversation_snapshot, "_store", None)
+    yield module
+    gemini_interface._sessions.clear()
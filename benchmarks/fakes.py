@@ -0,0 +1,226 @@
+# benchmarks/fakes.py
+"""In-Process-Attrappen für google.generativeai und den Firestore-Client.
+
+Die Latenzen (in Sekunden) sind einstellbar, damit sich Messungen mit und ohne
+simulierte Netzwerkzeit vergleichen lassen. Es werden nur die Teile der APIs
+nachgebildet, die Chatty tatsächlich benutzt.
+"""
+import itertools
+import threading
+import time
+import types
+
+
+def _sleep(seconds):
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+# --- Gemini ---
+
+class FakeResponse:
+    def __init__(self, text, chunks, chunk_latency=0.0, usage=None):
+        self.text = text
+        self._chunks = chunks
+        self._chunk_latency = chunk_latency
+        self.usage_metadata = usage
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            _sleep(self._chunk_latency)
+            yield types.SimpleNamespace(text=chunk)
+
+
+class FakeChatSession:
+    def __init__(self, model, history=None):
+        self.model = model
+        self.history = list(history or [])
+
+    def send_message(self, content, stream=False, **kwargs):
+        _sleep(self.model.latency)
+        reply = self.model.reply_for(content)
+        self.history = self.history + [
+            {'role': 'user', 'parts': [content]},
+            {'role': 'model', 'parts': [reply]},
+        ]
+        chunks = [reply[i:i + self.model.chunk_size] for i in range(0, len(reply), self.model.chunk_size)]
+        usage = types.SimpleNamespace(prompt_token_count=len(content) // 4,
+                                      candidates_token_count=len(reply) // 4,
+                                      total_token_count=(len(content) + len(reply)) // 4)
+        return FakeResponse(reply, chunks, self.model.chunk_latency if stream else 0.0, usage)
+
+    def rewind(self):
+        self.history = self.history[:-2]
+
+
+class FakeGenerativeModel:
+    """Ersatz für genai.GenerativeModel mit fester Antwort und einstellbarer Latenz."""
+
+    def __init__(self, model_name, latency=0.0, chunk_latency=0.0, chunk_size=40, reply_words=60):
+        self.model_name = model_name
+        self.latency = latency
+        self.chunk_latency = chunk_latency
+        self.chunk_size = chunk_size
+        self.reply_words = reply_words
+        self.calls = 0
+
+    def reply_for(self, content):
+        self.calls += 1
+        return " ".join(["Antwort"] * self.reply_words)
+
+    def start_chat(self, history=None):
+        return FakeChatSession(self, history)
+
+    def generate_content(self, contents, **kwargs):
+        _sleep(self.latency)
+        return FakeResponse(self.reply_for(str(contents)), [])
+
+    def count_tokens(self, contents):
+        _sleep(self.latency)
+        return types.SimpleNamespace(total_tokens=sum(len(str(c)) // 4 for c in contents))
+
+
+def make_fake_genai(latency=0.0, chunk_latency=0.0):
+    """Modul-Ersatz mit configure() und GenerativeModel(name)."""
+    module = types.SimpleNamespace(models=[])
+
+    def generative_model(model_name, **kwargs):
+        model = FakeGenerativeModel(model_name, latency=latency, chunk_latency=chunk_latency)
+        module.models.append(model)
+        return model
+
+    module.configure = lambda **kwargs: None
+    module.GenerativeModel = generative_model
+    return module
+
+
+# --- Firestore ---
+
+SERVER_TIMESTAMP = object()
+
+
+class FakeDocumentSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocumentReference:
+    def __init__(self, client, collection_name, doc_id):
+        self._client = client
+        self._collection = collection_name
+        self.id = doc_id
+
+    def _docs(self):
+        return self._client.collections.setdefault(self._collection, {})
+
+    def get(self):
+        self._client._rpc()
+        with self._client.lock:
+            return FakeDocumentSnapshot(self.id, self._docs().get(self.id))
+
+    def set(self, data, merge=False):
+        self._client._rpc()
+        self._client._apply_set(self._collection, self.id, data, merge)
+
+    def create(self, data):
+        self._client._rpc()
+        with self._client.lock:
+            if self.id in self._docs():
+                raise FakeAlreadyExists(self.id)
+            self._docs()[self.id] = dict(data)
+
+    def update(self, data):
+        self._client._rpc()
+        with self._client.lock:
+            if self.id not in self._docs():
+                raise FakeNotFound(self.id)
+            self._docs()[self.id].update(data)
+
+
+class FakeCollectionReference:
+    def __init__(self, client, name):
+        self._client = client
+        self.name = name
+        self._ids = itertools.count(1)
+
+    def document(self, doc_id=None):
+        return FakeDocumentReference(self._client, self.name, doc_id or f"auto{next(self._ids)}")
+
+    def add(self, data):
+        ref = self.document()
+        ref.set(data)
+        return None, ref
+
+
+class FakeWriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def set(self, ref, data, merge=False):
+        self._writes.append((ref._collection, ref.id, data, merge))
+
+    def commit(self):
+        self._client._rpc()
+        for collection_name, doc_id, data, merge in self._writes:
+            self._client._apply_set(collection_name, doc_id, data, merge)
+        self._client.batches_committed += 1
+
+
+class FakeFirestoreClient:
+    """Speichert Dokumente in dicts; jeder Aufruf (RPC) wartet `latency` Sekunden."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.collections = {}
+        self.lock = threading.Lock()
+        self.rpc_count = 0
+        self.batches_committed = 0
+
+    def _rpc(self):
+        with self.lock:
+            self.rpc_count += 1
+        _sleep(self.latency)
+
+    def _apply_set(self, collection_name, doc_id, data, merge):
+        with self.lock:
+            docs = self.collections.setdefault(collection_name, {})
+            if merge and doc_id in docs:
+                docs[doc_id].update(data)
+            else:
+                docs[doc_id] = dict(data)
+
+    def collection(self, name):
+        return FakeCollectionReference(self, name)
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def document_count(self, collection_name):
+        with self.lock:
+            return len(self.collections.get(collection_name, {}))
+
+
+class FakeAlreadyExists(Exception):
+    pass
+
+
+class FakeNotFound(Exception):
+    pass
+
+
+def make_fake_firestore_module():
+    """Ersatz für firebase_admin.firestore, soweit storage_firestore ihn verwendet."""
+    return types.SimpleNamespace(
+        SERVER_TIMESTAMP=SERVER_TIMESTAMP,
+        Query=types.SimpleNamespace(ASCENDING="ASCENDING", DESCENDING="DESCENDING"),
+    )
+
+
+def make_fake_api_exceptions():
+    return types.SimpleNamespace(AlreadyExists=FakeAlreadyExists, NotFound=FakeNotFound)
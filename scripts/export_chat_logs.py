@@ -0,0 +1,52 @@
+# scripts/export_chat_logs.py
+import argparse
+import os
+import sys
+
+# Füge das 'src' Verzeichnis zum Python-Pfad hinzu
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+src_path = os.path.join(project_root, 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from chatty_app import config, firebase_logger, log_export
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Exportiert chat_logs seitenweise als NDJSON oder Parquet (standardmäßig nur neue Einträge)."
+    )
+    parser.add_argument("-o", "--output-dir", default=config.EXPORT_DIR)
+    parser.add_argument("-f", "--format", choices=("ndjson", "parquet"), default=config.EXPORT_FORMAT)
+    parser.add_argument("--full", action="store_true", help="Alles exportieren und den Fortschritt neu setzen")
+    parser.add_argument("--username", help="Nur Einträge dieses Benutzers")
+    parser.add_argument("--page-size", type=int, default=config.EXPORT_PAGE_SIZE)
+    parser.add_argument("--rows-per-file", type=int, default=config.EXPORT_ROWS_PER_FILE)
+    args = parser.parse_args()
+
+    success, error_msg = firebase_logger.initialize_storage()
+    if not success:
+        print(f"Fehler: {error_msg}")
+        sys.exit(1)
+    state = log_export.load_state(args.output_dir)
+    if not args.full and not args.username:
+        if 'commit_position' in state:
+            print(f"Inkrementeller Export: Einträge, die seit dem letzten Lauf ({state.get('last_run')}) gespeichert wurden.")
+        elif state.get('high_water_timestamp'):
+            print(f"Abgebrochener Vollexport wird ab {state['high_water_timestamp']} fortgesetzt.")
+    try:
+        rows, files = log_export.export_logs(
+            args.output_dir, args.format, incremental=not args.full, username=args.username,
+            page_size=args.page_size, rows_per_file=args.rows_per_file,
+            on_file=lambda path, count: print(f"{path}: {count} Einträge")
+        )
+    except ImportError as e:
+        print(f"Fehler: {e}. Für Parquet wird pyarrow benötigt ('pip install pyarrow').")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("Abgebrochen. Fertige Dateien und der Fortschritt bleiben erhalten.")
+        sys.exit(130)
+    except Exception as e:
+        print(f"Fehler beim Export: {e}")
+        sys.exit(1)
+    print(f"{rows} Einträge in {len(files)} Datei(en) exportiert.")
@@ -9,6 +9,27 @@ src_path = os.path.join(project_root, 'src')
 if src_path not in sys.path:
     sys.path.insert(0, src_path)
 
+# --- Startprofil (python scripts/run_chatty.py --profile-startup) ---
+from chatty_app import startup_profile
+
+if "--profile-startup" in sys.argv and not startup_profile.is_child_process():
+    import argparse
+    from chatty_app import config
+    parser = argparse.ArgumentParser(description="Misst die Kaltstartzeit bis zum ersten Zeichnen des Fensters.")
+    parser.add_argument("--profile-startup", action="store_true")
+    parser.add_argument("--profile-output", help="Ergebnis zusätzlich als JSON speichern")
+    parser.add_argument("--startup-budget-ms", type=float, default=config.STARTUP_BUDGET_MS,
+                        help="Exit-Code 1, wenn der Kaltstart länger dauert")
+    parser.add_argument("--top", type=int, default=15, help="Anzahl der angezeigten Imports")
+    profile_args, _ = parser.parse_known_args()
+    sys.exit(startup_profile.run_profiled(
+        os.path.abspath(__file__), top=profile_args.top,
+        output_path=profile_args.profile_output, budget_ms=profile_args.startup_budget_ms
+    ))
+
+startup_phases = startup_profile.PhaseRecorder()
+startup_phases.mark('script_start')
+
 # Importiere die Hauptanwendungsklasse
 try:
     # Stelle sicher, dass du die PyQt-Version importierst
@@ -23,10 +44,15 @@ except Exception as e:
     print(f"Ein unerwarteter Fehler ist beim Import aufgetreten: {e}")
     sys.exit(1)
 
+startup_phases.mark('imports_done')
+
 
 if __name__ == "__main__":
     # Erstelle die QApplication Instanz
     app = QApplication(sys.argv)
+    startup_phases.mark('qapplication_created')
+    if startup_profile.is_child_process():
+        startup_profile.install_first_paint_hook(app, startup_phases)
 
     # Erstelle das Hauptfenster (unsere ChattyApp Klasse)
     # Der __init__ von ChattyApp wird hier ausgeführt
@@ -43,8 +69,11 @@ if __name__ == "__main__":
         sys.exit(1)
 
 
+    startup_phases.mark('window_created')
+
     # --- WICHTIG: Zeige das Fenster an ---
     main_window.show()
+    startup_phases.mark('window_shown')
 
     # --- Starte die Event-Schleife von Qt ---
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,56 @@
+# scripts/run_chatty_batch.py
+import argparse
+import os
+import sys
+
+# Füge das 'src' Verzeichnis zum Python-Pfad hinzu
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+src_path = os.path.join(project_root, 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from chatty_app import batch_runner, config, metrics
+
+
+def _print_record(record):
+    status = "ok" if record['ok'] else f"FEHLER: {record['error']}"
+    print(f"[{record['id']}] {len(record['turns'])} Runden in {record['total_seconds']:.1f} s – {status}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Spielt Gespräche aus einer JSONL-Datei ohne GUI durch Gemini (Persona-Regression, Warm-up)."
+    )
+    parser.add_argument("input", help="JSONL mit einer Zeile pro Gespräch: {\"id\": ..., \"turns\": [...]}")
+    parser.add_argument("output", help="JSONL-Ergebnisdatei (wird fortgeschrieben)")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Gleichzeitige Gespräche")
+    parser.add_argument("--no-resume", action="store_true", help="Ergebnisdatei verwerfen und alle Gespräche neu ausführen")
+    parser.add_argument("--retry-failed", action="store_true", help="Fehlgeschlagene Gespräche erneut ausführen")
+    parser.add_argument("--use-cache", action="store_true",
+                        help="Antwort-Cache verwenden (sonst wird jede Runde wirklich an Gemini gesendet)")
+    args = parser.parse_args()
+
+    if not config.GOOGLE_API_KEY:
+        print("Fehler: GOOGLE_API_KEY nicht gefunden. Überprüfe die .env-Datei im Projekt-Root.")
+        sys.exit(1)
+    if not args.use_cache:
+        # Eine Regression soll frische Antworten prüfen, keine aus dem Cache der letzten Stunden
+        config.GEMINI_RESPONSE_CACHE_ENABLED = False
+
+    try:
+        summary = batch_runner.run_batch(
+            args.input, args.output, concurrency=args.concurrency,
+            resume=not args.no_resume, retry_failed=args.retry_failed, on_record=_print_record
+        )
+    except KeyboardInterrupt:
+        print("Abgebrochen. Fertige Gespräche stehen in der Ergebnisdatei; erneuter Start setzt den Lauf fort.")
+        sys.exit(130)
+    except OSError as e:
+        print(f"Fehler beim Lesen/Schreiben: {e}")
+        sys.exit(1)
+    finally:
+        metrics.export_metrics()
+
+    print(f"{summary['completed']} Gespräche erfolgreich, {summary['failed']} fehlgeschlagen, "
+          f"{summary['skipped']} übersprungen ({summary['turns']} Runden in {summary['seconds']} s).")
+    sys.exit(1 if summary['failed'] else 0)
@@ -0,0 +1,37 @@
+# scripts/run_chatty_server.py
+import argparse
+import os
+import sys
+
+# Füge das 'src' Verzeichnis zum Python-Pfad hinzu
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+src_path = os.path.join(project_root, 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from chatty_app import config
+
+try:
+    from chatty_app import server
+except ImportError as e:
+    print(f"Fehler beim Importieren des Servers: {e}")
+    print("Stelle sicher, dass aiohttp installiert ist ('pip install aiohttp').")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Startet Chatty ohne GUI als HTTP-/WebSocket-Server für viele Benutzer.")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=config.SERVER_WORKER_THREADS,
+                        help="Threads für blockierende Gemini-/Firestore-Aufrufe")
+    args = parser.parse_args()
+
+    if not config.GOOGLE_API_KEY:
+        print("Fehler: GOOGLE_API_KEY nicht gefunden. Überprüfe die .env-Datei im Projekt-Root.")
+        sys.exit(1)
+    try:
+        server.run_server(args.host, args.port, args.workers)
+    except RuntimeError as e:
+        print(f"Server konnte nicht gestartet werden: {e}")
+        sys.exit(1)
@@ -0,0 +1,50 @@
+# src/chatty_app/auth.py
+"""Registrierung und Login gegen die Benutzer im Storage-Backend – ohne Qt, damit GUI und Server sie teilen."""
+from . import firebase_logger
+from . import metrics
+from .storage import UserAlreadyExists
+from .user_directory import canonical_user_id
+
+
+@metrics.traced("auth.register_user")
+def register_user(username, password):
+    """Legt einen Benutzer an. Gibt (Erfolg, Meldung, Dokument-ID) zurück."""
+    storage = firebase_logger.get_storage()
+    if not storage: return False, "Datenbank nicht initialisiert.", None
+    if not username or not password: return False, "Benutzername/Passwort leer.", None
+    user_doc_id = canonical_user_id(username)
+    if not user_doc_id: return False, "Ungültiger Benutzername.", None
+    try:
+        # Prüfen und Anlegen in einem Aufruf; das Dokument landet gleich im Cache
+        firebase_logger.get_user_directory().create(user_doc_id, {'original_username': username, 'password_plain': password})
+        print(f"Benutzer '{username}' registriert (PASSWORT UNGESCHÜTZT!).")
+        return True, "Registrierung erfolgreich.", user_doc_id
+    except UserAlreadyExists: return False, "Benutzername vergeben.", None
+    except Exception as e: return False, f"Fehler bei Registrierung: {e}", None
+
+
+@metrics.traced("auth.verify_user")
+def verify_user(username, password):
+    """Prüft die Zugangsdaten. Gibt (Erfolg, Meldung, ursprünglicher Benutzername) zurück."""
+    storage = firebase_logger.get_storage()
+    if not storage: return False, "Datenbank nicht initialisiert.", None
+    if not username or not password: return False, "Benutzername/Passwort erforderlich.", None
+    user_doc_id = canonical_user_id(username)
+    if not user_doc_id: return False, "Ungültiger Benutzername.", None
+    try:
+        directory = firebase_logger.get_user_directory()
+        # Wiederholte Logins kommen ohne Abfrage aus dem Cache
+        user_data = directory.get(user_doc_id)
+        if user_data is not None and user_data.get('password_plain') != password:
+            # Das Passwort könnte seit dem Lesen geändert worden sein
+            user_data = directory.get(user_doc_id, refresh=True)
+        if user_data is None: return False, "Benutzername nicht gefunden.", None
+        stored_plain_password = user_data.get('password_plain')
+        if not stored_plain_password: return False, "Interner Fehler (Passwortfeld fehlt).", None
+        if password == stored_plain_password:
+            # 'last_seen' wird gedrosselt im Hintergrund mit dem nächsten Log-Batch geschrieben
+            firebase_logger.touch_user_last_seen(user_doc_id)
+            print(f"Benutzer '{username}' verifiziert (PASSWORT UNGESCHÜTZT!).")
+            return True, "Login erfolgreich.", user_data.get('original_username', username)
+        else: return False, "Falsches Passwort.", None
+    except Exception as e: return False, f"Fehler beim Login: {e}", None
@@ -0,0 +1,157 @@
+# src/chatty_app/batch_runner.py
+"""Führt vorgegebene Gespräche (JSONL) ohne GUI durch gemini_interface, z.B. für Persona-Regressionstests.
+
+Eingabe, eine Zeile pro Gespräch:  {"id": "smalltalk-1", "turns": ["Hallo!", "Wie geht's?"]}
+Ausgabe, eine Zeile pro fertigem Gespräch (sofort geschrieben, Reihenfolge nach Fertigstellung):
+    {"id", "ok", "error", "turns": [{"input", "response", "ok", "seconds"}], "total_seconds", "finished_at"}
+
+Bereits in der Ausgabedatei vorhandene Gespräche werden beim erneuten Start übersprungen, so lässt sich
+ein abgebrochener Lauf fortsetzen. Die Gespräche werden nicht nach Firestore geloggt.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+from . import gemini_interface
+
+# Präfix der Sitzungs-IDs, damit Batch-Sitzungen nie mit echten Benutzern kollidieren
+SESSION_PREFIX = "batch:"
+
+
+def iter_conversations(path):
+    """Liest Gespräche aus einer JSONL-Datei. Ohne 'id' wird die Zeilennummer verwendet."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                print(f"Warnung: Zeile {line_number} in {path} ist kein gültiges JSON und wird übersprungen: {e}")
+                continue
+            turns = data.get('turns') or data.get('messages') or []
+            if not turns:
+                print(f"Warnung: Zeile {line_number} in {path} enthält keine 'turns' und wird übersprungen.")
+                continue
+            yield str(data.get('id') or f"line-{line_number}"), [str(turn) for turn in turns]
+
+
+def load_finished_ids(path, include_failed=True):
+    """IDs der Gespräche, die bereits in der Ausgabedatei stehen (abgeschnittene letzte Zeilen zählen nicht)."""
+    finished = {}
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            # Spätere Zeilen (erneute Versuche) überschreiben frühere
+            finished[record.get('id')] = bool(record.get('ok'))
+    return {conversation_id for conversation_id, ok in finished.items() if ok or include_failed}
+
+
+def run_conversation(conversation_id, turns):
+    """Spielt ein Gespräch in einer eigenen, frischen Sitzung (Persona aus INITIAL_HISTORY) durch."""
+    user_id = SESSION_PREFIX + conversation_id
+    started = time.perf_counter()
+    record = {'id': conversation_id, 'ok': True, 'error': None, 'turns': []}
+    gemini_interface.reset_chat_session(user_id)
+    try:
+        success, error_msg = gemini_interface.initialize_gemini(user_id)
+        if not success:
+            record.update(ok=False, error=error_msg)
+            return record
+        for user_input in turns:
+            turn_started = time.perf_counter()
+            success, response_or_error = gemini_interface.send_message_to_gemini(user_input, user_id=user_id)
+            record['turns'].append({
+                'input': user_input,
+                'response': response_or_error if success else None,
+                'ok': success,
+                'seconds': round(time.perf_counter() - turn_started, 4),
+            })
+            if not success:
+                # Ohne diese Antwort wäre der weitere Verlauf nicht mehr vergleichbar
+                record.update(ok=False, error=response_or_error)
+                break
+    finally:
+        gemini_interface.reset_chat_session(user_id)
+        record['total_seconds'] = round(time.perf_counter() - started, 4)
+        record['finished_at'] = datetime.now(timezone.utc).isoformat()
+    return record
+
+
+class _ResultWriter:
+    """Hängt Ergebnisse zeilenweise an und schreibt sie sofort auf die Platte."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a+", encoding="utf-8")
+        # Eine beim Abbruch halb geschriebene Zeile abschließen, sonst klebt der nächste Eintrag daran
+        self._file.seek(0, os.SEEK_END)
+        if self._file.tell() > 0:
+            self._file.seek(self._file.tell() - 1)
+            if self._file.read(1) != "\n":
+                self._file.write("\n")
+
+    def write(self, record):
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def run_batch(input_path, output_path, concurrency=4, resume=True, retry_failed=False, on_record=None):
+    """Führt alle Gespräche aus input_path mit höchstens `concurrency` gleichzeitigen Sitzungen aus.
+
+    Es werden nie mehr als 2 * concurrency Gespräche gleichzeitig im Speicher gehalten.
+    Gibt eine Zusammenfassung (Anzahl, Fehler, übersprungen, Dauer) als dict zurück.
+    """
+    concurrency = max(1, int(concurrency))
+    skip_ids = load_finished_ids(output_path, include_failed=not retry_failed) if resume else set()
+    if not resume and os.path.exists(output_path):
+        os.remove(output_path)
+    summary = {'completed': 0, 'failed': 0, 'skipped': 0, 'turns': 0}
+    started = time.perf_counter()
+    writer = _ResultWriter(output_path)
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch")
+    pending = set()
+
+    def collect(done):
+        for future in done:
+            record = future.result()
+            writer.write(record)
+            summary['completed' if record['ok'] else 'failed'] += 1
+            summary['turns'] += len(record['turns'])
+            if on_record:
+                on_record(record)
+
+    try:
+        for conversation_id, turns in iter_conversations(input_path):
+            if conversation_id in skip_ids:
+                summary['skipped'] += 1
+                continue
+            if len(pending) >= 2 * concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(run_conversation, conversation_id, turns))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+    finally:
+        # Bei Abbruch (Strg+C) nichts Neues mehr starten; Fertiges steht bereits in der Datei
+        executor.shutdown(wait=False, cancel_futures=True)
+        writer.close()
+    summary['seconds'] = round(time.perf_counter() - started, 2)
+    return summary
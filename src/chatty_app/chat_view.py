@@ -0,0 +1,432 @@
+# src/chatty_app/chat_view.py
+import itertools
+from collections import OrderedDict
+from html import escape
+
+from PyQt6.QtCore import Qt, QRectF, QSize, QTimer, pyqtSignal
+from PyQt6.QtGui import QColor, QPainter, QStandardItem, QStandardItemModel, QTextDocument
+from PyQt6.QtWidgets import QAbstractItemView, QListView, QStyledItemDelegate
+
+from . import config
+from .markdown_render import DOCUMENT_STYLE_SHEET, IncrementalMarkdownRenderer
+
+MESSAGE_ROLE = Qt.ItemDataRole.UserRole + 1
+
+_message_ids = itertools.count(1)
+
+
+def _px(value, default):
+    """Wandelt Konfigurationswerte wie "15px" in Ganzzahlen um."""
+    try:
+        return int(str(value).replace("px", "").strip())
+    except (TypeError, ValueError):
+        return default
+
+
+class ChatMessage:
+    """Eine Nachricht im Chatverlauf. revision ändert sich bei jeder Textänderung (z.B. beim Streaming)."""
+    __slots__ = ("message_id", "speaker", "text", "kind", "timestamp", "revision")
+
+    def __init__(self, speaker, text, kind, timestamp=None):
+        self.message_id = next(_message_ids)
+        self.speaker = speaker
+        self.text = text
+        self.kind = kind  # "user", "bot" oder "error"
+        self.timestamp = timestamp
+        self.revision = 0
+
+
+class ChatTranscriptModel(QStandardItemModel):
+    """Listenmodell des Chatverlaufs.
+
+    Die Blasengröße wird beim Einfügen einmal berechnet und als SizeHintRole gespeichert,
+    so dass QListView beim Layout keine Python-Aufrufe pro Zeile braucht.
+    """
+
+    def message(self, row):
+        return self.item(row).data(MESSAGE_ROLE)
+
+    def append_message(self, message, size):
+        """Hängt eine Nachricht an und gibt ihre Zeilennummer zurück."""
+        self.appendRow(self._make_item(message, size))
+        return self.rowCount() - 1
+
+    def insert_messages(self, row, messages_and_sizes):
+        """Fügt Nachrichten (in Reihenfolge) ab Zeile row ein."""
+        for offset, (message, size) in enumerate(messages_and_sizes):
+            self.insertRow(row + offset, self._make_item(message, size))
+
+    def row_height(self, row):
+        return self.item(row).data(Qt.ItemDataRole.SizeHintRole).height()
+
+    def find_row(self, message):
+        """Zeile einer Nachricht oder None. Sucht von unten, dort liegen laufende Antworten."""
+        for row in range(self.rowCount() - 1, -1, -1):
+            if self.message(row) is message:
+                return row
+        return None
+
+    def update_message(self, row, text):
+        """Ändert den Text einer Nachricht; die neue Größe muss danach mit set_size gesetzt werden."""
+        message = self.message(row)
+        message.text = text
+        message.revision += 1
+        return message
+
+    def set_size(self, row, size):
+        self.item(row).setData(size, Qt.ItemDataRole.SizeHintRole)
+        return self.index(row, 0)
+
+    @staticmethod
+    def _make_item(message, size):
+        item = QStandardItem()
+        item.setEditable(False)
+        item.setData(message, MESSAGE_ROLE)
+        item.setData(size, Qt.ItemDataRole.SizeHintRole)
+        return item
+
+
+class BubbleDelegate(QStyledItemDelegate):
+    """Zeichnet Nachrichten als Sprechblasen.
+
+    Textlayouts (QTextDocument) werden pro Nachricht, Revision und Breite zwischengespeichert,
+    gezeichnet werden nur die sichtbaren Zeilen. sizeHint wird nicht überschrieben: die Größe
+    liegt bereits als SizeHintRole im Modell.
+    """
+
+    MARGIN_NEAR = 10
+    MARGIN_FAR = 70
+    PADDING_X = 12
+    PADDING_Y = 8
+    MAX_WIDTH_RATIO = 0.8
+    MAX_CACHED_DOCUMENTS = 200
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.radius = _px(getattr(config, 'BUBBLE_BORDER_RADIUS', '15px'), 15)
+        self.spacing = _px(getattr(config, 'BUBBLE_VERTICAL_SPACING', '10px'), 10)
+        # Schlüssel (id, breite); gespeichert wird die Revision, damit veraltete Layouts ersetzt werden
+        self._documents = OrderedDict()  # -> (revision, (QTextDocument, bubble_w, bubble_h))
+        # Bot-Antworten als Markdown; beim Streaming wird nur der letzte offene Block neu übersetzt
+        self._markdown = IncrementalMarkdownRenderer(max_entries=self.MAX_CACHED_DOCUMENTS)
+
+    def clear_cache(self, keep_rendered=False):
+        """Verwirft gecachte Layouts; das übersetzte Markdown hängt nicht von der Breite ab."""
+        self._documents.clear()
+        if not keep_rendered:
+            self._markdown.clear()
+
+    def message_html(self, message):
+        if message.kind == "bot" and config.MARKDOWN_RENDERING:
+            return self._markdown.render(message.message_id, message.text)
+        return escape(message.text).replace('\n', '<br>')
+
+    def _colors(self, message):
+        if message.kind == "user":
+            return getattr(config, 'USER_BUBBLE_BG', config.BUBBLE_COLOR), config.BUBBLE_FG
+        if message.kind == "error":
+            return config.ERROR_BUBBLE_BG, config.ERROR_BUBBLE_FG
+        return config.BUBBLE_COLOR, config.BUBBLE_FG
+
+    @staticmethod
+    def _view_width(option):
+        # Gleiche Breite wie bei der Größenberechnung, damit der Layout-Cache trifft
+        widget = option.widget
+        if widget is not None and hasattr(widget, 'viewport'):
+            return widget.viewport().width()
+        return option.rect.width()
+
+    def _layout(self, message, view_width, font):
+        key = (message.message_id, view_width)
+        cached = self._documents.get(key)
+        if cached is not None and cached[0] == message.revision:
+            self._documents.move_to_end(key)
+            return cached[1]
+        _, text_color = self._colors(message)
+        doc = QTextDocument()
+        doc.setDocumentMargin(0)
+        doc.setDefaultFont(font)
+        doc.setDefaultStyleSheet(DOCUMENT_STYLE_SHEET)
+        doc.setHtml(
+            f'<div style="color: {text_color};"><b>{escape(message.speaker)}:</b><br>'
+            f'{self.message_html(message)}</div>'
+        )
+        max_bubble_width = min(view_width * self.MAX_WIDTH_RATIO, view_width - self.MARGIN_NEAR - self.MARGIN_FAR)
+        max_text_width = max(40.0, max_bubble_width - 2 * self.PADDING_X)
+        doc.setTextWidth(max_text_width)
+        ideal_width = doc.idealWidth()
+        if ideal_width < max_text_width:
+            # Kurze Nachrichten bekommen schmale Blasen
+            doc.setTextWidth(ideal_width)
+        bubble_w = doc.textWidth() + 2 * self.PADDING_X
+        bubble_h = doc.size().height() + 2 * self.PADDING_Y
+        result = (doc, bubble_w, bubble_h)
+        self._documents[key] = (message.revision, result)
+        self._documents.move_to_end(key)
+        while len(self._documents) > self.MAX_CACHED_DOCUMENTS:
+            self._documents.popitem(last=False)
+        return result
+
+    def bubble_size(self, message, view_width, font):
+        """Größe der Zeile für eine Nachricht bei gegebener Viewport-Breite."""
+        _, _, bubble_h = self._layout(message, view_width, font)
+        return QSize(view_width, int(bubble_h) + self.spacing)
+
+    def paint(self, painter, option, index):
+        message = index.data(MESSAGE_ROLE)
+        if message is None:
+            return super().paint(painter, option, index)
+        rect = option.rect
+        doc, bubble_w, bubble_h = self._layout(message, self._view_width(option), option.font)
+        background_color, _ = self._colors(message)
+        if message.kind == "user":
+            x = rect.right() - self.MARGIN_NEAR - bubble_w
+        else:
+            x = rect.left() + self.MARGIN_NEAR
+        bubble_rect = QRectF(x, rect.top(), bubble_w, bubble_h)
+        # Große Radien würden den Text an den Ecken anschneiden
+        radius = min(self.radius, 2 * self.PADDING_X, bubble_h / 2)
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(background_color))
+        painter.drawRoundedRect(bubble_rect, radius, radius)
+        painter.translate(x + self.PADDING_X, rect.top() + self.PADDING_Y)
+        doc.drawContents(painter)
+        painter.restore()
+
+
+class ChatTranscriptView(QListView):
+    """Virtualisierte Chat-Ansicht: nur sichtbare Blasen werden gezeichnet,
+    jede Nachricht wird beim Einfügen genau einmal gelayoutet.
+
+    top_reached/bottom_reached werden gesendet, wenn der Benutzer an den oberen bzw. unteren
+    Rand scrollt (auch per Mausrad, wenn es noch nichts zu scrollen gibt).
+    """
+
+    RELAYOUT_DELAY_MS = 50
+
+    top_reached = pyqtSignal()
+    bottom_reached = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.transcript_model = ChatTranscriptModel(self)
+        self.bubble_delegate = BubbleDelegate(self)
+        self.setModel(self.transcript_model)
+        self.setItemDelegate(self.bubble_delegate)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setLayoutMode(QListView.LayoutMode.SinglePass)
+        self.setUniformItemSizes(False)
+        self.setWordWrap(True)
+
+        self._sized_width = None
+        self._adjusting_scroll = False
+        self._relayout_timer = QTimer(self)
+        self._relayout_timer.setSingleShot(True)
+        self._relayout_timer.timeout.connect(self._recompute_sizes)
+        self.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+
+    def _content_width(self):
+        return self.viewport().width()
+
+    def _on_scrolled(self, value):
+        scroll_bar = self.verticalScrollBar()
+        # Beim Einfügen/Entfernen verschiebt sich der Scrollwert, das ist kein Scrollen des Benutzers
+        if self._adjusting_scroll or scroll_bar.maximum() <= scroll_bar.minimum():
+            return
+        if value <= scroll_bar.minimum():
+            self.top_reached.emit()
+        elif value >= scroll_bar.maximum():
+            self.bottom_reached.emit()
+
+    def wheelEvent(self, event):
+        scroll_bar = self.verticalScrollBar()
+        delta = event.angleDelta().y()
+        # Am Rand ändert sich der Scrollwert nicht mehr, valueChanged würde nicht gesendet
+        if delta > 0 and scroll_bar.value() <= scroll_bar.minimum():
+            self.top_reached.emit()
+        elif delta < 0 and scroll_bar.value() >= scroll_bar.maximum():
+            self.bottom_reached.emit()
+        super().wheelEvent(event)
+
+    def _make_sized(self, entries):
+        width, font = self._content_width(), self.font()
+        sized = []
+        for speaker, text, kind, timestamp in entries:
+            message = ChatMessage(speaker, text, kind, timestamp)
+            sized.append((message, self.bubble_delegate.bubble_size(message, width, font)))
+        return sized
+
+    def is_at_bottom(self):
+        scroll_bar = self.verticalScrollBar()
+        return scroll_bar.value() >= scroll_bar.maximum() - 4
+
+    def message_count(self):
+        return self.transcript_model.rowCount()
+
+    def first_message(self):
+        return self.transcript_model.message(0) if self.message_count() else None
+
+    def oldest_timestamp(self):
+        """Zeitstempel der ältesten angezeigten Nachricht, die einen hat (oder None)."""
+        model = self.transcript_model
+        for row in range(model.rowCount()):
+            timestamp = model.message(row).timestamp
+            if timestamp is not None:
+                return timestamp
+        return None
+
+    def last_message(self):
+        count = self.message_count()
+        return self.transcript_model.message(count - 1) if count else None
+
+    def append_message(self, speaker, text, kind, timestamp=None, scroll=True):
+        """Hängt eine Nachricht an und gibt das ChatMessage-Objekt zurück."""
+        message = ChatMessage(speaker, text, kind, timestamp)
+        size = self.bubble_delegate.bubble_size(message, self._content_width(), self.font())
+        self.transcript_model.append_message(message, size)
+        if scroll:
+            self.scrollToBottom()
+        return message
+
+    def append_messages(self, entries):
+        """Hängt (speaker, text, kind, timestamp)-Einträge an, ohne die Scrollposition zu ändern."""
+        self.transcript_model.insert_messages(self.message_count(), self._make_sized(entries))
+
+    def restore_messages(self, entries):
+        """Hängt gespeicherte (speaker, text, kind, timestamp, width, height)-Einträge an, z.B. aus einem Snapshot.
+
+        Wurde ein Eintrag bei derselben Viewport-Breite gespeichert, wird seine Höhe übernommen und
+        die Blase erst beim Zeichnen gelayoutet.
+        """
+        width, font = self._content_width(), self.font()
+        sized = []
+        for speaker, text, kind, timestamp, saved_width, saved_height in entries:
+            message = ChatMessage(speaker, text, kind, timestamp)
+            if saved_width == width and saved_height:
+                size = QSize(width, saved_height)
+            else:
+                size = self.bubble_delegate.bubble_size(message, width, font)
+            sized.append((message, size))
+        self.transcript_model.insert_messages(self.message_count(), sized)
+
+    def scroll_to_timestamp(self, timestamp):
+        """Scrollt zur (neuesten) Nachricht mit diesem Zeitstempel. False, wenn sie nicht angezeigt wird."""
+        model = self.transcript_model
+        for row in range(model.rowCount() - 1, -1, -1):
+            if model.message(row).timestamp == timestamp:
+                self.scrollTo(model.index(row, 0), QAbstractItemView.ScrollHint.PositionAtCenter)
+                return True
+        return False
+
+    def message_size(self, message):
+        """Aktuelle Zeilengröße einer angezeigten Nachricht (oder None)."""
+        row = self.transcript_model.find_row(message)
+        if row is None:
+            return None
+        return self.transcript_model.item(row).data(Qt.ItemDataRole.SizeHintRole)
+
+    def prepend_messages(self, entries):
+        """Fügt ältere Einträge oben ein; der sichtbare Ausschnitt bleibt dabei stehen."""
+        sized = self._make_sized(entries)
+        if not sized:
+            return
+        scroll_bar = self.verticalScrollBar()
+        old_value = scroll_bar.value()
+        self._adjusting_scroll = True
+        try:
+            self.transcript_model.insert_messages(0, sized)
+            self.doItemsLayout()
+            scroll_bar.setValue(old_value + sum(size.height() for _, size in sized))
+        finally:
+            self._adjusting_scroll = False
+
+    def remove_first_messages(self, count):
+        """Entfernt die ältesten Zeilen, ohne dass der sichtbare Ausschnitt springt."""
+        count = min(count, self.message_count())
+        if count <= 0:
+            return
+        model = self.transcript_model
+        removed_height = sum(model.row_height(row) for row in range(count))
+        scroll_bar = self.verticalScrollBar()
+        old_value = scroll_bar.value()
+        self._adjusting_scroll = True
+        try:
+            model.removeRows(0, count)
+            self.doItemsLayout()
+            scroll_bar.setValue(max(0, old_value - removed_height))
+        finally:
+            self._adjusting_scroll = False
+
+    def remove_last_messages(self, count):
+        count = min(count, self.message_count())
+        if count <= 0:
+            return
+        self._adjusting_scroll = True
+        try:
+            self.transcript_model.removeRows(self.message_count() - count, count)
+            self.doItemsLayout()
+        finally:
+            self._adjusting_scroll = False
+
+    def remove_message(self, message):
+        """Entfernt eine angezeigte Nachricht (z.B. eine abgebrochene Antwort). False, wenn sie nicht angezeigt wird."""
+        row = self.transcript_model.find_row(message)
+        if row is None:
+            return False
+        self._adjusting_scroll = True
+        try:
+            self.transcript_model.removeRows(row, 1)
+            self.doItemsLayout()
+        finally:
+            self._adjusting_scroll = False
+        return True
+
+    def update_message(self, message, text, scroll=True):
+        """Ändert den Text einer angezeigten Nachricht (z.B. beim Streaming).
+
+        Gibt False zurück, wenn die Nachricht nicht mehr im angezeigten Ausschnitt liegt.
+        """
+        row = self.transcript_model.find_row(message)
+        if row is None:
+            return False
+        follow = scroll and self.is_at_bottom()
+        self.transcript_model.update_message(row, text)
+        size = self.bubble_delegate.bubble_size(message, self._content_width(), self.font())
+        index = self.transcript_model.set_size(row, size)
+        # Größenänderung melden, damit QListView die Zeilenpositionen neu berechnet
+        self.bubble_delegate.sizeHintChanged.emit(index)
+        if follow:
+            self.scrollToBottom()
+        return True
+
+    def clear(self):
+        self.transcript_model.clear()
+        self.bubble_delegate.clear_cache()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self._content_width() != self._sized_width:
+            # Größen erst neu berechnen, wenn sich die Breite eine Weile nicht mehr ändert
+            self._relayout_timer.start(self.RELAYOUT_DELAY_MS)
+
+    def _recompute_sizes(self):
+        width = self._content_width()
+        self._sized_width = width
+        follow = self.is_at_bottom()
+        self.bubble_delegate.clear_cache(keep_rendered=True)
+        font = self.font()
+        model = self.transcript_model
+        for row in range(model.rowCount()):
+            model.set_size(row, self.bubble_delegate.bubble_size(model.message(row), width, font))
+        self.doItemsLayout()
+        if follow:
+            self.scrollToBottom()
@@ -9,6 +9,7 @@ LOGO_PATH = os.path.join(ASSETS_DIR, "Logo.png")
 FIREBASE_SERVICE_ACCOUNT_KEY_PATH = os.path.join(PROJECT_ROOT, "firebase-service-account.json")
 FIREBASE_LOG_COLLECTION_NAME = "chat_logs"
 FIREBASE_USERS_COLLECTION_NAME = "users"
+DATA_DIR = os.path.join(PROJECT_ROOT, 'data') # Lokale Laufzeitdaten (nicht versioniert)
 
 # --- Farben (unverändert) ---
 BG_COLOR = "#C7FAF9"
@@ -34,12 +35,69 @@ FONT_SIZE_XLARGE = 18
 # --- Layout & Größen ---
 LOGO_SIZE = (150, 150)
 TOP_BAR_LOGO_SIZE = (30, 30)
+IMAGE_DISK_CACHE_DIR = os.path.join(DATA_DIR, "image_cache") # Vorskalierte Bilder; None = nur Speicher-Cache
 # SEPARATOR_LENGTH = 30 # Nicht mehr benötigt
 
 # --- NEUE Bubble Styling Konstanten ---
 BUBBLE_BORDER_RADIUS = "60px" # Radius für abgerundete Ecken
 BUBBLE_VERTICAL_SPACING = "100px" # Abstand zwischen den Bubbles (ersetzt die Linie)
 
+# --- Darstellung der Bot-Antworten ---
+MARKDOWN_RENDERING = True # Markdown (Listen, Hervorhebungen, Code) in Bot-Antworten formatieren
+
+# --- Chatverlauf (seitenweises Nachladen aus chat_logs) ---
+TRANSCRIPT_PAGE_SIZE = 30 # Nachrichten pro nachgeladener Seite
+TRANSCRIPT_MAX_ROWS = 200 # Höchstens so viele Nachrichten werden gleichzeitig angezeigt
+
+# --- Lokale Volltextsuche über den Chatverlauf (SQLite FTS5) ---
+SEARCH_INDEX_ENABLED = True
+SEARCH_INDEX_PATH = os.path.join(DATA_DIR, "search_index.sqlite3")
+SEARCH_INDEX_SPEAKERS = ("Du", "Chatty") # Nur Gesprächseinträge werden indexiert
+SEARCH_RESULT_LIMIT = 20
+
+# --- Gesprächs-Snapshots (Verlauf und Chatverlauf pro Benutzer, beim Login wiederhergestellt) ---
+SNAPSHOT_ENABLED = True
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshots") # msgpack, falls installiert (pip install msgpack), sonst JSON
+SNAPSHOT_COMPACT_EVERY = 50 # Nach so vielen angehängten Runden wird die Datei neu geschrieben
+
+# --- Speicher-Backend für Logs und Benutzer ---
+STORAGE_BACKEND = "firestore" # "firestore" (braucht den Service Account Key) oder "sqlite" (lokale Datei)
+SQLITE_STORAGE_PATH = os.path.join(DATA_DIR, "chatty.sqlite3")
+SQLITE_STORAGE_SYNCHRONOUS = "NORMAL" # SQLite PRAGMA synchronous im WAL-Modus
+
+# --- Benutzerverzeichnis (Cache der Benutzerdokumente) ---
+USER_CACHE_TTL_S = 300 # So lange gilt ein gelesenes Benutzerdokument ohne erneute Abfrage
+USER_CACHE_MAX_ENTRIES = 1000
+USER_LAST_SEEN_DEBOUNCE_S = 60 # 'last_seen' wird pro Benutzer höchstens so oft geschrieben, spätere Updates am Ende des Fensters
+
+# --- Log-Batching (Firestore WriteBatch im Hintergrund) ---
+LOG_BATCHING_ENABLED = True
+LOG_BATCH_SIZE = 25 # Einträge pro WriteBatch (max. 500)
+LOG_FLUSH_INTERVAL_S = 2.0 # Spätestens nach dieser Zeit wird geschrieben
+
+# --- Lokales Log-Journal (Write-Ahead, überbrückt Firestore-Ausfälle) ---
+LOG_JOURNAL_ENABLED = True
+LOG_JOURNAL_PATH = os.path.join(DATA_DIR, "log_journal.sqlite3")
+LOG_JOURNAL_SYNCHRONOUS = "NORMAL" # SQLite PRAGMA synchronous: "FULL" = fsync bei jedem Eintrag
+
+# --- Export von chat_logs (scripts/export_chat_logs.py) ---
+EXPORT_DIR = os.path.join(DATA_DIR, "exports")
+EXPORT_FORMAT = "ndjson" # "ndjson" oder "parquet" (braucht pyarrow)
+EXPORT_PAGE_SIZE = 500 # Einträge pro Abfrage bzw. Parquet-Zeilengruppe
+EXPORT_ROWS_PER_FILE = 100000
+
+# --- Metriken (Latenz-Histogramme, Zähler, Tokenverbrauch) ---
+METRICS_EXPORT_PATH = None # z.B. os.path.join(DATA_DIR, "chatty.prom") für den node_exporter textfile collector
+METRICS_EXPORT_FORMAT = "prometheus" # "prometheus" oder "json"
+METRICS_EXPORT_INTERVAL_S = 15.0
+METRICS_DEBUG_OVERLAY = False # Overlay im Chat anzeigen (umschaltbar mit Strg+Umschalt+M)
+
+# --- Server-Modus (scripts/run_chatty_server.py) ---
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_WORKER_THREADS = 32 # Blockierende Gemini-/Firestore-Aufrufe laufen in diesem Pool
+SERVER_TOKEN_TTL_S = 12 * 3600 # Gültigkeit eines Login-Tokens
+
 # --- Gemini Konfiguration (unverändert) ---
 INITIAL_HISTORY = [
      { # ... (History Inhalt unverändert) ...
@@ -56,7 +114,67 @@ INITIAL_HISTORY = [
         }
 ]
 
+# --- Start-Verhalten ---
+BACKEND_INIT_DELAY_MS = 50 # Firebase-Init/SDK-Vorladen erst nach dem ersten Zeichnen des Login-Fensters
+DEFERRED_MODULES = ["google.generativeai"] # Werden nach dem ersten Zeichnen im Hintergrund vorgeladen
+STARTUP_BUDGET_MS = 1500 # Budget für Kaltstart bis zum ersten Zeichnen (scripts/run_chatty.py --profile-startup)
+
+# --- Gemini Modell & Sitzungen ---
+GEMINI_MODEL_NAME = "gemini-1.5-pro-latest"
+GEMINI_MAX_SESSIONS = 100 # Maximal gleichzeitig gehaltene Chat-Sitzungen (LRU)
+GEMINI_SESSION_IDLE_TTL_S = 1800 # Unbenutzte Sitzungen werden nach dieser Zeit verworfen
+
+# --- Gemini Verlaufsfenster (Token-Budget) ---
+GEMINI_TOKEN_COUNTING = "estimate" # "estimate" (lokal, ohne Netzwerk) oder "api" (model.count_tokens)
+GEMINI_HISTORY_TOKEN_BUDGET = 6000 # Ab hier werden ältere Runden zusammengefasst
+GEMINI_HISTORY_TARGET_TOKENS = 4000 # Zielgröße nach dem Zusammenfassen
+GEMINI_HISTORY_MIN_RECENT_MESSAGES = 6 # Die letzten Nachrichten bleiben immer wörtlich erhalten
+GEMINI_SUMMARY_MODEL_NAME = "gemini-1.5-flash-latest"
+GEMINI_SUMMARY_MAX_WORDS = 150
+
+# --- Gemini Antwort-Cache (wiederkehrender Small Talk) ---
+GEMINI_RESPONSE_CACHE_ENABLED = True
+GEMINI_RESPONSE_CACHE_MAX_ENTRIES = 256 # LRU im Speicher
+GEMINI_RESPONSE_CACHE_TTL_S = 6 * 3600
+GEMINI_RESPONSE_CACHE_MAX_PROMPT_CHARS = 80 # Nur kurze Eingaben werden gecacht
+GEMINI_RESPONSE_CACHE_HISTORY_TAIL = 2 # Anzahl der letzten Verlaufsnachrichten im Schlüssel
+GEMINI_RESPONSE_CACHE_DISK_PATH = None # z.B. os.path.join(DATA_DIR, "response_cache.sqlite3") für einen persistenten Cache
+
+# --- Gemini Streaming ---
+GEMINI_STREAMING = True # Antworten abschnittsweise anzeigen, sobald sie eintreffen
+
+# Fristen und Wiederholungen (429, 503, Verbindungsabbrüche)
+GEMINI_REQUEST_DEADLINE_S = 60.0 # Gesamtfrist pro Nachricht inkl. aller Wiederholungen
+GEMINI_ATTEMPT_TIMEOUT_S = 30.0 # Höchstdauer eines einzelnen Versuchs
+GEMINI_MAX_ATTEMPTS = 4
+GEMINI_RETRY_BASE_DELAY_S = 0.5 # Backoff: zufällig zwischen 0 und base * 2^versuch ...
+GEMINI_RETRY_MAX_DELAY_S = 8.0 # ... höchstens so lange
+# Hedging: nach p95 der bisherigen Antwortzeiten eine zweite Anfrage starten (nur ohne Streaming)
+GEMINI_HEDGING_ENABLED = False
+GEMINI_HEDGE_DELAY_S = 3.0 # Verzögerung, solange noch zu wenige Messwerte vorliegen
+GEMINI_HEDGE_MIN_SAMPLES = 20
+# Client-seitiges Rate-Limit pro Modell: Anfragen (rpm) und Tokens (tpm) pro Minute, fehlende Modelle sind unbegrenzt.
+# Anfragen über dem Limit warten in einer FIFO-Warteschlange, statt vom Server mit 429 abgelehnt zu werden.
+# Standardmäßig aus; einschalten mit GEMINI_RATE_LIMIT_TIER=free in der .env oder einem eigenen Dict hier.
+GEMINI_RATE_LIMIT_TIERS = {
+    # Kontingente des kostenlosen Gemini-API-Tarifs
+    "free": {
+        "gemini-1.5-pro-latest": {'rpm': 2, 'tpm': 32000},
+        "gemini-1.5-flash-latest": {'rpm': 15, 'tpm': 1000000},
+    },
+}
+GEMINI_RATE_LIMITS = {}
+GEMINI_RATE_LIMIT_MAX_WAIT_S = 300.0 # Höchstens so lange in der Warteschlange; zählt nicht zur Frist der Nachricht
+GEMINI_RATE_LIMIT_HEADROOM = 0.9 # Durchsatz knapp unter dem Kontingent halten
+GEMINI_EXPECTED_OUTPUT_TOKENS = 400 # Vorab-Schätzung der Antwortlänge; korrigiert, sobald usage_metadata vorliegt
+
 # --- API Key Handling (unverändert) ---
 dotenv_path = os.path.join(PROJECT_ROOT, '.env')
 load_dotenv(dotenv_path=dotenv_path)
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
\ No newline at end of file
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+GEMINI_RATE_LIMIT_TIER = os.getenv("GEMINI_RATE_LIMIT_TIER")
+if GEMINI_RATE_LIMIT_TIER:
+    if GEMINI_RATE_LIMIT_TIER in GEMINI_RATE_LIMIT_TIERS:
+        GEMINI_RATE_LIMITS = GEMINI_RATE_LIMIT_TIERS[GEMINI_RATE_LIMIT_TIER]
+    else:
+        print(f"Warnung: Unbekannter GEMINI_RATE_LIMIT_TIER '{GEMINI_RATE_LIMIT_TIER}', kein Rate-Limit aktiv.")
\ No newline at end of file
@@ -0,0 +1,299 @@
+# src/chatty_app/conversation_snapshot.py
+"""Gesprächs-Snapshots pro Benutzer: Gemini-Verlauf und sichtbarer Chatverlauf in einer kleinen Binärdatei.
+
+Beim Login werden Verlauf und Blasen daraus in Millisekunden wiederhergestellt, statt die
+chat_logs neu zu lesen und jede Nachricht neu zu layouten. Nach jeder Runde wird nur ein Delta
+angehängt; die Datei wird neu geschrieben, wenn sich der Verlauf vorne geändert hat (z.B. nach
+einer Zusammenfassung) oder nach config.SNAPSHOT_COMPACT_EVERY Deltas.
+
+Dateiformat: MAGIC + Codec-Byte (b"M" = msgpack, b"J" = JSON, falls msgpack fehlt), danach Frames
+aus 4 Byte Länge und Nutzdaten. Der erste Frame ist die Basis ({'base': True, 'history', 'transcript'}),
+jeder weitere eine Runde ({'prefix': Länge des fortgesetzten Verlaufs, 'history', 'transcript'}).
+Ein abgeschnittener letzter Frame (Absturz beim Schreiben) wird beim Laden ignoriert.
+"""
+import json
+import os
+import struct
+import threading
+from collections import OrderedDict, deque, namedtuple
+from datetime import datetime, timezone
+
+from . import config
+
+try:
+    import msgpack
+except ImportError:  # optional: pip install msgpack
+    msgpack = None
+
+MAGIC = b"CHATTYSNAP1"
+_FRAME_HEADER = struct.Struct("<I")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# width/height: Zeilengröße beim Speichern; passt die Breite der Ansicht, entfällt das Layout
+TranscriptEntry = namedtuple("TranscriptEntry", "speaker text kind timestamp width height")
+
+
+class ConversationSnapshot:
+    """Geladener Snapshot: history als Liste von (Rolle, Text), transcript als TranscriptEntry-Liste."""
+
+    def __init__(self, history, transcript):
+        self.history = history
+        self.transcript = transcript
+
+
+def _timestamp_to_us(timestamp):
+    if timestamp is None:
+        return None
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    delta = timestamp - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _timestamp_from_us(value):
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value // 1_000_000, tz=timezone.utc).replace(microsecond=value % 1_000_000)
+
+
+def _pack_entry(entry):
+    return [entry.speaker, entry.text, entry.kind, _timestamp_to_us(entry.timestamp), entry.width, entry.height]
+
+
+def _unpack_entry(values):
+    speaker, text, kind, timestamp_us, width, height = values
+    return TranscriptEntry(speaker, text, kind, _timestamp_from_us(timestamp_us), width, height)
+
+
+class _Codec:
+    def __init__(self, tag):
+        self.tag = tag
+
+    def dumps(self, obj):
+        if self.tag == b"M":
+            return msgpack.packb(obj, use_bin_type=True)
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data):
+        if self.tag == b"M":
+            return msgpack.unpackb(data, raw=False)
+        return json.loads(data.decode("utf-8"))
+
+
+class _UserState:
+    """Was für einen Benutzer auf der Platte steht; Grundlage für das nächste Delta."""
+
+    def __init__(self, history, transcript, frames):
+        self.history = history
+        self.transcript = transcript
+        self.frames = frames
+
+
+class SnapshotStore:
+    """Eine Snapshot-Datei pro Benutzer-ID in directory.
+
+    Nur IDs aus Buchstaben, Ziffern und '_' (siehe user_directory.canonical_user_id) bekommen einen
+    Snapshot; technische IDs wie die der Batch-Läufe ("batch:...") werden übergangen.
+    Die zuletzt benutzten Zustände bleiben im Speicher, damit Deltas ohne Lesen geschrieben werden.
+    """
+
+    def __init__(self, directory, max_transcript_rows=200, compact_every=50, max_cached_users=100):
+        self.directory = directory
+        self.max_transcript_rows = max(1, int(max_transcript_rows))
+        self.compact_every = max(1, int(compact_every))
+        self.max_cached_users = max(1, int(max_cached_users))
+        self._codec = _Codec(b"M" if msgpack is not None else b"J")
+        self._lock = threading.Lock()
+        self._states = OrderedDict()
+
+    def path_for(self, user_id):
+        if not user_id or not all(c.isalnum() or c == '_' for c in user_id):
+            return None
+        return os.path.join(self.directory, f"{user_id}.snapshot")
+
+    def load(self, user_id):
+        """Gibt den ConversationSnapshot des Benutzers zurück (oder None, falls keiner existiert)."""
+        path = self.path_for(user_id)
+        if path is None:
+            return None
+        with self._lock:
+            state = self._get_state_locked(user_id, path)
+            if state is None:
+                return None
+            return ConversationSnapshot(list(state.history), list(state.transcript))
+
+    def save_turn(self, user_id, history, entries):
+        """Speichert den aktuellen Verlauf ((Rolle, Text)-Paare) und die neuen TranscriptEntries einer Runde."""
+        path = self.path_for(user_id)
+        if path is None:
+            return False
+        history = [tuple(item) for item in history] if history is not None else None
+        with self._lock:
+            state = self._get_state_locked(user_id, path)
+            if state is None:
+                state = _UserState([], deque(maxlen=self.max_transcript_rows), 0)
+                self._remember_locked(user_id, state)
+                if history is None:
+                    history = []
+                return self._write_base_locked(path, state, history, entries)
+            if history is None:
+                # Keine Sitzung (mehr) im Speicher: nur den Chatverlauf fortschreiben
+                history = state.history
+            prefix = len(state.history)
+            if (state.frames == 0 or state.frames >= self.compact_every
+                    or len(history) < prefix or history[:prefix] != state.history):
+                return self._write_base_locked(path, state, history, entries)
+            frame = {
+                'prefix': prefix,
+                'history': [list(item) for item in history[prefix:]],
+                'transcript': [_pack_entry(entry) for entry in entries],
+            }
+            try:
+                with open(path, "ab") as f:
+                    f.write(self._frame(frame))
+            except OSError as e:
+                print(f"Warnung: Snapshot für '{user_id}' konnte nicht geschrieben werden: {e}")
+                self._states.pop(user_id, None)
+                return False
+            state.history = list(history)
+            state.transcript.extend(entries)
+            state.frames += 1
+            return True
+
+    def discard(self, user_id):
+        """Löscht den Snapshot des Benutzers."""
+        path = self.path_for(user_id)
+        if path is None:
+            return
+        with self._lock:
+            self._states.pop(user_id, None)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _frame(self, obj):
+        payload = self._codec.dumps(obj)
+        return _FRAME_HEADER.pack(len(payload)) + payload
+
+    def _remember_locked(self, user_id, state):
+        self._states[user_id] = state
+        self._states.move_to_end(user_id)
+        while len(self._states) > self.max_cached_users:
+            self._states.popitem(last=False)
+
+    def _get_state_locked(self, user_id, path):
+        state = self._states.get(user_id)
+        if state is not None:
+            self._states.move_to_end(user_id)
+            return state
+        state = self._read_file(path)
+        if state is not None:
+            self._remember_locked(user_id, state)
+        return state
+
+    def _read_file(self, path):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"Warnung: Snapshot '{path}' nicht lesbar: {e}")
+            return None
+        if not data.startswith(MAGIC) or len(data) <= len(MAGIC):
+            return None
+        tag = data[len(MAGIC):len(MAGIC) + 1]
+        if tag == b"M" and msgpack is None:
+            print(f"Warnung: Snapshot '{path}' braucht msgpack ('pip install msgpack').")
+            return None
+        codec = _Codec(tag)
+        offset = len(MAGIC) + 1
+        history, transcript, frames = [], deque(maxlen=self.max_transcript_rows), 0
+        while offset + _FRAME_HEADER.size <= len(data):
+            (length,) = _FRAME_HEADER.unpack_from(data, offset)
+            end = offset + _FRAME_HEADER.size + length
+            if end > len(data):
+                break
+            try:
+                frame = codec.loads(data[offset + _FRAME_HEADER.size:end])
+                new_history = [tuple(item) for item in frame['history']]
+                new_entries = [_unpack_entry(values) for values in frame['transcript']]
+            except Exception:
+                # Beschädigter Frame: alles davor ist noch gültig
+                break
+            offset = end
+            if frame.get('base'):
+                history, frames = [], 0
+                transcript.clear()
+            else:
+                del history[frame.get('prefix', len(history)):]
+                frames += 1
+            history.extend(new_history)
+            transcript.extend(new_entries)
+        if offset == len(MAGIC) + 1:
+            return None
+        if offset < len(data) or codec.tag != self._codec.tag:
+            # Abgeschnittenen Rest bzw. fremdes Format beim nächsten Speichern durch eine neue Basis ersetzen
+            frames = self.compact_every
+        return _UserState(history, transcript, frames)
+
+    def _write_base_locked(self, path, state, history, entries):
+        transcript = deque(state.transcript, maxlen=self.max_transcript_rows)
+        transcript.extend(entries)
+        frame = {
+            'base': True,
+            'history': [list(item) for item in history],
+            'transcript': [_pack_entry(entry) for entry in transcript],
+        }
+        tmp_path = path + ".tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(MAGIC + self._codec.tag + self._frame(frame))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warnung: Snapshot '{path}' konnte nicht geschrieben werden: {e}")
+            return False
+        state.history = list(history)
+        state.transcript = transcript
+        state.frames = 1
+        return True
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Gibt den SnapshotStore zurück (oder None, wenn Snapshots abgeschaltet sind)."""
+    global _store
+    if not config.SNAPSHOT_ENABLED:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SnapshotStore(
+                    config.SNAPSHOT_DIR,
+                    max_transcript_rows=config.TRANSCRIPT_MAX_ROWS,
+                    compact_every=config.SNAPSHOT_COMPACT_EVERY,
+                    max_cached_users=config.GEMINI_MAX_SESSIONS,
+                )
+    return _store
+
+
+def load_snapshot(user_id):
+    store = get_store()
+    return store.load(user_id) if store else None
+
+
+def save_turn(user_id, history, entries):
+    """Hängt eine Runde an den Snapshot des Benutzers an. Fehler werden nur gemeldet, nie geworfen."""
+    store = get_store()
+    if not store:
+        return False
+    try:
+        return store.save_turn(user_id, history, entries)
+    except Exception as e:
+        print(f"Warnung: Snapshot für '{user_id}' nicht gespeichert: {e}")
+        return False
@@ -1,127 +1,326 @@
 # src/chatty_app/firebase_logger.py
-import firebase_admin
-from firebase_admin import credentials, firestore
-import os
+import itertools
+import uuid
+from datetime import datetime, timezone
 from . import config
+from . import metrics
+from . import search_index
+from .log_writer import BatchLogWriter
+from .log_journal import LogJournal
+from .storage import LogRecord, create_storage # LogRecord bleibt hier importierbar
+from .user_directory import UserDirectory, canonical_user_id
 
-db = None
+_storage = None
+_log_writer = None
+_journal = None
+_user_directory = None
 
-def initialize_firebase():
-    # (Code unverändert)
-    global db
-    if not firebase_admin._apps:
+def initialize_storage(backend=None):
+    """Öffnet das in config.STORAGE_BACKEND gewählte Backend ("firestore" oder "sqlite").
+
+    Gibt (Erfolg, Fehlermeldung) zurück.
+    """
+    global _storage
+    if _storage is not None:
+        return True, None
+    try:
+        storage = create_storage(backend)
+    except ValueError as e:
+        print(f"Fehler: {e}")
+        return False, str(e)
+    success, error_msg = storage.initialize()
+    if success:
+        _storage = storage
+    return success, error_msg
+
+def get_storage():
+    """Gibt das initialisierte Storage-Backend zurück (oder None)."""
+    return _storage
+
+def _get_journal():
+    """Öffnet das lokale Log-Journal beim ersten Zugriff (oder None, falls deaktiviert/fehlerhaft)."""
+    global _journal
+    if _journal is None and config.LOG_JOURNAL_ENABLED:
         try:
-            if not os.path.exists(config.FIREBASE_SERVICE_ACCOUNT_KEY_PATH):
-                 error_msg = f"Firebase Service Account Key nicht gefunden unter: {config.FIREBASE_SERVICE_ACCOUNT_KEY_PATH}"
-                 print(f"Fehler: {error_msg}")
-                 return False, error_msg
-            cred = credentials.Certificate(config.FIREBASE_SERVICE_ACCOUNT_KEY_PATH)
-            firebase_admin.initialize_app(cred)
-            db = firestore.client()
-            print("Firebase erfolgreich initialisiert.")
-            return True, None
-        except ValueError as ve:
-            error_msg = f"Fehler bei Firebase-Initialisierung (ungültiger Key?): {ve}"
-            print(error_msg)
-            return False, error_msg
+            _journal = LogJournal(config.LOG_JOURNAL_PATH, synchronous=config.LOG_JOURNAL_SYNCHRONOUS)
         except Exception as e:
-            error_msg = f"Allgemeiner Fehler bei Firebase-Initialisierung: {e}"
-            print(error_msg)
-            return False, error_msg
-    else:
-        if db is None:
-            db = firestore.client()
-        print("Firebase war bereits initialisiert.")
-        return True, None
+            print(f"Fehler beim Öffnen des Log-Journals '{config.LOG_JOURNAL_PATH}': {e}")
+            return None
+    return _journal
 
-def log_to_firestore(speaker, message, username="System"):
-    # (Code unverändert, verwendet jetzt config.FIREBASE_LOG_COLLECTION_NAME)
-    global db
-    if not db:
+def _build_log_record(speaker, message, username, timestamp=None):
+    # 'timestamp' ist die Client-Zeit, damit Einträge eines Batches (und nachgeholte Einträge)
+    # ihre Reihenfolge behalten
+    return {
+        'speaker': speaker,
+        'message': message,
+        'username': username,
+        'timestamp': (timestamp or datetime.now(timezone.utc)).isoformat()
+    }
+
+def _on_logs_committed(doc_ids):
+    journal = _get_journal()
+    if journal:
+        journal.remove(doc_ids)
+
+def start_log_writer():
+    """Startet den Hintergrund-Writer, der Log-Einträge gebündelt als WriteBatch schreibt.
+
+    Noch nicht bestätigte Einträge aus dem lokalen Journal werden dabei erneut eingereiht.
+    Lokale Backends (SQLite) schreiben direkt und brauchen weder Writer noch Journal.
+    """
+    global _log_writer
+    if _storage is None or not _storage.remote:
+        return None
+    if not config.LOG_BATCHING_ENABLED:
+        replay_journal()
+        return None
+    if _log_writer is None:
+        _log_writer = BatchLogWriter(
+            get_db_client,
+            config.FIREBASE_LOG_COLLECTION_NAME,
+            batch_size=config.LOG_BATCH_SIZE,
+            flush_interval=config.LOG_FLUSH_INTERVAL_S,
+            on_committed=_on_logs_committed
+        )
+        journal = _get_journal()
+        if journal:
+            pending = journal.pending()
+            for doc_id, record in pending:
+                _log_writer.enqueue(_storage.to_document(record), doc_id=doc_id)
+            if pending:
+                print(f"{len(pending)} Log-Einträge aus dem lokalen Journal werden nachgeholt.")
+    _log_writer.start()
+    return _log_writer
+
+def replay_journal(limit=None):
+    """Schreibt ausstehende Journal-Einträge synchron nach Firestore. Gibt die Anzahl geschriebener Einträge zurück."""
+    if _storage is None or not _storage.remote:
+        return 0
+    journal = _get_journal()
+    if not journal:
+        return 0
+    pending = journal.pending(limit)
+    written = 0
+    for start in range(0, len(pending), config.LOG_BATCH_SIZE):
+        chunk = pending[start:start + config.LOG_BATCH_SIZE]
+        try:
+            _storage.write_logs(chunk)
+        except Exception as e:
+            print(f"Fehler beim Nachholen von Journal-Einträgen: {e}")
+            break
+        journal.remove([doc_id for doc_id, _ in chunk])
+        written += len(chunk)
+    return written
+
+def flush_logs(timeout=None):
+    """Schreibt alle gepufferten Log-Einträge sofort."""
+    if _log_writer is None:
+        return True
+    return _log_writer.flush(timeout)
+
+def stop_log_writer(timeout=5.0):
+    """Schreibt ausstehende Einträge und beendet den Hintergrund-Writer (z.B. in closeEvent).
+
+    Nicht geschriebene Einträge bleiben im Journal und werden beim nächsten Start nachgeholt.
+    """
+    global _log_writer
+    if _user_directory is not None:
+        # Zurückgehaltene 'last_seen'-Updates gehen mit dem letzten Batch raus
+        _user_directory.flush_last_seen()
+    if _log_writer is None:
+        return True
+    all_written = _log_writer.stop(timeout)
+    _log_writer = None
+    return all_written
+
+def get_log_writer_stats():
+    """Gibt Warteschlangentiefe, Flush-Latenzen und offene Journal-Einträge zurück (oder None)."""
+    journal = _get_journal()
+    if _log_writer is None and journal is None:
+        return None
+    stats = _log_writer.get_stats() if _log_writer is not None else {}
+    if journal is not None:
+        stats['journal_pending'] = journal.pending_count()
+    return stats
+
+@metrics.traced("firestore.log_write")
+def log_to_firestore(speaker, message, username="System", timestamp=None):
+    """Protokolliert einen Eintrag im konfigurierten Backend.
+
+    Bei Firestore zuerst lokal ins Journal, dann (gebündelt) nach Firestore; SQLite schreibt direkt.
+    timestamp (datetime mit Zeitzone) erlaubt es, denselben Zeitpunkt wie in der Chat-Ansicht
+    zu speichern; ohne Angabe wird die aktuelle Zeit verwendet.
+    Gibt True zurück, sobald der Eintrag sicher gespeichert ist – auch wenn Firestore
+    gerade nicht erreichbar ist und der Eintrag später nachgeholt wird.
+    Gesprächseinträge werden zusätzlich in den lokalen Suchindex übernommen.
+    """
+    record = _build_log_record(speaker, message, username, timestamp)
+    doc_id = uuid.uuid4().hex
+    if _storage is not None and not _storage.remote:
+        try:
+            _storage.write_logs([(doc_id, record)])
+        except Exception as e:
+            print(f"Fehler beim Schreiben in die lokale Datenbank: {e}")
+            return False
+        _add_to_search_index(doc_id, record)
+        return True
+    journal = _get_journal()
+    journaled = journal is not None
+    if journaled:
+        journal.append(record, doc_id)
+        # Ab hier ist der Eintrag sicher gespeichert (und wird ggf. später nachgeholt)
+        _add_to_search_index(doc_id, record)
+    if _storage is None:
+        if journaled:
+            return True
         print("Fehler: Firestore DB Client nicht initialisiert. Logging fehlgeschlagen.")
         return False
-    try:
-        log_data = {
-            'speaker': speaker,
-            'message': message,
-            'username': username,
-            'timestamp': firestore.SERVER_TIMESTAMP
-        }
-        collection_ref = db.collection(config.FIREBASE_LOG_COLLECTION_NAME) # Nutzt Log Collection
-        collection_ref.add(log_data)
+    if _log_writer is not None:
+        # Nicht blockierend: der Writer-Thread schreibt gebündelt
+        _log_writer.enqueue(_storage.to_document(record), doc_id=doc_id)
+        if not journaled:
+            _add_to_search_index(doc_id, record)
         return True
+    try:
+        _storage.write_logs([(doc_id, record)])
     except Exception as e:
         print(f"Fehler beim Schreiben nach Firestore in Collection '{config.FIREBASE_LOG_COLLECTION_NAME}': {e}")
-        return False
+        # Mit Journal bleibt der Eintrag erhalten und wird später nachgeholt
+        return journaled
+    if journaled:
+        journal.remove([doc_id])
+    else:
+        _add_to_search_index(doc_id, record)
+    return True
 
-def get_logs_from_firestore(limit=50):
-    # (Code unverändert, verwendet jetzt config.FIREBASE_LOG_COLLECTION_NAME)
-    global db
-    if not db:
-        print("Fehler: Firestore DB Client nicht initialisiert. Logs können nicht abgerufen werden.")
-        return []
+def _add_to_search_index(doc_id, record):
+    if record['speaker'] not in config.SEARCH_INDEX_SPEAKERS:
+        return
+    index = search_index.get_index()
+    if index is None:
+        return
+    try:
+        index.add(doc_id, record)
+    except Exception as e:
+        print(f"Warnung: Eintrag konnte nicht in den Suchindex übernommen werden: {e}")
+
+def backfill_search_index(username, page_size=500):
+    """Übernimmt einmalig alle gespeicherten Gesprächseinträge des Benutzers in den Suchindex.
+
+    Für Einträge aus der Zeit vor dem Index oder von anderen Rechnern; läuft im Hintergrund.
+    Danach hält log_to_firestore den Index aktuell. Gibt die Anzahl neuer Einträge zurück.
+    """
+    index = search_index.get_index()
+    if index is None or _storage is None or not username or index.is_backfilled(username):
+        return 0
+    added = 0
+    cursor = None
+    while True:
+        # Fehler werden weitergereicht, sonst würde ein unvollständiger Index als fertig markiert
+        records, cursor = _storage.get_logs_page(username=username, page_size=page_size, start_after=cursor)
+        added += index.add_many(
+            (record.doc_id, record) for record in records
+            if record.doc_id and record.get('speaker') in config.SEARCH_INDEX_SPEAKERS
+        )
+        if cursor is None:
+            break
+    index.mark_backfilled(username)
+    if added:
+        print(f"Suchindex: {added} ältere Einträge von '{username}' übernommen.")
+    return added
+
+def get_logs_page(username=None, start_time=None, end_time=None, page_size=50, start_after=None, descending=True):
+    """Lädt eine Seite von Log-Einträgen.
+
+    Gibt (Einträge, Cursor) zurück; der Cursor wird als start_after für die nächste Seite übergeben
+    und ist None, wenn keine weiteren Einträge folgen (siehe StorageBackend.get_logs_page).
+    """
+    if _storage is None:
+        print("Fehler: Storage nicht initialisiert. Logs können nicht abgerufen werden.")
+        return [], None
     try:
-        collection_ref = db.collection(config.FIREBASE_LOG_COLLECTION_NAME) # Nutzt Log Collection
-        query = collection_ref.order_by('timestamp', direction=firestore.Query.DESCENDING).limit(limit)
-        docs = query.stream()
-        logs = []
-        for doc in docs:
-            log_data = doc.to_dict()
-            if 'timestamp' in log_data and hasattr(log_data['timestamp'], 'strftime'):
-                 log_data['timestamp_str'] = log_data['timestamp'].strftime("%Y-%m-%d %H:%M:%S")
-            logs.append(log_data)
-        print(f"{len(logs)} Log-Einträge aus Firestore Collection '{config.FIREBASE_LOG_COLLECTION_NAME}' abgerufen.")
-        return logs
+        return _storage.get_logs_page(username, start_time, end_time, page_size, start_after, descending)
     except Exception as e:
-        print(f"Fehler beim Abrufen der Logs aus Firestore Collection '{config.FIREBASE_LOG_COLLECTION_NAME}': {e}")
-        return []
+        print(f"Fehler beim Abrufen der Logs ({_storage.name}, '{config.FIREBASE_LOG_COLLECTION_NAME}'): {e}")
+        return [], None
+
+def iter_logs(username=None, start_time=None, end_time=None, page_size=100, start_after=None, descending=True):
+    """Durchläuft alle passenden Log-Einträge seitenweise; es liegt immer nur eine Seite im Speicher."""
+    cursor = start_after
+    while True:
+        records, cursor = get_logs_page(username, start_time, end_time, page_size, cursor, descending)
+        yield from records
+        if cursor is None:
+            return
+
+def get_logs_from_firestore(limit=50):
+    """Gibt die neuesten `limit` Log-Einträge als Liste zurück."""
+    logs = list(itertools.islice(iter_logs(page_size=min(limit, 500)), limit)) if limit > 0 else []
+    print(f"{len(logs)} Log-Einträge aus '{config.FIREBASE_LOG_COLLECTION_NAME}' abgerufen.")
+    return logs
 
 # --- NEUE BENUTZERFUNKTIONEN ---
-def _sanitize_username_for_id(username):
-    """Bereinigt einen Benutzernamen, um als Firestore Dokument-ID gültig zu sein."""
-    # Ähnlich wie Collection-Namen, aber hier für Dokument-IDs
-    # Leerzeichen etc. durch Unterstriche ersetzen. E-Mail-Adressen könnten : enthalten.
-    # Dies ist eine einfache Version.
-    sanitized = username.lower().replace(" ", "_").replace(".", "_at_").replace("@", "_at_")
-    # Entferne andere ungültige Zeichen (Beispiel)
-    sanitized = "".join(c for c in sanitized if c.isalnum() or c == '_')
-    if not sanitized:
-        return "unknown_user"
-    return sanitized
+def get_user_directory():
+    """Gibt das UserDirectory (Cache der Benutzerdokumente vor dem Storage-Backend) zurück."""
+    global _user_directory
+    if _user_directory is None:
+        _user_directory = UserDirectory(
+            get_storage, _write_last_seen,
+            ttl=config.USER_CACHE_TTL_S,
+            max_entries=config.USER_CACHE_MAX_ENTRIES,
+            last_seen_debounce=config.USER_LAST_SEEN_DEBOUNCE_S
+        )
+    return _user_directory
+
+def touch_user_last_seen(user_doc_id):
+    """Setzt 'last_seen' eines Benutzers, ohne auf Firestore zu warten.
+
+    Pro Benutzer wird höchstens alle USER_LAST_SEEN_DEBOUNCE_S Sekunden geschrieben (siehe UserDirectory).
+    """
+    if _storage is None or not user_doc_id:
+        return False
+    get_user_directory().touch(user_doc_id)
+    return True
+
+def _write_last_seen(user_doc_id):
+    """Läuft der Log-Writer, wird das Update mit dem nächsten Log-Batch geschrieben (mehrere
+    Updates desselben Benutzers werden zusammengefasst), sonst direkt im Backend.
+    """
+    if _storage is None:
+        return False
+    if _log_writer is not None:
+        _log_writer.enqueue_merge(config.FIREBASE_USERS_COLLECTION_NAME, user_doc_id, _storage.last_seen_update())
+        return True
+    try:
+        _storage.touch_user(user_doc_id)
+        return True
+    except Exception as e:
+        print(f"Fehler beim Aktualisieren von 'last_seen' für '{user_doc_id}': {e}")
+        return False
 
 def add_or_update_user(username):
     """Fügt einen Benutzer zur 'users'-Collection hinzu oder aktualisiert den Zeitstempel des letzten Logins."""
-    global db
-    if not db:
-        print("Fehler: Firestore DB Client nicht initialisiert. Benutzer kann nicht hinzugefügt/aktualisiert werden.")
+    if _storage is None:
+        print("Fehler: Storage nicht initialisiert. Benutzer kann nicht hinzugefügt/aktualisiert werden.")
         return False, None
 
     if not username or not username.strip():
         print("Fehler: Benutzername ist leer.")
         return False, None
 
-    # Verwende den bereinigten Benutzernamen als Dokument-ID
-    user_doc_id = _sanitize_username_for_id(username)
-    user_ref = db.collection(config.FIREBASE_USERS_COLLECTION_NAME).document(user_doc_id)
+    # Dieselbe Dokument-ID wie bei Registrierung und Login
+    user_doc_id = canonical_user_id(username)
+    if not user_doc_id:
+        print(f"Fehler: Ungültiger Benutzername '{username}'.")
+        return False, None
 
     try:
-        user_doc = user_ref.get()
-        if user_doc.exists:
-            # Benutzer existiert, aktualisiere 'last_seen'
-            user_ref.update({
-                'last_seen': firestore.SERVER_TIMESTAMP,
-                'original_username': username # Speichere auch den originalen Namen
-            })
-            print(f"Benutzer '{username}' (ID: {user_doc_id}) aktualisiert.")
+        # Speichere auch den originalen Namen
+        if get_user_directory().upsert(user_doc_id, {'original_username': username}):
+            print(f"Benutzer '{username}' (ID: {user_doc_id}) zur Users-Collection hinzugefügt.")
         else:
-            # Benutzer existiert nicht, erstelle ihn
-            user_ref.set({
-                'original_username': username,
-                'first_seen': firestore.SERVER_TIMESTAMP,
-                'last_seen': firestore.SERVER_TIMESTAMP
-                # Hier könnten weitere Benutzerinfos gespeichert werden
-            })
-            print(f"Benutzer '{username}' (ID: {user_doc_id}) zur Firestore Users-Collection hinzugefügt.")
+            print(f"Benutzer '{username}' (ID: {user_doc_id}) aktualisiert.")
         return True, user_doc_id
     except Exception as e:
         print(f"Fehler beim Hinzufügen/Aktualisieren des Benutzers '{username}' (ID: {user_doc_id}): {e}")
@@ -129,7 +328,7 @@ def add_or_update_user(username):
 
 if __name__ == '__main__':
     print("Teste Firebase Logger und User Funktionen...")
-    initialized, init_error = initialize_firebase()
+    initialized, init_error = initialize_storage()
     if initialized:
         print(f"\nTeste Logging in Collection '{config.FIREBASE_LOG_COLLECTION_NAME}':")
         log_to_firestore("System", "Test-Log-Eintrag gestartet.")
@@ -159,11 +358,11 @@ if __name__ == '__main__':
 
         # --- NEUE FUNKTION HINZUFÜGEN ---
 def get_db_client():
-    """Gibt den initialisierten Firestore DB Client zurück."""
-    global db
+    """Gibt den initialisierten Firestore DB Client zurück (None bei anderen Backends)."""
+    db = getattr(_storage, 'db', None)
     if db is None:
-        # Dieser Fall sollte idealerweise nicht eintreten, wenn initialize_firebase()
-        # korrekt in main_app aufgerufen wird, aber als Sicherheitsnetz:
+        # Dieser Fall sollte idealerweise nicht eintreten, wenn initialize_storage()
+        # vorher erfolgreich war (mit dem Firestore-Backend), aber als Sicherheitsnetz:
         print("WARNUNG: get_db_client() aufgerufen, bevor die DB vollständig initialisiert wurde.")
         # Man könnte hier versuchen, erneut zu initialisieren, aber das ist riskant.
         # Sicherer ist, None zurückzugeben und den Fehler im aufrufenden Code zu behandeln.
@@ -1,35 +1,467 @@
 # src/chatty_app/gemini_interface.py
-import google.generativeai as genai
+import threading
+import time
 from . import config
+from . import conversation_snapshot
+from . import metrics
+from . import resilience
+from .lazy_imports import lazy_module
+from .rate_limiter import RateLimiter, RateLimitTimeout
+from .session_registry import SessionRegistry
+from .response_cache import ResponseCache, make_cache_key
 
-chat_session = None
+# Wird erst beim ersten Zugriff (nach dem Login) importiert
+genai = lazy_module("google.generativeai")
 
-def initialize_gemini():
-    global chat_session
+# Benutzer-ID für Aufrufe ohne expliziten Benutzer (z.B. Einzelplatz-Skripte)
+DEFAULT_USER_ID = "default"
+
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """Gibt das einmalig konfigurierte GenerativeModel zurück."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                genai.configure(api_key=config.GOOGLE_API_KEY)
+                _model = genai.GenerativeModel(config.GEMINI_MODEL_NAME)
+    return _model
+
+# --- Token-Budget für den Verlauf ---
+SUMMARY_PREFIX = "[Zusammenfassung des bisherigen Gesprächs]"
+SUMMARY_ACK = "Alles klar, das behalte ich im Hinterkopf."
+
+def _content_role_and_text(content):
+    """Liefert (Rolle, Text) für dict-Einträge wie in INITIAL_HISTORY und für protos.Content."""
+    if isinstance(content, dict):
+        parts = content.get('parts', [])
+        return content.get('role', ''), "".join(p if isinstance(p, str) else str(p.get('text', '')) for p in parts)
+    return content.role, "".join(getattr(p, 'text', '') for p in content.parts)
+
+def estimate_tokens(contents):
+    """Schätzt die Tokenanzahl lokal (ca. 4 Zeichen pro Token plus Overhead pro Nachricht)."""
+    total = 0
+    for content in contents:
+        _, text = _content_role_and_text(content)
+        total += len(text) // 4 + 4
+    return total
+
+def count_history_tokens(contents):
+    if config.GEMINI_TOKEN_COUNTING == "api":
+        try:
+            return get_model().count_tokens(contents).total_tokens
+        except Exception as e:
+            print(f"Warnung: count_tokens fehlgeschlagen, verwende Schätzung: {e}")
+    return estimate_tokens(contents)
+
+def _summarize_turns(contents, previous_summary):
+    """Fasst ältere Gesprächsrunden mit einem separaten (günstigen) Modell zusammen."""
+    lines = []
+    for content in contents:
+        role, text = _content_role_and_text(content)
+        lines.append(f"{'Benutzer' if role == 'user' else 'Chatty'}: {text}")
+    prompt = (
+        "Fasse das folgende Gespräch zwischen einem Benutzer und dem Chatbot Chatty kurz und sachlich "
+        f"auf Deutsch zusammen (höchstens {config.GEMINI_SUMMARY_MAX_WORDS} Wörter). Behalte Namen, Vorlieben "
+        "und offene Themen des Benutzers bei.\n\n"
+    )
+    if previous_summary:
+        prompt += f"Bisherige Zusammenfassung:\n{previous_summary}\n\n"
+    prompt += "Gespräch:\n" + "\n".join(lines)
+    summary_model = genai.GenerativeModel(config.GEMINI_SUMMARY_MODEL_NAME)
+    tokens = _expected_tokens([{'role': 'user', 'parts': [prompt]}])
+    _acquire_quota(tokens, config.GEMINI_RATE_LIMIT_MAX_WAIT_S, config.GEMINI_SUMMARY_MODEL_NAME)
+    response = summary_model.generate_content(prompt, request_options=_request_options(config.GEMINI_ATTEMPT_TIMEOUT_S))
+    _settle_quota(tokens, response, config.GEMINI_SUMMARY_MODEL_NAME)
+    return response.text.strip()
+
+def _fit_history_to_budget(chat_session):
+    """Hält den Verlauf unter GEMINI_HISTORY_TOKEN_BUDGET.
+
+    Die Persona aus INITIAL_HISTORY bleibt immer erhalten; die ältesten Runden danach werden
+    (zusammen mit einer bereits vorhandenen Zusammenfassung) zu einer kompakten Zusammenfassung gefaltet.
+    """
+    history = list(chat_session.history)
+    if count_history_tokens(history) <= config.GEMINI_HISTORY_TOKEN_BUDGET:
+        return False
+    pinned_count = len(config.INITIAL_HISTORY)
+    pinned, rest = history[:pinned_count], history[pinned_count:]
+
+    previous_summary = None
+    if len(rest) >= 2:
+        role, text = _content_role_and_text(rest[0])
+        if role == 'user' and text.startswith(SUMMARY_PREFIX):
+            previous_summary = text[len(SUMMARY_PREFIX):].strip()
+            rest = rest[2:]
+
+    # Ganze Runden (Benutzer + Modell) von vorne falten, bis das Ziel erreicht ist
+    keep_from = 0
+    max_fold = max(0, len(rest) - config.GEMINI_HISTORY_MIN_RECENT_MESSAGES)
+    while keep_from + 2 <= max_fold and count_history_tokens(pinned + rest[keep_from:]) > config.GEMINI_HISTORY_TARGET_TOKENS:
+        keep_from += 2
+    if keep_from == 0:
+        return False
+    folded, kept = rest[:keep_from], rest[keep_from:]
+
+    try:
+        summary = _summarize_turns(folded, previous_summary)
+        summary_pair = [
+            {'role': 'user', 'parts': [f"{SUMMARY_PREFIX}\n{summary}"]},
+            {'role': 'model', 'parts': [SUMMARY_ACK]}
+        ]
+    except Exception as e:
+        # Ohne Zusammenfassung werden die ältesten Runden einfach verworfen
+        print(f"Warnung: Zusammenfassung des Verlaufs fehlgeschlagen, ältere Runden werden verworfen: {e}")
+        summary_pair = []
+        if previous_summary is not None:
+            summary_pair = [
+                {'role': 'user', 'parts': [f"{SUMMARY_PREFIX}\n{previous_summary}"]},
+                {'role': 'model', 'parts': [SUMMARY_ACK]}
+            ]
+    chat_session.history = pinned + summary_pair + kept
+    print(f"Gemini-Verlauf gekürzt: {len(folded)} Nachrichten zusammengefasst.")
+    return True
+
+def _prepare_session(chat_session):
+    try:
+        _fit_history_to_budget(chat_session)
+    except Exception as e:
+        print(f"Warnung: Verlauf konnte nicht auf das Token-Budget gekürzt werden: {e}")
+
+# --- Antwort-Cache für wiederkehrenden Small Talk ---
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """Gibt den Antwort-Cache zurück (oder None, falls in config deaktiviert)."""
+    global _response_cache
+    if not config.GEMINI_RESPONSE_CACHE_ENABLED:
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(
+                    max_entries=config.GEMINI_RESPONSE_CACHE_MAX_ENTRIES,
+                    ttl=config.GEMINI_RESPONSE_CACHE_TTL_S,
+                    disk_path=config.GEMINI_RESPONSE_CACHE_DISK_PATH
+                )
+    return _response_cache
+
+def get_response_cache_stats():
+    cache = get_response_cache()
+    return cache.get_stats() if cache else None
+
+def _cache_key_for(chat_session, user_input):
+    """Cache-Schlüssel für kurze Eingaben, sonst None (lange Nachrichten werden nie gecacht)."""
+    if get_response_cache() is None or len(user_input) > config.GEMINI_RESPONSE_CACHE_MAX_PROMPT_CHARS:
+        return None
+    tail = chat_session.history[-config.GEMINI_RESPONSE_CACHE_HISTORY_TAIL:] if config.GEMINI_RESPONSE_CACHE_HISTORY_TAIL else []
+    return make_cache_key(user_input, [_content_role_and_text(c) for c in tail])
+
+def _append_cached_turn(chat_session, user_input, response_text):
+    # Der Verlauf muss den Treffer enthalten, als wäre die Antwort vom Modell gekommen
+    chat_session.history = list(chat_session.history) + [
+        {'role': 'user', 'parts': [user_input]},
+        {'role': 'model', 'parts': [response_text]}
+    ]
+
+# --- Rate-Limit (Anfragen und Tokens pro Minute, pro Modell) ---
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+def get_rate_limiter(model_name=None):
+    """Gibt den gemeinsamen Limiter des Modells zurück (oder None, falls für das Modell kein Limit konfiguriert ist)."""
+    model_name = model_name or config.GEMINI_MODEL_NAME
+    limits = config.GEMINI_RATE_LIMITS.get(model_name)
+    if not limits:
+        return None
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(model_name)
+        if limiter is None:
+            limiter = _rate_limiters[model_name] = RateLimiter(
+                requests_per_minute=limits.get('rpm'),
+                tokens_per_minute=limits.get('tpm'),
+                headroom=config.GEMINI_RATE_LIMIT_HEADROOM,
+                name=model_name
+            )
+    return limiter
+
+def get_rate_limiter_stats():
+    with _rate_limiters_lock:
+        return {name: limiter.get_stats() for name, limiter in _rate_limiters.items()}
+
+def _expected_tokens(contents):
+    return estimate_tokens(contents) + config.GEMINI_EXPECTED_OUTPUT_TOKENS
+
+def _acquire_quota(tokens, timeout, model_name=None):
+    """Wartet in der FIFO-Warteschlange des Modells auf Kontingent; die Wartezeit landet im Histogramm."""
+    model_name = model_name or config.GEMINI_MODEL_NAME
+    limiter = get_rate_limiter(model_name)
+    if limiter is None:
+        return 0.0
+    try:
+        waited = limiter.acquire(tokens, timeout=timeout)
+    except RateLimitTimeout:
+        metrics.inc("chatty_gemini_rate_limit_timeouts_total", model=model_name)
+        raise
+    metrics.observe("chatty_gemini_queue_wait_seconds", waited, model=model_name)
+    return waited
+
+def _settle_quota(estimated_tokens, response, model_name=None):
+    """Gleicht die Schätzung mit dem tatsächlichen Verbrauch aus usage_metadata ab."""
+    limiter = get_rate_limiter(model_name)
+    actual = getattr(getattr(response, 'usage_metadata', None), 'total_token_count', None)
+    if limiter is not None and actual:
+        limiter.adjust_tokens(actual - estimated_tokens)
+
+# --- Fristen, Wiederholungen und Hedging ---
+def _request_options(timeout):
+    return {'timeout': timeout}
+
+def _hedge_delay():
+    """Verzögerung bis zur zweiten Anfrage: p95 der bisherigen Einzelversuche, anfangs ein fester Wert."""
+    p95 = metrics.registry.span_quantile("gemini.attempt", 0.95, min_count=config.GEMINI_HEDGE_MIN_SAMPLES)
+    return p95 if p95 is not None else config.GEMINI_HEDGE_DELAY_S
+
+def _on_retry(error, attempt, delay):
+    metrics.inc("chatty_gemini_retries_total", reason=type(error).__name__)
+    print(f"Gemini-Anfrage fehlgeschlagen ({error}), Versuch {attempt + 1} in {delay:.1f} s.")
+
+def _call_with_retries(fn, tokens, should_retry=None):
+    """Wie resilience.call_with_retries; jeder Versuch wartet vorher auf Kontingent für tokens.
+
+    Die Wartezeit in der Warteschlange (höchstens GEMINI_RATE_LIMIT_MAX_WAIT_S) zählt weder zur
+    Gesamtfrist noch zum Timeout des Versuchs: ein Rate-Limit bremst, lässt Nachrichten aber nicht scheitern.
+    """
+    deadline = resilience.Deadline(config.GEMINI_REQUEST_DEADLINE_S)
+
+    def limited(timeout):
+        # Ein Versuch ohne verbleibende Frist soll kein Kontingent mehr verbrauchen
+        if deadline.expired():
+            raise resilience.DeadlineExceeded("Zeitlimit für die Anfrage überschritten.")
+        deadline.extend(_acquire_quota(tokens, config.GEMINI_RATE_LIMIT_MAX_WAIT_S))
+        timeout = min(deadline.remaining(), config.GEMINI_ATTEMPT_TIMEOUT_S)
+        if timeout <= 0:
+            raise resilience.DeadlineExceeded("Zeitlimit für die Anfrage überschritten.")
+        return fn(timeout)
+
+    return resilience.call_with_retries(
+        limited,
+        deadline,
+        max_attempts=config.GEMINI_MAX_ATTEMPTS,
+        base_delay=config.GEMINI_RETRY_BASE_DELAY_S,
+        max_delay=config.GEMINI_RETRY_MAX_DELAY_S,
+        attempt_timeout=config.GEMINI_ATTEMPT_TIMEOUT_S,
+        on_retry=_on_retry,
+        should_retry=should_retry
+    )
+
+def _send_with_resilience(chat_session, user_input):
+    """Sendet eine Nachricht mit Frist und Wiederholungen. Gibt (response, Antworttext) zurück.
+
+    Mit Hedging werden die Anfragen zustandslos per generate_content auf einer Kopie des Verlaufs
+    gestellt; nur die zuerst fertige Antwort wird in den Verlauf übernommen, so entstehen keine
+    doppelten Runden. Ohne Hedging übernimmt ChatSession.send_message das, und zwar erst nach Erfolg.
+    """
+    history = list(chat_session.history)
+    user_content = {'role': 'user', 'parts': [user_input]}
+    tokens = _expected_tokens(history + [user_content])
+
+    if not config.GEMINI_HEDGING_ENABLED:
+        def attempt(timeout):
+            with metrics.span("gemini.attempt"):
+                response = chat_session.send_message(user_input, request_options=_request_options(timeout))
+                return response, response.text.strip()
+        response, response_text = _call_with_retries(attempt, tokens)
+        _settle_quota(tokens, response)
+        return response, response_text
+
+    def attempt(timeout):
+        def request():
+            with metrics.span("gemini.attempt"):
+                response = get_model().generate_content(history + [user_content], request_options=_request_options(timeout))
+                return response, response.text.strip()
+
+        def hedge_request():
+            # Ein Hedge stellt sich nie in die Warteschlange: ohne freies Kontingent gewinnt die erste Anfrage
+            limiter = get_rate_limiter()
+            if limiter is not None and not limiter.try_acquire(tokens):
+                metrics.inc("chatty_gemini_hedges_skipped_total")
+                raise RateLimitTimeout("Kein freies Kontingent für eine zweite Anfrage.")
+            return request()
+
+        (response, response_text), hedge_won = resilience.hedged_call(
+            request, _hedge_delay(), timeout,
+            on_hedge=lambda: metrics.inc("chatty_gemini_hedges_total"),
+            hedge_fn=hedge_request
+        )
+        if hedge_won:
+            metrics.inc("chatty_gemini_hedge_wins_total")
+        return response, response_text
+
+    response, response_text = _call_with_retries(attempt, tokens)
+    _settle_quota(tokens, response)
+    chat_session.history = history + [user_content, {'role': 'model', 'parts': [response_text]}]
+    return response, response_text
+
+# Platzhalter: Snapshot ist noch nicht geladen (None heißt "kein Snapshot vorhanden")
+_LOAD_SNAPSHOT = object()
+
+def _restored_history(user_id, snapshot=_LOAD_SNAPSHOT):
+    """Verlauf aus dem Gesprächs-Snapshot des Benutzers (oder None).
+
+    Snapshots mit einer anderen Persona als in INITIAL_HISTORY werden nicht übernommen.
+    """
+    if snapshot is _LOAD_SNAPSHOT:
+        snapshot = conversation_snapshot.load_snapshot(user_id)
+    if snapshot is None or not snapshot.history:
+        return None
+    pinned = [_content_role_and_text(content) for content in config.INITIAL_HISTORY]
+    if snapshot.history[:len(pinned)] != pinned:
+        return None
+    return [{'role': role, 'parts': [text]} for role, text in snapshot.history]
+
+def _start_chat_session(user_id, snapshot=_LOAD_SNAPSHOT):
+    history = _restored_history(user_id, snapshot)
+    if history is not None:
+        print(f"Gemini-Verlauf für '{user_id}' aus dem Snapshot wiederhergestellt ({len(history)} Nachrichten).")
+        return get_model().start_chat(history=history)
+    return get_model().start_chat(history=config.INITIAL_HISTORY[:])
+
+_sessions = SessionRegistry(
+    _start_chat_session,
+    max_sessions=config.GEMINI_MAX_SESSIONS,
+    idle_ttl=config.GEMINI_SESSION_IDLE_TTL_S
+)
+
+def get_chat_session(user_id=None):
+    """Gibt die Chat-Sitzung des Benutzers zurück (oder None, falls keine existiert)."""
+    entry = _sessions.get(user_id or DEFAULT_USER_ID)
+    return entry.session if entry else None
+
+def get_history(user_id=None):
+    """Verlauf der Chat-Sitzung als Liste von (Rolle, Text), z.B. für den Gesprächs-Snapshot (oder None)."""
+    entry = _sessions.get(user_id or DEFAULT_USER_ID)
+    if not entry:
+        return None
+    with entry.lock:
+        return [_content_role_and_text(content) for content in entry.session.history]
+
+def reset_chat_session(user_id=None):
+    """Verwirft die Chat-Sitzung des Benutzers; die nächste Initialisierung beginnt neu."""
+    _sessions.discard(user_id or DEFAULT_USER_ID)
+
+def initialize_gemini(user_id=None, snapshot=_LOAD_SNAPSHOT):
+    """Stellt sicher, dass für den Benutzer eine Chat-Sitzung existiert.
+
+    Bestehende Sitzungen werden wiederverwendet, das Modell wird nur einmal erzeugt.
+    Hat der Aufrufer den Gesprächs-Snapshot schon geladen (auch None), wird er für
+    den Verlauf übernommen statt ein zweites Mal gelesen.
+    """
     if not config.GOOGLE_API_KEY:
         print("Fehler: GOOGLE_API_KEY nicht gefunden.")
         return False, "API-Key nicht gefunden. Überprüfe die .env-Datei."
+    user_id = user_id or DEFAULT_USER_ID
     try:
-        genai.configure(api_key=config.GOOGLE_API_KEY)
-        model = genai.GenerativeModel("gemini-1.5-pro-latest")
-        chat_session = model.start_chat(history=config.INITIAL_HISTORY[:])
-        print("Gemini-Modell und Chat-Sitzung erfolgreich initialisiert.")
+        is_new = user_id not in _sessions
+        _sessions.get_or_create(user_id, snapshot=snapshot)
+        if is_new:
+            print(f"Gemini Chat-Sitzung für '{user_id}' initialisiert.")
         return True, None
     except Exception as e:
         error_msg = f"Fehler bei der Initialisierung von Gemini: {e}"
         print(error_msg)
         print("Stelle sicher, dass der API-Key gültig ist.")
-        chat_session = None
+        _sessions.discard(user_id)
         return False, error_msg
 
-def send_message_to_gemini(user_input):
-    global chat_session
-    if not chat_session:
+def send_message_to_gemini(user_input, user_id=None):
+    entry = _sessions.get(user_id or DEFAULT_USER_ID)
+    if not entry:
         return False, "Chat-Sitzung nicht initialisiert."
     try:
-        response = chat_session.send_message(user_input)
-        return True, response.text.strip()
+        with entry.lock:
+            _prepare_session(entry.session)
+            cache_key = _cache_key_for(entry.session, user_input)
+            if cache_key:
+                cached = get_response_cache().get(cache_key)
+                if cached is not None:
+                    _append_cached_turn(entry.session, user_input, cached)
+                    metrics.inc("chatty_gemini_cache_hits_total")
+                    return True, cached
+            with metrics.span("gemini.send_message"):
+                response, response_text = _send_with_resilience(entry.session, user_input)
+            metrics.record_token_usage(getattr(response, 'usage_metadata', None))
+            if cache_key:
+                get_response_cache().put(cache_key, response_text)
+        return True, response_text
     except Exception as e:
         error_msg = f"Fehler bei der Kommunikation mit Gemini: {e}"
         print(f"Gemini API Error: {e}")
-        return False, error_msg
\ No newline at end of file
+        return False, error_msg
+
+def stream_message_to_gemini(user_input, progress_callback=None, user_id=None):
+    """Sendet eine Nachricht mit stream=True und reicht jeden Textabschnitt sofort an progress_callback weiter.
+
+    Gibt wie send_message_to_gemini (Erfolg, Gesamttext oder Fehlermeldung) zurück.
+    Vorübergehende Fehler werden nur wiederholt, solange noch kein Abschnitt angezeigt wurde.
+    """
+    entry = _sessions.get(user_id or DEFAULT_USER_ID)
+    if not entry:
+        return False, "Chat-Sitzung nicht initialisiert."
+    with entry.lock:
+        chat_session = entry.session
+        _prepare_session(chat_session)
+        try:
+            cache_key = _cache_key_for(chat_session, user_input)
+            if cache_key:
+                cached = get_response_cache().get(cache_key)
+                if cached is not None:
+                    _append_cached_turn(chat_session, user_input, cached)
+                    metrics.inc("chatty_gemini_cache_hits_total")
+                    if progress_callback:
+                        progress_callback(cached)
+                    return True, cached
+            started = time.perf_counter()
+            chunks = []
+            tokens = _expected_tokens(list(chat_session.history) + [{'role': 'user', 'parts': [user_input]}])
+
+            def attempt(timeout):
+                response = None
+                try:
+                    with metrics.span("gemini.attempt"):
+                        response = chat_session.send_message(user_input, stream=True, request_options=_request_options(timeout))
+                        for chunk in response:
+                            text = chunk.text
+                            if not text:
+                                continue
+                            if not chunks:
+                                metrics.observe("chatty_gemini_first_chunk_seconds", time.perf_counter() - started)
+                            chunks.append(text)
+                            if progress_callback:
+                                progress_callback(text)
+                    return response
+                except Exception:
+                    # Eine abgebrochene Streaming-Antwort würde den Verlauf unbrauchbar machen
+                    if response is not None:
+                        try:
+                            chat_session.rewind()
+                        except Exception:
+                            pass
+                    raise
+
+            with metrics.span("gemini.stream_message"):
+                # Bereits angezeigte Abschnitte lassen sich nicht zurücknehmen
+                response = _call_with_retries(attempt, tokens, should_retry=lambda error: not chunks)
+            response_text = "".join(chunks).strip()
+            _settle_quota(tokens, response)
+            metrics.record_token_usage(getattr(response, 'usage_metadata', None))
+            if cache_key:
+                get_response_cache().put(cache_key, response_text)
+            return True, response_text
+        except Exception as e:
+            error_msg = f"Fehler bei der Kommunikation mit Gemini: {e}"
+            print(f"Gemini API Error (Streaming): {e}")
+            return False, error_msg
@@ -1,41 +1,95 @@
 # src/chatty_app/gui_utils.py
+import hashlib
 import os
-from PIL import Image
-from PyQt6.QtGui import QPixmap
+from PyQt6.QtGui import QGuiApplication, QPixmap, QPixmapCache
 from PyQt6.QtCore import Qt # <-- Fehlenden Import hinzufügen
 
 from . import config
 
-def load_image(path, size):
-    """Lädt ein Bild, skaliert es und gibt ein QPixmap-Objekt zurück."""
+# Trefferstatistik des Bild-Caches (Speicher = QPixmapCache, Festplatte = vorskalierte PNGs)
+_image_cache_stats = {'memory_hits': 0, 'disk_hits': 0, 'decodes': 0}
+
+def _device_pixel_ratio():
+    app = QGuiApplication.instance()
+    screen = app.primaryScreen() if app else None
+    return screen.devicePixelRatio() if screen else 1.0
+
+def _image_cache_key(path, size, dpr, mtime_ns):
+    return f"chatty:{os.path.abspath(path)}:{size[0]}x{size[1]}@{dpr:g}:{mtime_ns}"
+
+def _disk_cache_path(cache_key):
+    if not config.IMAGE_DISK_CACHE_DIR:
+        return None
+    file_name = hashlib.sha1(cache_key.encode("utf-8")).hexdigest() + ".png"
+    return os.path.join(config.IMAGE_DISK_CACHE_DIR, file_name)
+
+def _store_on_disk(pixmap, disk_path):
+    try:
+        os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+        tmp_path = disk_path + ".tmp"
+        # Erst vollständig schreiben, dann umbenennen: kein halbes PNG bei Abbruch
+        if pixmap.save(tmp_path, "PNG"):
+            os.replace(tmp_path, disk_path)
+    except OSError as e:
+        print(f"Warnung: Skaliertes Bild konnte nicht im Cache gespeichert werden ({disk_path}): {e}")
+
+def load_image(path, size, device_pixel_ratio=None):
+    """Lädt ein Bild, skaliert es und gibt ein QPixmap-Objekt zurück.
+
+    Ergebnisse werden prozessweit im QPixmapCache gehalten (Schlüssel: Pfad, Größe,
+    Pixelverhältnis, Änderungszeit) und optional als vorskalierte PNGs in
+    config.IMAGE_DISK_CACHE_DIR abgelegt, so dass jedes Bild nur einmal dekodiert und skaliert wird.
+    """
     try:
-        if os.path.exists(path):
-            # Öffne mit Pillow (obwohl wir es hier nicht direkt zur Konvertierung nutzen)
-            # Es könnte für andere Prüfungen nützlich sein
-            # img_pil = Image.open(path)
-
-            # Erstelle QPixmap direkt aus dem originalen Pfad
-            pixmap = QPixmap(path)
-            if pixmap.isNull(): # Prüfen, ob das Laden fehlgeschlagen ist
-                 print(f"Warnung: QPixmap konnte Bild nicht laden von {path}")
-                 return None
-
-            # Skaliere QPixmap unter Beibehaltung des Seitenverhältnisses mit Qt-Konstanten
-            return pixmap.scaled(size[0], size[1],
-                                 Qt.AspectRatioMode.KeepAspectRatio, # Jetzt verfügbar
-                                 Qt.TransformationMode.SmoothTransformation) # Jetzt verfügbar
-        else:
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
             print(f"Warnung: Bilddatei nicht gefunden unter {path}")
             return None
+        dpr = device_pixel_ratio or _device_pixel_ratio()
+        cache_key = _image_cache_key(path, size, dpr, mtime_ns)
+        cached = QPixmapCache.find(cache_key)
+        if cached is not None:
+            _image_cache_stats['memory_hits'] += 1
+            return cached
+
+        disk_path = _disk_cache_path(cache_key)
+        if disk_path and os.path.exists(disk_path):
+            pixmap = QPixmap(disk_path)
+            if not pixmap.isNull():
+                pixmap.setDevicePixelRatio(dpr)
+                QPixmapCache.insert(cache_key, pixmap)
+                _image_cache_stats['disk_hits'] += 1
+                return pixmap
+
+        # Erstelle QPixmap direkt aus dem originalen Pfad
+        pixmap = QPixmap(path)
+        if pixmap.isNull(): # Prüfen, ob das Laden fehlgeschlagen ist
+             print(f"Warnung: QPixmap konnte Bild nicht laden von {path}")
+             return None
+        _image_cache_stats['decodes'] += 1
+
+        # In physischen Pixeln skalieren, damit das Logo auf HiDPI-Bildschirmen scharf bleibt
+        scaled = pixmap.scaled(round(size[0] * dpr), round(size[1] * dpr),
+                               Qt.AspectRatioMode.KeepAspectRatio,
+                               Qt.TransformationMode.SmoothTransformation)
+        scaled.setDevicePixelRatio(dpr)
+        QPixmapCache.insert(cache_key, scaled)
+        if disk_path:
+            _store_on_disk(scaled, disk_path)
+        return scaled
     except ImportError:
-        # Pillow Import wird nicht mehr direkt für die Konvertierung benötigt, aber lassen wir es drin
-        print("Fehler: Pillow fehlt (oder PyQt6). 'pip install Pillow PyQt6'.")
+        # Pillow wird nicht mehr importiert (verzögerte den Start), QPixmap lädt das Bild selbst
+        print("Fehler: PyQt6 fehlt. 'pip install PyQt6'.")
         return None
     except Exception as e:
         print(f"Fehler beim Laden/Skalieren des Bildes {path}: {e}")
         return None
 
+def get_image_cache_stats():
+    return dict(_image_cache_stats)
+
 # Die anderen Funktionen (configure_tags, configure_styles, insert_bubble)
 # sind nicht mehr in dieser Datei, da ihre Logik in PyQt anders gehandhabt wird
 # (Stylesheets in main_app, HTML-Einfügung in main_app).
-# Lasse sie weg oder kommentiere sie aus, falls noch vorhanden.
\ No newline at end of file
+# Lasse sie weg oder kommentiere sie aus, falls noch vorhanden.
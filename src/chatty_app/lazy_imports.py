@@ -0,0 +1,49 @@
+# src/chatty_app/lazy_imports.py
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Platzhalter für ein Modul, das erst beim ersten Attributzugriff importiert wird.
+
+    So können schwere SDKs (google.generativeai, firebase_admin) auf Modulebene
+    referenziert werden, ohne den Start bis zum ersten Fensteraufbau zu verzögern.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "geladen" if self.__dict__['_lazy_module'] is not None else "noch nicht geladen"
+        return f"<LazyModule '{self.__name__}' ({state})>"
+
+
+def lazy_module(name):
+    """Gibt einen LazyModule-Platzhalter für den Modulnamen zurück."""
+    return LazyModule(name)
+
+
+def preload_modules(names):
+    """Importiert Module vorab (z.B. im Hintergrund nach dem ersten Fensteraufbau)."""
+    loaded = []
+    for name in names:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except ImportError as e:
+            print(f"Warnung: Modul '{name}' konnte nicht vorgeladen werden: {e}")
+    return loaded
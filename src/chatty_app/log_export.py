@@ -0,0 +1,236 @@
+# src/chatty_app/log_export.py
+"""Exportiert chat_logs seitenweise als NDJSON oder Parquet für Analysen.
+
+Es liegt immer nur eine Seite (bzw. eine Parquet-Zeilengruppe) im Speicher. Die Ausgabe wird in
+Dateien zu höchstens rows_per_file Zeilen aufgeteilt; jede Datei entsteht zuerst als .tmp und wird
+erst nach dem Schließen umbenannt. Danach wird der Fortschritt in export_state.json gespeichert.
+
+Der erste (bzw. ein --full) Export liest nach Zeitstempel. Inkrementelle Exporte setzen danach an der
+Speicherposition fort (SQLite: seq, Firestore: server_timestamp + Dokument-ID), nicht am Zeitstempel
+des Clients: so werden auch Einträge erfasst, die verspätet gespeichert werden (Batch-Writer,
+Journal nach einem Ausfall), und Einträge mit gleichem Zeitstempel gehen an Dateigrenzen nicht verloren.
+"""
+import json
+import os
+from datetime import datetime, timezone
+
+from . import config
+from . import firebase_logger
+from .lazy_imports import lazy_module
+
+# Nur für format="parquet" nötig (pip install pyarrow)
+pa = lazy_module("pyarrow")
+pq = lazy_module("pyarrow.parquet")
+
+STATE_FILE_NAME = "export_state.json"
+COLUMNS = ("doc_id", "timestamp", "username", "speaker", "message")
+
+
+def _timestamp_to_iso(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value) if value is not None else None
+
+
+def _record_to_row(record):
+    return {
+        'doc_id': record.doc_id,
+        'timestamp': _timestamp_to_iso(record.get('timestamp')),
+        'username': record.get('username'),
+        'speaker': record.get('speaker'),
+        'message': record.get('message'),
+    }
+
+
+def _iter_records(storage, username, page_size, start_time):
+    # Anders als firebase_logger.iter_logs werden Fehler weitergereicht: ein Export darf nicht
+    # unbemerkt mitten in der Collection enden
+    cursor = None
+    while True:
+        records, cursor = storage.get_logs_page(username=username, start_time=start_time, page_size=page_size,
+                                                start_after=cursor, descending=False)
+        yield from records
+        if cursor is None:
+            return
+
+
+def _iter_commit_order(storage, page_size, after):
+    """(Position, LogRecord)-Paare in Speicherreihenfolge strikt nach after."""
+    while True:
+        page = storage.get_logs_in_commit_order(page_size=page_size, after=after)
+        yield from page
+        if len(page) < page_size:
+            return
+        after = page[-1][0]
+
+
+def load_state(output_dir):
+    path = os.path.join(output_dir, STATE_FILE_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_state(output_dir, state):
+    path = os.path.join(output_dir, STATE_FILE_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class _NdjsonPart:
+    extension = ".ndjson"
+
+    def __init__(self, path, batch_rows):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, row):
+        self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetPart:
+    """Puffert batch_rows Zeilen und schreibt sie als eine Zeilengruppe."""
+
+    extension = ".parquet"
+
+    def __init__(self, path, batch_rows):
+        self._schema = pa.schema([
+            ('doc_id', pa.string()),
+            ('timestamp', pa.timestamp('us', tz='UTC')),
+            ('username', pa.string()),
+            ('speaker', pa.string()),
+            ('message', pa.string()),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+        self._batch_rows = batch_rows
+        self._columns = {name: [] for name in COLUMNS}
+
+    def write(self, row):
+        for name in COLUMNS:
+            value = row[name]
+            if name == 'timestamp' and value is not None:
+                value = datetime.fromisoformat(value)
+            self._columns[name].append(value)
+        if len(self._columns['doc_id']) >= self._batch_rows:
+            self._flush()
+
+    def _flush(self):
+        if self._columns['doc_id']:
+            self._writer.write_table(pa.table(self._columns, schema=self._schema))
+            self._columns = {name: [] for name in COLUMNS}
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+_PART_WRITERS = {'ndjson': _NdjsonPart, 'parquet': _ParquetPart}
+
+
+def export_logs(output_dir=None, fmt=None, incremental=True, username=None, page_size=None, rows_per_file=None,
+                on_file=None):
+    """Exportiert alle (bzw. seit dem letzten Lauf gespeicherten) Log-Einträge.
+
+    Vollexporte sind nach Zeitstempel sortiert, inkrementelle Exporte nach Speicherreihenfolge.
+    Ein Export nur für einen Benutzer (username) ist immer vollständig und lässt den Fortschritt unverändert.
+    on_file(path, rows) wird nach jeder fertigen Datei aufgerufen. Gibt (geschriebene Zeilen,
+    Liste der Dateien) zurück.
+    """
+    output_dir = output_dir or config.EXPORT_DIR
+    fmt = fmt or config.EXPORT_FORMAT
+    page_size = page_size or config.EXPORT_PAGE_SIZE
+    rows_per_file = rows_per_file or config.EXPORT_ROWS_PER_FILE
+    if fmt not in _PART_WRITERS:
+        raise ValueError(f"Unbekanntes Exportformat '{fmt}' (erwartet: 'ndjson' oder 'parquet').")
+    part_class = _PART_WRITERS[fmt]
+    storage = firebase_logger.get_storage()
+    if storage is None:
+        raise RuntimeError("Storage nicht initialisiert.")
+    os.makedirs(output_dir, exist_ok=True)
+
+    track_state = username is None
+    state = load_state(output_dir) if incremental and track_state else {}
+    by_commit_order = track_state and 'commit_position' in state
+    if by_commit_order:
+        entries = _iter_commit_order(storage, page_size, state['commit_position'])
+    else:
+        if track_state and 'pending_commit_position' not in state:
+            # Alles, was nach diesem Punkt gespeichert wird, holen die folgenden inkrementellen Läufe
+            state['pending_commit_position'] = storage.latest_commit_position()
+        # Ein abgebrochener Vollexport wird ab dem Zeitstempel seiner letzten Datei fortgesetzt;
+        # Einträge mit genau diesem Zeitstempel, die schon exportiert sind, werden übersprungen
+        high_water = state.get('high_water_timestamp')
+        start_time = datetime.fromisoformat(high_water) if high_water else None
+        already_exported = set(state.get('high_water_doc_ids', ()))
+        entries = ((None, record) for record in _iter_records(storage, username, page_size, start_time)
+                   if record.doc_id not in already_exported)
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    files = []
+    total_rows = 0
+    part = None
+    part_rows = 0
+    part_path = None
+    last_position = None
+    last_timestamp = None
+    last_timestamp_doc_ids = []
+
+    def finish_part():
+        nonlocal part, part_rows
+        part.close()
+        rows = part_rows
+        part, part_rows = None, 0
+        final_path = part_path[:-len(".tmp")]
+        os.replace(part_path, final_path)
+        files.append(final_path)
+        if track_state:
+            if by_commit_order:
+                state['commit_position'] = last_position
+            else:
+                state.update(high_water_timestamp=last_timestamp, high_water_doc_ids=list(last_timestamp_doc_ids))
+            state.update(
+                exported_total=state.get('exported_total', 0) + rows,
+                last_file=os.path.basename(final_path),
+                last_run=run_id,
+            )
+            _save_state(output_dir, state)
+        if on_file:
+            on_file(final_path, rows)
+
+    try:
+        for position, record in entries:
+            if part is None:
+                part_path = os.path.join(output_dir, f"chat_logs-{run_id}-{len(files):05d}{part_class.extension}.tmp")
+                part = part_class(part_path, page_size)
+            row = _record_to_row(record)
+            part.write(row)
+            part_rows += 1
+            total_rows += 1
+            last_position = position
+            if row['timestamp'] != last_timestamp:
+                last_timestamp = row['timestamp']
+                last_timestamp_doc_ids = []
+            last_timestamp_doc_ids.append(row['doc_id'])
+            if part_rows >= rows_per_file:
+                finish_part()
+        if part is not None:
+            finish_part()
+    except BaseException:
+        # Unvollständige Datei verwerfen; der Fortschritt steht noch auf der letzten fertigen Datei
+        if part is not None:
+            part.close()
+            os.remove(part_path)
+        raise
+    if track_state and not by_commit_order:
+        # Vollexport fertig: ab jetzt in Speicherreihenfolge weiter
+        state['commit_position'] = state.pop('pending_commit_position')
+        state.pop('high_water_timestamp', None)
+        state.pop('high_water_doc_ids', None)
+        state['last_run'] = run_id
+        _save_state(output_dir, state)
+    return total_rows, files
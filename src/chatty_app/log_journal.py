@@ -0,0 +1,67 @@
+# src/chatty_app/log_journal.py
+import json
+import os
+import sqlite3
+import threading
+import uuid
+
+
+class LogJournal:
+    """Lokales Append-Only-Journal (SQLite im WAL-Modus) für Log-Einträge.
+
+    Jeder Eintrag wird zuerst hier gespeichert und erst gelöscht, wenn er mit seiner
+    Dokument-ID in Firestore committet wurde. Bei Ausfällen gehen so keine Logs verloren;
+    da die Dokument-ID feststeht, ist das erneute Schreiben idempotent.
+    """
+
+    def __init__(self, path, synchronous="NORMAL"):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL: fsync gebündelt beim WAL-Checkpoint statt bei jedem Append
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS log_journal (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                doc_id TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL
+            )
+        """)
+
+    def append(self, record, doc_id=None):
+        """Speichert einen Eintrag (JSON-serialisierbares dict) und gibt seine Dokument-ID zurück."""
+        doc_id = doc_id or uuid.uuid4().hex
+        payload = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO log_journal (doc_id, payload) VALUES (?, ?)", (doc_id, payload))
+        return doc_id
+
+    def pending(self, limit=None):
+        """Gibt noch nicht bestätigte Einträge als Liste von (doc_id, record) in Schreibreihenfolge zurück."""
+        query = "SELECT doc_id, payload FROM log_journal ORDER BY seq"
+        params = ()
+        if limit is not None:
+            query += " LIMIT ?"
+            params = (int(limit),)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [(doc_id, json.loads(payload)) for doc_id, payload in rows]
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM log_journal").fetchone()[0]
+
+    def remove(self, doc_ids):
+        """Entfernt bestätigte (in Firestore geschriebene) Einträge."""
+        doc_ids = list(doc_ids)
+        if not doc_ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM log_journal WHERE doc_id = ?", [(d,) for d in doc_ids])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,200 @@
+# src/chatty_app/log_writer.py
+import threading
+import time
+import uuid
+
+from . import metrics
+
+# Firestore erlaubt maximal 500 Operationen pro WriteBatch
+MAX_FIRESTORE_BATCH_SIZE = 500
+
+
+class BatchLogWriter:
+    """Sammelt Log-Einträge in einem Puffer und schreibt sie in einem Hintergrund-Thread
+    als Firestore WriteBatch.
+
+    Geschrieben wird, sobald batch_size Einträge vorliegen, der älteste Eintrag
+    flush_interval Sekunden wartet, flush() aufgerufen wird oder der Writer stoppt.
+    on_committed(doc_ids) wird nach jedem erfolgreichen Commit aufgerufen.
+
+    Mit enqueue_merge lassen sich zusätzlich Feld-Updates (set mit merge=True) für beliebige
+    Dokumente mitschicken; mehrere Updates desselben Dokuments werden zu einem zusammengefasst.
+    """
+
+    def __init__(self, get_db, collection_name, batch_size=25, flush_interval=2.0, on_committed=None):
+        self._get_db = get_db
+        self._on_committed = on_committed
+        self.collection_name = collection_name
+        self.batch_size = max(1, min(int(batch_size), MAX_FIRESTORE_BATCH_SIZE))
+        self.flush_interval = float(flush_interval)
+
+        self._cond = threading.Condition()
+        self._buffer = []  # Liste von (doc_id, log_data, enqueue_time)
+        self._merges = {}  # (collection_name, doc_id) -> (data, enqueue_time)
+        self._flush_requested = False
+        self._stopping = False
+        self._thread = None
+
+        self.batches_committed = 0
+        self.entries_written = 0
+        self.merges_written = 0
+        self.merges_coalesced = 0
+        self.failed_commits = 0
+        self.last_flush_latency = None
+        self.total_flush_latency = 0.0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="BatchLogWriter", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, log_data, doc_id=None):
+        """Reiht einen Eintrag ein und gibt die vergebene Dokument-ID zurück."""
+        doc_id = doc_id or uuid.uuid4().hex
+        with self._cond:
+            self._buffer.append((doc_id, log_data, time.monotonic()))
+            # Erster Eintrag startet den Zeit-Timer, volle Batches werden sofort geschrieben
+            if len(self._buffer) == 1 or len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+        return doc_id
+
+    def enqueue_merge(self, collection_name, doc_id, data):
+        """Merkt ein Feld-Update für collection_name/doc_id vor, das mit dem nächsten Batch geschrieben wird."""
+        key = (collection_name, doc_id)
+        with self._cond:
+            pending = self._merges.get(key)
+            if pending is not None:
+                # Neues dict, damit ein gerade laufender Commit die Änderung nicht verschluckt
+                self._merges[key] = ({**pending[0], **data}, pending[1])
+                self.merges_coalesced += 1
+                return
+            self._merges[key] = (dict(data), time.monotonic())
+            if not self._buffer and len(self._merges) == 1:
+                self._cond.notify_all()
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._buffer)
+
+    def _has_pending(self):
+        return bool(self._buffer or self._merges)
+
+    def flush(self, timeout=None):
+        """Erzwingt das Schreiben aller gepufferten Einträge. Gibt True zurück, wenn der Puffer leer ist."""
+        with self._cond:
+            if not self._has_pending():
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._has_pending(), timeout)
+
+    def stop(self, timeout=5.0):
+        """Schreibt ausstehende Einträge und beendet den Hintergrund-Thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+        with self._cond:
+            remaining = len(self._buffer) + len(self._merges)
+        if remaining:
+            print(f"Warnung: {remaining} Log-Einträge konnten beim Beenden nicht geschrieben werden.")
+        return remaining == 0
+
+    def get_stats(self):
+        with self._cond:
+            depth = len(self._buffer)
+            pending_merges = len(self._merges)
+        avg_latency = self.total_flush_latency / self.batches_committed if self.batches_committed else None
+        return {
+            'queue_depth': depth,
+            'batches_committed': self.batches_committed,
+            'entries_written': self.entries_written,
+            'pending_merges': pending_merges,
+            'merges_written': self.merges_written,
+            'merges_coalesced': self.merges_coalesced,
+            'failed_commits': self.failed_commits,
+            'last_flush_latency': self.last_flush_latency,
+            'avg_flush_latency': avg_latency,
+        }
+
+    def _oldest_enqueue_time(self):
+        times = [enqueue_time for _, enqueue_time in self._merges.values()]
+        if self._buffer:
+            times.append(self._buffer[0][2])
+        return min(times) if times else None
+
+    def _is_due(self):
+        if not self._has_pending():
+            return False
+        if self._stopping or self._flush_requested or len(self._buffer) >= self.batch_size:
+            return True
+        return time.monotonic() - self._oldest_enqueue_time() >= self.flush_interval
+
+    def _run(self):
+        retry_delay = self.flush_interval
+        while True:
+            with self._cond:
+                while not self._is_due():
+                    if self._stopping:
+                        return
+                    timeout = None
+                    oldest = self._oldest_enqueue_time()
+                    if oldest is not None:
+                        timeout = max(0.0, self.flush_interval - (time.monotonic() - oldest))
+                    self._cond.wait(timeout)
+                merges = list(self._merges.items())[:self.batch_size]
+                entries = self._buffer[:self.batch_size - len(merges)]
+
+            if self._commit(entries, merges):
+                retry_delay = self.flush_interval
+                with self._cond:
+                    del self._buffer[:len(entries)]
+                    for key, pending in merges:
+                        # Während des Commits zusammengefasste Updates bleiben für den nächsten Batch
+                        if self._merges.get(key) is pending:
+                            del self._merges[key]
+                    if not self._has_pending():
+                        self._flush_requested = False
+                    self._cond.notify_all()
+            else:
+                with self._cond:
+                    if self._stopping:
+                        # Beim Beenden nicht endlos wiederholen
+                        return
+                    self._cond.wait(retry_delay)
+                retry_delay = min(retry_delay * 2, 60.0)
+
+    def _commit(self, entries, merges=()):
+        db = self._get_db()
+        if db is None:
+            return False
+        start = time.perf_counter()
+        try:
+            batch = db.batch()
+            collection_ref = db.collection(self.collection_name)
+            for doc_id, log_data, _ in entries:
+                batch.set(collection_ref.document(doc_id), log_data)
+            for (collection_name, doc_id), (data, _) in merges:
+                batch.set(db.collection(collection_name).document(doc_id), data, merge=True)
+            batch.commit()
+        except Exception as e:
+            self.failed_commits += 1
+            metrics.inc("chatty_log_batch_failures_total")
+            print(f"Fehler beim Batch-Schreiben von {len(entries)} Log-Einträgen nach '{self.collection_name}': {e}")
+            return False
+        latency = time.perf_counter() - start
+        metrics.observe("chatty_log_batch_commit_seconds", latency)
+        self.last_flush_latency = latency
+        self.total_flush_latency += latency
+        self.batches_committed += 1
+        self.entries_written += len(entries)
+        self.merges_written += len(merges)
+        if self._on_committed and entries:
+            try:
+                self._on_committed([doc_id for doc_id, _, _ in entries])
+            except Exception as e:
+                print(f"Fehler beim Bestätigen geschriebener Log-Einträge: {e}")
+        return True
@@ -1,34 +1,63 @@
 # src/chatty_app/main_app.py
 import sys
 import os
+import time
+from datetime import datetime, timezone
 from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QVBoxLayout, QMessageBox, QStackedWidget,
-    QTextEdit, QLineEdit, QPushButton
+    QMainWindow, QWidget, QVBoxLayout, QMessageBox, QStackedWidget,
+    QLineEdit, QPushButton, QMenu
 )
 from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QTextCursor
-from html import escape
+from PyQt6.QtGui import QKeySequence, QShortcut
 try:
     from . import config
     from . import gui_utils
     from . import ui_components_qt as ui_components
     from . import gemini_interface
+    from . import conversation_snapshot
     from . import firebase_logger
-    from firebase_admin import firestore
+    from . import search_index
+    from . import auth
+    from . import workers
+    from . import metrics
+    from .metrics_overlay import MetricsOverlay
+    from .chat_view import ChatTranscriptView
+    from .transcript_pager import TranscriptPager
+    from .lazy_imports import preload_modules
+    from .user_directory import canonical_user_id
 except ImportError as e:
     print(f"Import-Fehler in main_app.py: {e}")
     sys.exit(1)
 
+def _prepare_chat_session(user_id):
+    """Läuft im Worker: lädt den Snapshot einmal und übergibt ihn an initialize_gemini."""
+    with metrics.span("ui.load_snapshot"):
+        snapshot = conversation_snapshot.load_snapshot(user_id)
+    success, error_msg = gemini_interface.initialize_gemini(user_id, snapshot=snapshot)
+    return success, error_msg, snapshot
+
 class ChattyApp(QMainWindow):
     def __init__(self, root=None):
         super().__init__()
 
         self.current_user = None
         self.current_user_id = None
-
-        self.firebase_initialized, fb_error = firebase_logger.initialize_firebase()
-        if not self.firebase_initialized:
-             QTimer.singleShot(100, lambda: QMessageBox.warning(self, "Firebase Fehler", f"Firebase nicht initialisiert:\n{fb_error}\nAuthentifizierung und Logging sind deaktiviert."))
+        # Wird bei jedem Wechsel der Chat-Sitzung erhöht, um verspätete Antworten zu verwerfen
+        self._chat_generation = 0
+        self._request_in_flight = False
+        # Zustand der aktuell gestreamten Bot-Antwort
+        self._stream_message = None
+        self._stream_text = ""
+        self._turn_started = None
+        # Seit dem letzten Snapshot angezeigte Nachrichten; werden nach jeder Runde angehängt
+        self._snapshot_messages = []
+        # Gemini-Sitzung für den Chat-Bildschirm wird gerade im Hintergrund vorbereitet
+        self._chat_init_pending = False
+
+        # Firebase wird erst nach dem ersten Fensteraufbau im Hintergrund initialisiert
+        self.firebase_initialized = False
+        self._firebase_init_pending = True
+        self._backends_started = False
 
         if not config.GOOGLE_API_KEY:
              QMessageBox.critical(None, "Fehler", "GOOGLE_API_KEY nicht gefunden.\nÜberprüfe die .env-Datei im Projekt-Root.")
@@ -52,16 +81,48 @@ class ChattyApp(QMainWindow):
         self.password_entry: QLineEdit | None = None
         self.login_button: QPushButton | None = None
         self.register_button: QPushButton | None = None
-        self.chat_window: QTextEdit | None = None
+        self.chat_window: ChatTranscriptView | None = None
         self.entry: QLineEdit | None = None
         self.send_button: QPushButton | None = None
         self.exit_button: QPushButton | None = None
+        self.search_entry: QLineEdit | None = None
+        self.transcript_pager: TranscriptPager | None = None
 
         self._create_ui()
         self._apply_styles()
+        if self.chat_window:
+            self.transcript_pager = TranscriptPager(self.chat_window, parent=self)
+        self.metrics_overlay = MetricsOverlay(self.central_widget)
+        self.metrics_overlay.set_active(config.METRICS_DEBUG_OVERLAY)
+        QShortcut(QKeySequence("Ctrl+Shift+M"), self, activated=self.metrics_overlay.toggle)
 
         self._show_start_screen()
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._backends_started:
+            self._backends_started = True
+            # Kurz verzögert, damit der Login-Bildschirm zuerst gezeichnet wird
+            QTimer.singleShot(config.BACKEND_INIT_DELAY_MS, self._initialize_backends)
+
+    def _initialize_backends(self):
+        workers.run_in_background(
+            firebase_logger.initialize_storage,
+            on_result=self._on_firebase_initialized,
+            on_error=lambda error: self._on_firebase_initialized((False, error))
+        )
+        # Gemini SDK vorladen, damit der Wechsel in den Chat nach dem Login nicht blockiert
+        workers.run_in_background(preload_modules, config.DEFERRED_MODULES)
+        metrics.start_periodic_export()
+
+    def _on_firebase_initialized(self, result):
+        self._firebase_init_pending = False
+        self.firebase_initialized, fb_error = result
+        if self.firebase_initialized:
+            firebase_logger.start_log_writer()
+        else:
+            QMessageBox.warning(self, "Datenbank Fehler", f"Datenbank nicht initialisiert:\n{fb_error}\nAuthentifizierung und Logging sind deaktiviert.")
+
     def _create_ui(self):
         self.start_screen_widgets = ui_components.create_start_widget(
             login_callback=self._login_clicked,
@@ -71,7 +132,8 @@ class ChattyApp(QMainWindow):
 
         self.chat_screen_widgets = ui_components.create_chat_widget(
             back_callback=self._show_start_screen,
-            send_callback=self._send_message_command
+            send_callback=self._send_message_command,
+            search_callback=self._search_command
         )
         self.stacked_widget.addWidget(self.chat_screen_widgets["main_widget"])
 
@@ -83,6 +145,7 @@ class ChattyApp(QMainWindow):
         self.entry = self.chat_screen_widgets.get("entry")
         self.send_button = self.chat_screen_widgets.get("send_button")
         self.exit_button = self.chat_screen_widgets.get("exit_button")
+        self.search_entry = self.chat_screen_widgets.get("search_entry")
 
         if self.entry:
             self.entry.returnPressed.connect(self._send_message_command)
@@ -122,7 +185,8 @@ class ChattyApp(QMainWindow):
                 background-color: {config.ENTRY_BG_COLOR};
                 border: 1px solid #ccc; border-radius: 5px;
             }}
-            QTextEdit#ChatWindow {{
+            QLineEdit#SearchEntry {{ font-size: {config.FONT_SIZE_SMALL}pt; padding: 5px; }}
+            QListView#ChatWindow {{
                 font-size: {config.FONT_SIZE_NORMAL}pt;
                 background-color: {config.TEXT_AREA_BG};
                 border: 1px solid #ccc; border-radius: 5px; padding: 10px;
@@ -134,58 +198,17 @@ class ChattyApp(QMainWindow):
         """
         self.setStyleSheet(stylesheet)
 
-    def _sanitize_username_for_id(self, username):
-        sanitized = username.lower().replace(" ", "_").replace(".", "_dot_").replace("@", "_at_")
-        sanitized = "".join(c for c in sanitized if c.isalnum() or c == '_')
-        if not sanitized: return None
-        return sanitized
-
-    def _register_user(self, username, password):
-        db = firebase_logger.get_db_client()
-        if not db: return False, "Datenbank nicht initialisiert.", None
-        if not username or not password: return False, "Benutzername/Passwort leer.", None
-        user_doc_id = self._sanitize_username_for_id(username)
-        if not user_doc_id: return False, "Ungültiger Benutzername.", None
-        user_ref = db.collection(config.FIREBASE_USERS_COLLECTION_NAME).document(user_doc_id)
-        try:
-            if user_ref.get().exists: return False, "Benutzername vergeben.", None
-            user_ref.set({
-                'original_username': username, 'password_plain': password,
-                'first_seen': firestore.SERVER_TIMESTAMP, 'last_seen': firestore.SERVER_TIMESTAMP
-            })
-            print(f"Benutzer '{username}' registriert (PASSWORT UNGESCHÜTZT!).")
-            return True, "Registrierung erfolgreich.", user_doc_id
-        except Exception as e: return False, f"Fehler bei Registrierung: {e}", None
-
-    def _verify_user(self, username, password):
-        db = firebase_logger.get_db_client()
-        if not db: return False, "Datenbank nicht initialisiert.", None
-        if not username or not password: return False, "Benutzername/Passwort erforderlich.", None
-        user_doc_id = self._sanitize_username_for_id(username)
-        if not user_doc_id: return False, "Ungültiger Benutzername.", None
-        user_ref = db.collection(config.FIREBASE_USERS_COLLECTION_NAME).document(user_doc_id)
-        try:
-            user_doc = user_ref.get()
-            if not user_doc.exists: return False, "Benutzername nicht gefunden.", None
-            user_data = user_doc.to_dict()
-            stored_plain_password = user_data.get('password_plain')
-            if not stored_plain_password: return False, "Interner Fehler (Passwortfeld fehlt).", None
-            if password == stored_plain_password:
-                user_ref.update({'last_seen': firestore.SERVER_TIMESTAMP})
-                print(f"Benutzer '{username}' verifiziert (PASSWORT UNGESCHÜTZT!).")
-                return True, "Login erfolgreich.", user_data.get('original_username', username)
-            else: return False, "Falsches Passwort.", None
-        except Exception as e: return False, f"Fehler beim Login: {e}", None
-
     def _set_login_register_state(self, enabled):
         state = bool(enabled)
         if self.login_button: self.login_button.setEnabled(state)
         if self.register_button: self.register_button.setEnabled(state)
         if self.username_entry: self.username_entry.setEnabled(state)
         if self.password_entry: self.password_entry.setEnabled(state)
-        QApplication.processEvents()
 
     def _login_clicked(self):
+        if self._firebase_init_pending:
+            QMessageBox.information(self, "Bitte warten", "Die Verbindung zur Datenbank wird noch aufgebaut.")
+            return
         if not self.firebase_initialized:
              QMessageBox.critical(self, "Fehler", "Firebase nicht initialisiert.")
              return
@@ -195,10 +218,19 @@ class ChattyApp(QMainWindow):
             QMessageBox.warning(self, "Eingabe fehlt", "Bitte Benutzername und Passwort eingeben.")
             return
         self._set_login_register_state(False)
-        success, message, user_info = self._verify_user(username, password)
+        # Firestore-Aufruf im Hintergrund, damit die Oberfläche nicht einfriert
+        workers.run_in_background(
+            auth.verify_user, username, password,
+            on_result=lambda result: self._on_login_finished(username, result),
+            on_error=lambda error: self._on_login_finished(username, (False, f"Fehler beim Login: {error}", None))
+        )
+
+    def _on_login_finished(self, username, result):
         self._set_login_register_state(True)
+        success, message, user_info = result
         if success:
             self.current_user = user_info
+            self.current_user_id = canonical_user_id(username)
             if self.firebase_initialized:
                  firebase_logger.log_to_firestore("System", "Login erfolgreich.", username=self.current_user)
             self._show_chat_screen()
@@ -207,6 +239,9 @@ class ChattyApp(QMainWindow):
             self.password_entry.clear()
 
     def _register_clicked(self):
+        if self._firebase_init_pending:
+            QMessageBox.information(self, "Bitte warten", "Die Verbindung zur Datenbank wird noch aufgebaut.")
+            return
         if not self.firebase_initialized:
              QMessageBox.critical(self, "Fehler", "Firebase nicht initialisiert.")
              return
@@ -216,8 +251,15 @@ class ChattyApp(QMainWindow):
             QMessageBox.warning(self, "Eingabe fehlt", "Bitte Benutzername und Passwort eingeben.")
             return
         self._set_login_register_state(False)
-        success, message, user_doc_id = self._register_user(username, password)
+        workers.run_in_background(
+            auth.register_user, username, password,
+            on_result=lambda result: self._on_register_finished(username, result),
+            on_error=lambda error: self._on_register_finished(username, (False, f"Fehler bei Registrierung: {error}", None))
+        )
+
+    def _on_register_finished(self, username, result):
         self._set_login_register_state(True)
+        success, message, user_doc_id = result
         if success:
             self.current_user = username
             self.current_user_id = user_doc_id
@@ -231,10 +273,18 @@ class ChattyApp(QMainWindow):
     def _show_start_screen(self):
         self.stacked_widget.setCurrentIndex(0)
         self.setWindowTitle("Chatty - Login")
+        self._chat_generation += 1
+        self._request_in_flight = False
+        self._chat_init_pending = False
+        self._set_chat_ui_state(True)
+        self._set_login_register_state(True)
+        if self.transcript_pager: self.transcript_pager.reset()
+        self._snapshot_messages = []
         self.current_user = None
         self.current_user_id = None
         if self.username_entry: self.username_entry.clear()
         if self.password_entry: self.password_entry.clear()
+        if self.search_entry: self.search_entry.clear()
         if self.username_entry: self.username_entry.setFocus()
 
     def _show_chat_screen(self):
@@ -242,7 +292,23 @@ class ChattyApp(QMainWindow):
              print("Fehler: Kein Benutzer eingeloggt.")
              self._show_start_screen()
              return
-        success, error_msg = gemini_interface.initialize_gemini()
+        # Snapshot und Gemini-Sitzung im Hintergrund; der Login-Bildschirm bleibt so lange gesperrt
+        self._chat_generation += 1
+        generation = self._chat_generation
+        self._chat_init_pending = True
+        self._set_login_register_state(False)
+        workers.run_in_background(
+            _prepare_chat_session, self.current_user_id,
+            on_result=lambda result: self._on_chat_session_ready(generation, result),
+            on_error=lambda error: self._on_chat_session_ready(
+                generation, (False, f"Fehler bei der Initialisierung von Gemini: {error}", None))
+        )
+
+    def _on_chat_session_ready(self, generation, result):
+        if generation != self._chat_generation: return
+        self._chat_init_pending = False
+        self._set_login_register_state(True)
+        success, error_msg, snapshot = result
         if not success:
             QMessageBox.critical(self, "Gemini Fehler", error_msg)
             if self.firebase_initialized:
@@ -253,88 +319,190 @@ class ChattyApp(QMainWindow):
         self.setWindowTitle(f"Chatty - Konversation ({self.current_user})")
         if self.chat_window:
             self.chat_window.clear()
-            if config.INITIAL_HISTORY and len(config.INITIAL_HISTORY) > 1 and config.INITIAL_HISTORY[1]['role'] == 'model':
+            # Ältere Nachrichten werden erst beim Hochscrollen seitenweise aus chat_logs geladen
+            self.transcript_pager.reset(self.current_user if self.firebase_initialized else None)
+            self._snapshot_messages = []
+            if snapshot is not None and snapshot.transcript:
+                # Letzter Stand des Gesprächs ohne Abfrage und (bei gleicher Breite) ohne Layout
+                # Einträge ohne Zeitstempel (ältere Snapshots) fehlen in chat_logs und werden übergangen
+                self.chat_window.restore_messages([entry for entry in snapshot.transcript if entry.timestamp is not None])
+                self.chat_window.scrollToBottom()
+            elif config.INITIAL_HISTORY and len(config.INITIAL_HISTORY) > 1 and config.INITIAL_HISTORY[1]['role'] == 'model':
                 initial_bot_message_text = config.INITIAL_HISTORY[1]['parts'][0]
-                self._insert_html_bubble("Chatty: " + initial_bot_message_text, "bot")
+                timestamp = datetime.now(timezone.utc)
+                self._insert_bubble("Chatty: " + initial_bot_message_text, "bot", timestamp)
                 if self.firebase_initialized:
-                     firebase_logger.log_to_firestore("Chatty", initial_bot_message_text, username=self.current_user)
+                     firebase_logger.log_to_firestore("Chatty", initial_bot_message_text, username=self.current_user, timestamp=timestamp)
+        if self.firebase_initialized:
+            # Einmalig ältere Einträge in den lokalen Suchindex übernehmen; neue kommen beim Loggen dazu
+            workers.run_in_background(
+                firebase_logger.backfill_search_index, self.current_user,
+                on_error=lambda error: print(f"Fehler beim Aufbau des Suchindex: {error}")
+            )
         if self.entry: self.entry.setFocus()
 
-    def _insert_html_bubble(self, full_message, speaker_type):
+    def _search_command(self):
+        """Durchsucht den lokalen Index und zeigt die Treffer als Menü unter dem Suchfeld."""
+        if not self.current_user or not self.search_entry: return
+        text = self.search_entry.text().strip()
+        if not text: return
+        index = search_index.get_index()
+        if index is None:
+            QMessageBox.information(self, "Suche", "Der lokale Suchindex ist nicht verfügbar.")
+            return
+        with metrics.span("ui.search"):
+            hits = index.search(self.current_user, text, config.SEARCH_RESULT_LIMIT)
+        menu = QMenu(self)
+        if not hits:
+            menu.addAction("Keine Treffer").setEnabled(False)
+        for hit in hits:
+            when = hit.timestamp.astimezone().strftime("%d.%m.%Y %H:%M") if hit.timestamp else ""
+            snippet = " ".join(hit.snippet.split())
+            # '&' würde im Menü als Tastenkürzel interpretiert
+            action = menu.addAction(f"{when}  {hit.speaker}: {snippet}".replace("&", "&&"))
+            action.triggered.connect(lambda checked=False, hit=hit: self._jump_to_search_hit(hit))
+        menu.popup(self.search_entry.mapToGlobal(self.search_entry.rect().bottomLeft()))
+
+    def _jump_to_search_hit(self, hit):
         if not self.chat_window: return
+        if self.chat_window.scroll_to_timestamp(hit.timestamp): return
+        # Nicht im angezeigten Ausschnitt: Verlauf ab dem Treffer laden
+        if not self.transcript_pager.jump_to(hit.timestamp):
+            QMessageBox.information(self, "Suche", "Ohne Datenbank kann nur im angezeigten Verlauf gesprungen werden.")
 
+    def _split_speaker(self, full_message, speaker_type):
         speaker = "Unbekannt"
         message_text = full_message
         if ":" in full_message:
             parts = full_message.split(":", 1)
             speaker = parts[0].strip()
             message_text = parts[1].strip()
-
-        is_user_message = (speaker_type == "user")
-        if is_user_message:
+        if speaker_type == "user":
             speaker = self.current_user
+        return speaker, message_text
+
+    def _insert_bubble(self, full_message, speaker_type, timestamp=None):
+        """Hängt eine Bubble an den Chatverlauf an und gibt die ChatMessage zurück.
 
-        background_color = config.BUBBLE_COLOR
-        text_color = config.BUBBLE_FG
-        alignment = "left"
-        margin_left = "10px"
-        margin_right = "70px"
-
-        if is_user_message:
-            alignment = "right"
-            margin_left = "70px"
-            margin_right = "10px"
-            background_color = getattr(config, 'USER_BUBBLE_BG', config.BUBBLE_COLOR)
-        elif speaker_type == "error":
-             background_color = config.ERROR_BUBBLE_BG
-             text_color = config.ERROR_BUBBLE_FG
-
-        message_html = escape(message_text).replace('\n', '<br>')
-
-        html_content = f"""
-        <div style="text-align: {alignment}; margin-left: {margin_left}; margin-right: {margin_right}; margin-bottom: {getattr(config, 'BUBBLE_VERTICAL_SPACING', '10px')};">
-            <div style="display: inline-block; background-color: {background_color}; color: {text_color}; padding: 8px 12px; border-radius: {getattr(config, 'BUBBLE_BORDER_RADIUS', '15px')}; text-align: left; max-width: 80%;">
-                <b>{escape(speaker)}:</b><br>
-                {message_html}
-            </div>
-        </div>
+        timestamp sollte derselbe Zeitpunkt wie im Log-Eintrag sein, er dient beim Nachladen als Cursor.
         """
-        cursor = self.chat_window.textCursor()
-        cursor.movePosition(QTextCursor.MoveOperation.End)
-        self.chat_window.setTextCursor(cursor)
-        self.chat_window.insertHtml(html_content)
-        cursor.movePosition(QTextCursor.MoveOperation.End)
-        self.chat_window.setTextCursor(cursor)
-        self.chat_window.ensureCursorVisible()
+        if not self.chat_window: return None
+        speaker, message_text = self._split_speaker(full_message, speaker_type)
+        with metrics.span("ui.insert_bubble"):
+            message = self.transcript_pager.append_live(speaker, message_text, speaker_type, timestamp)
+        self._snapshot_messages.append(message)
+        return message
+
+    def _update_bubble(self, message, full_message, speaker_type):
+        """Ersetzt den Text einer bestehenden Bubble (z.B. beim Streaming)."""
+        if not self.chat_window or message is None: return False
+        _, message_text = self._split_speaker(full_message, speaker_type)
+        return self.chat_window.update_message(message, message_text)
+
+    def _remove_bubble(self, message):
+        """Entfernt eine Bubble wieder aus dem Chatverlauf."""
+        if message in self._snapshot_messages:
+            self._snapshot_messages.remove(message)
+        if not self.chat_window or message is None: return False
+        return self.chat_window.remove_message(message)
 
     def _send_message_command(self):
-        if not self.current_user: return
+        if not self.current_user or self._request_in_flight: return
         user_input = self.entry.text().strip()
         if not user_input: return
-        self._insert_html_bubble(f"Du: {user_input}", "user")
+        timestamp = datetime.now(timezone.utc)
+        self._insert_bubble(f"Du: {user_input}", "user", timestamp)
         if self.firebase_initialized:
-            firebase_logger.log_to_firestore("Du", user_input, username=self.current_user)
+            firebase_logger.log_to_firestore("Du", user_input, username=self.current_user, timestamp=timestamp)
         self.entry.clear()
         self._set_chat_ui_state(False)
-        success, response_or_error = gemini_interface.send_message_to_gemini(user_input)
+        self._request_in_flight = True
+        self._turn_started = time.perf_counter()
+        self._stream_message = None
+        self._stream_text = ""
+        generation = self._chat_generation
+        if config.GEMINI_STREAMING:
+            workers.run_in_background(
+                gemini_interface.stream_message_to_gemini, user_input, user_id=self.current_user_id,
+                on_progress=lambda chunk: self._on_gemini_chunk(generation, chunk),
+                on_result=lambda result: self._on_gemini_result(generation, result),
+                on_error=lambda error: self._on_gemini_result(generation, (False, error))
+            )
+        else:
+            workers.run_in_background(
+                gemini_interface.send_message_to_gemini, user_input, user_id=self.current_user_id,
+                on_result=lambda result: self._on_gemini_result(generation, result),
+                on_error=lambda error: self._on_gemini_result(generation, (False, error))
+            )
+
+    def _on_gemini_chunk(self, generation, chunk):
+        if generation != self._chat_generation: return
+        self._stream_text += chunk
+        if self._stream_message is None:
+            metrics.observe("chatty_turn_first_chunk_seconds", time.perf_counter() - self._turn_started)
+            self._stream_message = self._insert_bubble("Chatty: " + self._stream_text, "bot")
+        else:
+            self._update_bubble(self._stream_message, "Chatty: " + self._stream_text, "bot")
+
+    def _on_gemini_result(self, generation, result):
+        if generation != self._chat_generation:
+            # Antwort gehört zu einer bereits verlassenen Chat-Sitzung
+            return
+        self._request_in_flight = False
+        success, response_or_error = result
+        stream_message = self._stream_message
+        self._stream_message = None
+        self._stream_text = ""
+        timestamp = datetime.now(timezone.utc)
         if success:
-            self._insert_html_bubble("Chatty: " + response_or_error, "bot")
+            # Beim Streaming wird die bereits sichtbare Bubble nur noch finalisiert, geloggt wird einmalig
+            if stream_message is not None:
+                stream_message.timestamp = timestamp
+                self._update_bubble(stream_message, "Chatty: " + response_or_error, "bot")
+            else:
+                self._insert_bubble("Chatty: " + response_or_error, "bot", timestamp)
             if self.firebase_initialized:
-                 firebase_logger.log_to_firestore("Chatty", response_or_error, username=self.current_user)
+                 firebase_logger.log_to_firestore("Chatty", response_or_error, username=self.current_user, timestamp=timestamp)
         else:
+            if stream_message is not None:
+                # Die Runde wurde zurückgenommen: der angezeigte Teil steht weder im Log noch im Verlauf
+                self._remove_bubble(stream_message)
             error_display_text = f"Chatty Fehler: {response_or_error}"
-            self._insert_html_bubble(error_display_text, "error")
+            self._insert_bubble(error_display_text, "error", timestamp)
             if self.firebase_initialized:
-                firebase_logger.log_to_firestore("Fehler", response_or_error, username=self.current_user)
+                firebase_logger.log_to_firestore("Fehler", response_or_error, username=self.current_user, timestamp=timestamp)
+        # Gesamtdauer der Runde aus Sicht des Benutzers: Absenden bis fertige Bubble
+        metrics.observe("chatty_turn_seconds", time.perf_counter() - self._turn_started,
+                        outcome="ok" if success else "error")
+        metrics.inc("chatty_turns_total", outcome="ok" if success else "error")
+        self._save_snapshot()
         self._set_chat_ui_state(True)
 
+    def _save_snapshot(self):
+        """Hängt Verlauf und neue Blasen dieser Runde an den Gesprächs-Snapshot des Benutzers an."""
+        messages, self._snapshot_messages = self._snapshot_messages, []
+        if not self.current_user_id or not self.chat_window: return
+        entries = []
+        for message in messages:
+            # Nur was auch in chat_logs steht; sonst käme beim nächsten Login eine Antwort zurück, die es nirgends gibt
+            if message.timestamp is None:
+                continue
+            size = self.chat_window.message_size(message)
+            entries.append(conversation_snapshot.TranscriptEntry(
+                message.speaker, message.text, message.kind, message.timestamp,
+                size.width() if size is not None else None, size.height() if size is not None else None
+            ))
+        with metrics.span("ui.save_snapshot"):
+            conversation_snapshot.save_turn(self.current_user_id, gemini_interface.get_history(self.current_user_id), entries)
+
     def _set_chat_ui_state(self, enabled):
+        # Das Eingabefeld bleibt während einer laufenden Anfrage bedienbar, gesperrt werden das Absenden
+        # (siehe _request_in_flight) und der Zurück-Button: die Antwort landet ohnehin im Verlauf der
+        # Sitzung, nach einem erneuten Login stünde dort eine Runde, die nie angezeigt wurde.
         state = bool(enabled)
-        if self.entry: self.entry.setEnabled(state)
         if self.send_button: self.send_button.setEnabled(state)
         if self.exit_button: self.exit_button.setEnabled(state)
         if state and self.entry: self.entry.setFocus()
-        QApplication.processEvents()
 
     def closeEvent(self, event):
         self._on_closing()
@@ -344,4 +512,6 @@ class ChattyApp(QMainWindow):
         print("Anwendung wird geschlossen.")
         username_to_log = self.current_user or "Unbekannt"
         if self.firebase_initialized:
-            firebase_logger.log_to_firestore("System", "Anwendung geschlossen.", username=username_to_log)
\ No newline at end of file
+            firebase_logger.log_to_firestore("System", "Anwendung geschlossen.", username=username_to_log)
+            firebase_logger.stop_log_writer()
+        metrics.stop_periodic_export()
\ No newline at end of file
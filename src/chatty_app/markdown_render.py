@@ -0,0 +1,248 @@
+# src/chatty_app/markdown_render.py
+"""Markdown aus Gemini-Antworten als Qt-Rich-Text (HTML-Untermenge von QTextDocument).
+
+Unterstützt werden Absätze, Überschriften, Listen (auch verschachtelt), Zitate, Trennlinien,
+Codeblöcke mit ``` bzw. ~~~ sowie **fett**, *kursiv*, ~~durchgestrichen~~, `Code` und [Links](https://...).
+Einfache Zeilenumbrüche bleiben erhalten, wie in Chat-Antworten üblich.
+
+IncrementalMarkdownRenderer zerlegt den Text in Blöcke (getrennt durch Leerzeilen bzw. Codezäune).
+Abgeschlossene Blöcke werden pro Nachricht gecacht; beim Streaming wird nur der letzte, noch offene
+Block neu übersetzt.
+"""
+import re
+from collections import OrderedDict
+from html import escape
+
+# Abstände der Blockelemente in der Blase; Qt-Standardwerte wären für Sprechblasen zu groß
+DOCUMENT_STYLE_SHEET = (
+    "p, ul, ol, pre, blockquote, h3, h4, h5, h6 { margin-top: 4px; margin-bottom: 4px; }"
+    "pre { font-family: monospace; }"
+    "code { font-family: monospace; }"
+)
+
+_FENCE = re.compile(r"^ {0,3}(```|~~~)")
+_HEADING = re.compile(r"^ {0,3}(#{1,6})\s+(.*?)\s*#*\s*$")
+_LIST_ITEM = re.compile(r"^(\s*)([-*+]|\d{1,9}[.)])\s+(.*)$")
+_QUOTE = re.compile(r"^ {0,3}>\s?(.*)$")
+_RULE = re.compile(r"^ {0,3}([-*_])(\s*\1){2,}\s*$")
+
+_CODE_SPAN = re.compile(r"(`+)(.+?)\1")
+_INLINE_RULES = (
+    (re.compile(r"\[([^\]]+)\]\((https?://[^\s)]+)\)"), r'<a href="\2">\1</a>'),
+    (re.compile(r"\*\*(?=\S)(.+?)(?<=\S)\*\*"), r"<b>\1</b>"),
+    (re.compile(r"__(?=\S)(.+?)(?<=\S)__"), r"<b>\1</b>"),
+    (re.compile(r"(?<![*\w])\*(?=\S)(.+?)(?<=\S)\*(?!\*)"), r"<i>\1</i>"),
+    (re.compile(r"(?<![_\w])_(?=\S)(.+?)(?<=\S)_(?![_\w])"), r"<i>\1</i>"),
+    (re.compile(r"~~(?=\S)(.+?)(?<=\S)~~"), r"<s>\1</s>"),
+)
+
+
+def render_inline(text):
+    """Übersetzt Inline-Markdown einer Zeile; Codeabschnitte bleiben unverändert."""
+    parts = []
+    pos = 0
+    for match in _CODE_SPAN.finditer(text):
+        parts.append(_render_inline_plain(text[pos:match.start()]))
+        parts.append(f"<code>{escape(match.group(2).strip())}</code>")
+        pos = match.end()
+    parts.append(_render_inline_plain(text[pos:]))
+    return "".join(parts)
+
+
+def _render_inline_plain(text):
+    html = escape(text)
+    for pattern, replacement in _INLINE_RULES:
+        html = pattern.sub(replacement, html)
+    return html
+
+
+def _next_line(text, pos):
+    """(Zeile ohne Umbruch, Position danach); Position ist None, solange die Zeile nicht abgeschlossen ist."""
+    end = text.find("\n", pos)
+    if end < 0:
+        return text[pos:], None
+    return text[pos:end], end + 1
+
+
+def scan_blocks(text, pos=0):
+    """Zerlegt text ab pos in abgeschlossene Blöcke.
+
+    Gibt ([("code", Zaunzeile, Zeilen) oder ("text", Zeilen)], Position hinter dem letzten
+    abgeschlossenen Block) zurück. Ein Textblock ist abgeschlossen, sobald eine Leerzeile oder ein
+    Codezaun folgt, ein Codeblock mit seinem schließenden Zaun.
+    """
+    blocks = []
+    while True:
+        line, after = _next_line(text, pos)
+        if after is None:
+            return blocks, pos
+        if not line.strip():
+            pos = after
+            continue
+        fence = _FENCE.match(line)
+        if fence:
+            body = []
+            cursor = after
+            while True:
+                code_line, code_after = _next_line(text, cursor)
+                if code_after is None:
+                    return blocks, pos
+                if code_line.strip().startswith(fence.group(1)):
+                    blocks.append(("code", line, body))
+                    pos = code_after
+                    break
+                body.append(code_line)
+                cursor = code_after
+            continue
+        lines = [line]
+        cursor = after
+        while True:
+            next_line, next_after = _next_line(text, cursor)
+            if next_after is None:
+                return blocks, pos
+            if not next_line.strip():
+                blocks.append(("text", lines))
+                pos = next_after
+                break
+            if _FENCE.match(next_line):
+                blocks.append(("text", lines))
+                pos = cursor
+                break
+            lines.append(next_line)
+            cursor = next_after
+
+
+def render_block(block):
+    if block[0] == "code":
+        return f"<pre>{escape(chr(10).join(block[2]))}</pre>"
+    return _render_text_block(block[1])
+
+
+def _render_text_block(lines):
+    html = []
+    paragraph = []
+    quote = []
+    # Offene Listen als Stapel von (Einrückung, Tag); Listenpunkte bleiben bis zum nächsten Punkt offen
+    lists = []
+
+    def flush_paragraph():
+        if paragraph:
+            html.append("<p>" + "<br>".join(render_inline(line) for line in paragraph) + "</p>")
+            paragraph.clear()
+
+    def flush_quote():
+        if quote:
+            html.append("<blockquote>" + "<br>".join(render_inline(line) for line in quote) + "</blockquote>")
+            quote.clear()
+
+    def close_lists(indent=-1):
+        while lists and lists[-1][0] > indent:
+            html.append(f"</li></{lists.pop()[1]}>")
+
+    for line in lines:
+        item = _LIST_ITEM.match(line)
+        if item and not _RULE.match(line):
+            flush_paragraph()
+            flush_quote()
+            indent = len(item.group(1).expandtabs(4))
+            marker = item.group(2)
+            tag = "ul" if marker in "-*+" else "ol"
+            close_lists(indent)
+            if lists and lists[-1][0] == indent and lists[-1][1] == tag:
+                html.append("</li>")
+            else:
+                if lists and lists[-1][0] == indent:
+                    # Gleiche Ebene, anderer Listentyp
+                    html.append(f"</li></{lists.pop()[1]}>")
+                start = marker[:-1] if tag == "ol" else None
+                html.append(f'<ol start="{int(start)}">' if start and int(start) != 1 else f"<{tag}>")
+                lists.append((indent, tag))
+            html.append("<li>" + render_inline(item.group(3)))
+            continue
+        if lists and line[:1].isspace():
+            # Fortsetzungszeile des letzten Listenpunkts
+            html.append("<br>" + render_inline(line.strip()))
+            continue
+        close_lists()
+        heading = _HEADING.match(line)
+        if heading:
+            flush_paragraph()
+            flush_quote()
+            # h1/h2 wären in einer Sprechblase zu groß
+            level = min(len(heading.group(1)) + 2, 6)
+            html.append(f"<h{level}>{render_inline(heading.group(2))}</h{level}>")
+            continue
+        if _RULE.match(line):
+            flush_paragraph()
+            flush_quote()
+            html.append("<hr>")
+            continue
+        quoted = _QUOTE.match(line)
+        if quoted:
+            flush_paragraph()
+            quote.append(quoted.group(1))
+            continue
+        flush_quote()
+        paragraph.append(line.strip())
+    flush_paragraph()
+    flush_quote()
+    close_lists()
+    return "".join(html)
+
+
+def _render_tail(text):
+    """Übersetzt den noch offenen Rest, als wäre der Text hier zu Ende."""
+    blocks, pos = scan_blocks(text + "\n\n")
+    html = [render_block(block) for block in blocks]
+    rest = text[pos:] if pos < len(text) else ""
+    if rest.strip():
+        # Nur ein noch nicht geschlossener Codeblock bleibt übrig
+        first_line, _, body = rest.lstrip("\n").partition("\n")
+        html.append(render_block(("code", first_line, body.split("\n") if body else [])))
+    return "".join(html)
+
+
+def render_markdown(text):
+    """Übersetzt einen vollständigen Markdown-Text."""
+    return _render_tail(text)
+
+
+class _RenderState:
+    __slots__ = ("source", "html")
+
+    def __init__(self):
+        self.source = ""  # Text bis zum Ende des letzten abgeschlossenen Blocks
+        self.html = []    # HTML der abgeschlossenen Blöcke
+
+
+class IncrementalMarkdownRenderer:
+    """Übersetzt wachsende Texte (Streaming) mit Cache der abgeschlossenen Blöcke pro Schlüssel.
+
+    Beginnt ein neuer Text nicht mehr mit dem gecachten Teil (z.B. nach einer Korrektur), wird
+    für diesen Schlüssel neu begonnen. Es werden höchstens max_entries Schlüssel gehalten (LRU).
+    """
+
+    def __init__(self, max_entries=200):
+        self.max_entries = max(1, int(max_entries))
+        self._states = OrderedDict()
+
+    def clear(self):
+        self._states.clear()
+
+    def discard(self, key):
+        self._states.pop(key, None)
+
+    def render(self, key, text):
+        state = self._states.get(key)
+        if state is None or not text.startswith(state.source):
+            state = _RenderState()
+            self._states[key] = state
+        self._states.move_to_end(key)
+        while len(self._states) > self.max_entries:
+            self._states.popitem(last=False)
+        blocks, pos = scan_blocks(text, len(state.source))
+        if blocks:
+            state.html.extend(render_block(block) for block in blocks)
+            state.source = text[:pos]
+        tail = text[len(state.source):]
+        return "".join(state.html) + (_render_tail(tail) if tail.strip() else "")
@@ -0,0 +1,244 @@
+# src/chatty_app/metrics.py
+"""Leichtgewichtiges Tracing: Spans messen Laufzeiten, daraus entstehen Latenz-Histogramme
+(p50/p95/p99), dazu Zähler, z.B. für den Tokenverbrauch.
+
+Nur Standardbibliothek, damit das Modul überall (GUI, Skripte, Benchmarks) importiert werden kann.
+Export als Prometheus-Textdatei (node_exporter textfile collector) oder JSON-Snapshot.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+from . import config
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Hält die letzten max_samples Messwerte für Quantile sowie Gesamtanzahl und -summe."""
+
+    def __init__(self, max_samples=2048):
+        self._samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def quantiles(self, qs=QUANTILES):
+        samples = sorted(self._samples)
+        if not samples:
+            return {q: None for q in qs}
+        last = len(samples) - 1
+        return {q: samples[min(last, int(round(q * last)))] for q in qs}
+
+
+class MetricsRegistry:
+    def __init__(self, max_samples=2048, max_recent_spans=200):
+        self._lock = threading.Lock()
+        self._max_samples = max_samples
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}  # (name, labels) -> float
+        self._recent_spans = deque(maxlen=max_recent_spans)
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self._max_samples)
+            histogram.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def record_span(self, name, start, duration, error=None):
+        self.observe("chatty_span_seconds", duration, span=name)
+        if error is not None:
+            self.inc("chatty_span_errors_total", span=name)
+        with self._lock:
+            self._recent_spans.append({
+                'span': name, 'start': start, 'duration_s': duration,
+                'thread': threading.current_thread().name, 'error': error,
+            })
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._recent_spans.clear()
+
+    def snapshot(self):
+        """Alle Messwerte als JSON-taugliches dict."""
+        with self._lock:
+            histograms = []
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                quantiles = histogram.quantiles()
+                histograms.append({
+                    'name': name, 'labels': dict(labels), 'count': histogram.count, 'sum': histogram.total,
+                    'p50': quantiles[0.5], 'p95': quantiles[0.95], 'p99': quantiles[0.99],
+                })
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            recent_spans = list(self._recent_spans)
+        return {'timestamp': time.time(), 'histograms': histograms, 'counters': counters,
+                'recent_spans': recent_spans}
+
+    def span_quantile(self, span_name, q=0.95, min_count=1):
+        """Quantil der Span-Dauer in Sekunden (oder None bei zu wenigen Messungen)."""
+        with self._lock:
+            histogram = self._histograms.get(self._key("chatty_span_seconds", {'span': span_name}))
+            if histogram is None or histogram.count < min_count:
+                return None
+            return histogram.quantiles((q,))[q]
+
+    def to_prometheus_text(self):
+        snapshot = self.snapshot()
+        lines = []
+        seen_types = set()
+
+        def label_text(labels, extra=None):
+            items = dict(labels, **(extra or {}))
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in sorted(items.items())) + "}"
+
+        for entry in snapshot['histograms']:
+            name = entry['name']
+            if name not in seen_types:
+                lines.append(f"# TYPE {name} summary")
+                seen_types.add(name)
+            for q in QUANTILES:
+                value = entry[f"p{round(q * 100)}"]
+                if value is not None:
+                    lines.append(f"{name}{label_text(entry['labels'], {'quantile': q})} {value}")
+            lines.append(f"{name}_sum{label_text(entry['labels'])} {entry['sum']}")
+            lines.append(f"{name}_count{label_text(entry['labels'])} {entry['count']}")
+        for entry in snapshot['counters']:
+            name = entry['name']
+            if name not in seen_types:
+                lines.append(f"# TYPE {name} counter")
+                seen_types.add(name)
+            lines.append(f"{name}{label_text(entry['labels'])} {entry['value']}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def span(name):
+    """Misst die Laufzeit eines Blocks; Ausnahmen werden gezählt und weitergereicht."""
+    start = time.time()
+    t0 = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        registry.record_span(name, start, time.perf_counter() - t0, error=type(e).__name__)
+        raise
+    registry.record_span(name, start, time.perf_counter() - t0)
+
+
+def traced(name):
+    """Decorator-Variante von span()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def observe(name, value, **labels):
+    registry.observe(name, value, **labels)
+
+
+def inc(name, value=1, **labels):
+    registry.inc(name, value, **labels)
+
+
+def record_token_usage(usage_metadata, model=None):
+    """Übernimmt response.usage_metadata (prompt/candidates/total) als Zähler."""
+    if usage_metadata is None:
+        return
+    labels = {'model': model or config.GEMINI_MODEL_NAME}
+    for kind, attr in (("prompt", "prompt_token_count"), ("candidates", "candidates_token_count"),
+                       ("total", "total_token_count")):
+        value = getattr(usage_metadata, attr, None)
+        if value:
+            registry.inc("chatty_gemini_tokens_total", value, kind=kind, **labels)
+
+
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def export_metrics(path=None, fmt=None):
+    """Schreibt die Metriken als Prometheus-Textdatei ("prometheus") oder JSON-Snapshot ("json")."""
+    path = path or config.METRICS_EXPORT_PATH
+    fmt = fmt or config.METRICS_EXPORT_FORMAT
+    if not path:
+        return False
+    try:
+        if fmt == "json":
+            _write_atomic(path, json.dumps(registry.snapshot(), indent=2, default=str))
+        else:
+            _write_atomic(path, registry.to_prometheus_text())
+        return True
+    except OSError as e:
+        print(f"Fehler beim Export der Metriken nach {path}: {e}")
+        return False
+
+
+_exporter_thread = None
+_exporter_stop = threading.Event()
+
+
+def start_periodic_export(interval=None):
+    """Exportiert die Metriken alle interval Sekunden in einem Hintergrund-Thread (falls ein Pfad konfiguriert ist)."""
+    global _exporter_thread
+    interval = interval or config.METRICS_EXPORT_INTERVAL_S
+    if not config.METRICS_EXPORT_PATH or (_exporter_thread and _exporter_thread.is_alive()):
+        return False
+    _exporter_stop.clear()
+
+    def run():
+        while not _exporter_stop.wait(interval):
+            export_metrics()
+
+    _exporter_thread = threading.Thread(target=run, name="MetricsExporter", daemon=True)
+    _exporter_thread.start()
+    return True
+
+
+def stop_periodic_export():
+    """Beendet den Export-Thread und schreibt einen letzten Stand."""
+    global _exporter_thread
+    _exporter_stop.set()
+    if _exporter_thread:
+        _exporter_thread.join(timeout=2.0)
+        _exporter_thread = None
+    return export_metrics() if config.METRICS_EXPORT_PATH else False
@@ -0,0 +1,57 @@
+# src/chatty_app/metrics_overlay.py
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import QLabel
+
+from . import metrics
+
+
+def _ms(seconds):
+    return "   -  " if seconds is None else f"{seconds * 1000:6.0f}"
+
+
+class MetricsOverlay(QLabel):
+    """Halbtransparente Anzeige der Span-Latenzen (p50/p95/p99 in ms) und Zähler über einem Widget."""
+
+    REFRESH_MS = 1000
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setObjectName("MetricsOverlay")
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setTextFormat(Qt.TextFormat.PlainText)
+        self.setStyleSheet(
+            "QLabel#MetricsOverlay { background-color: rgba(0, 0, 0, 170); color: #E0FFE0;"
+            " font-family: monospace; font-size: 8pt; padding: 6px; border-radius: 4px; }"
+        )
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        self.set_active(not self.isVisible())
+
+    def set_active(self, active):
+        if active:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self._timer.start(self.REFRESH_MS)
+        else:
+            self._timer.stop()
+            self.hide()
+
+    def refresh(self):
+        snapshot = metrics.registry.snapshot()
+        lines = [f"{'Span':<24}{'p50':>7}{'p95':>7}{'p99':>7}{'n':>6}"]
+        for entry in snapshot['histograms']:
+            label = entry['labels'].get('span') or entry['name'].replace("chatty_", "").replace("_seconds", "")
+            lines.append(f"{label[:24]:<24}{_ms(entry['p50'])} {_ms(entry['p95'])} {_ms(entry['p99'])}{entry['count']:>6}")
+        for entry in snapshot['counters']:
+            label = entry['name'].replace("chatty_", "")
+            detail = ",".join(str(v) for k, v in sorted(entry['labels'].items()) if k != 'model')
+            lines.append(f"{label}{'[' + detail + ']' if detail else ''}: {entry['value']:g}")
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        parent = self.parentWidget()
+        if parent is not None:
+            self.move(max(0, parent.width() - self.width() - 8), 8)
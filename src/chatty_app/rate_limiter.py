@@ -0,0 +1,133 @@
+# src/chatty_app/rate_limiter.py
+import threading
+import time
+from collections import deque
+
+
+class RateLimitTimeout(Exception):
+    """Innerhalb der Frist wurde kein Platz im Kontingent frei."""
+
+
+class RateLimiter:
+    """Token-Bucket für Anfragen pro Minute (RPM) und Tokens pro Minute (TPM).
+
+    Anfragen über dem Limit warten in einer fairen FIFO-Warteschlange, statt vom Server mit 429
+    abgelehnt zu werden. headroom < 1 hält den Durchsatz knapp unter dem Kontingent.
+    None als Limit bedeutet: unbegrenzt.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, headroom=0.9, name=""):
+        self.name = name
+        # Mindestens eine ganze Anfrage, sonst käme bei sehr kleinen Limits nie jemand an die Reihe
+        self.request_capacity = max(1.0, requests_per_minute * headroom) if requests_per_minute else None
+        self.token_capacity = tokens_per_minute * headroom if tokens_per_minute else None
+        self._request_rate = self.request_capacity / 60.0 if self.request_capacity else None
+        self._token_rate = self.token_capacity / 60.0 if self.token_capacity else None
+        self._requests = self.request_capacity or 0.0
+        self._tokens = self.token_capacity or 0.0
+        self._last_refill = time.monotonic()
+        self._cond = threading.Condition()
+        self._queue = deque()
+
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+        self.timeouts = 0
+
+    def _refill(self, now):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.request_capacity:
+            self._requests = min(self.request_capacity, self._requests + elapsed * self._request_rate)
+        if self.token_capacity:
+            self._tokens = min(self.token_capacity, self._tokens + elapsed * self._token_rate)
+
+    def _time_until_available(self, tokens):
+        wait = 0.0
+        if self.request_capacity:
+            wait = max(wait, (1.0 - self._requests) / self._request_rate)
+        if self.token_capacity:
+            wait = max(wait, (tokens - self._tokens) / self._token_rate)
+        return wait
+
+    def acquire(self, tokens=0, timeout=None):
+        """Wartet, bis eine Anfrage mit `tokens` geschätzten Tokens erlaubt ist. Gibt die Wartezeit zurück."""
+        if self.token_capacity:
+            # Größere Anfragen als der Bucket würden sonst nie an die Reihe kommen
+            tokens = min(tokens, self.token_capacity)
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        ticket = object()
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if self._queue[0] is ticket:
+                        self._refill(now)
+                        wait = self._time_until_available(tokens)
+                        if wait <= 0:
+                            if self.request_capacity:
+                                self._requests -= 1.0
+                            if self.token_capacity:
+                                self._tokens -= tokens
+                            break
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self.timeouts += 1
+                            raise RateLimitTimeout(f"Rate-Limit für '{self.name}': keine Kapazität innerhalb der Frist.")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._queue.remove(ticket)
+                # Der Nächste in der Schlange prüft jetzt selbst, ob er an der Reihe ist
+                self._cond.notify_all()
+            waited = time.monotonic() - start
+            self.acquired += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self.last_wait = waited
+        return waited
+
+    def try_acquire(self, tokens=0):
+        """Nimmt Kontingent nur, wenn niemand wartet und sofort genug frei ist (z.B. für Hedge-Anfragen)."""
+        if self.token_capacity:
+            tokens = min(tokens, self.token_capacity)
+        with self._cond:
+            if self._queue:
+                return False
+            self._refill(time.monotonic())
+            if self._time_until_available(tokens) > 0:
+                return False
+            if self.request_capacity:
+                self._requests -= 1.0
+            if self.token_capacity:
+                self._tokens -= tokens
+            self.acquired += 1
+            self.last_wait = 0.0
+            return True
+
+    def adjust_tokens(self, delta):
+        """Korrigiert den Token-Bucket, sobald der tatsächliche Verbrauch (usage_metadata) bekannt ist."""
+        if not self.token_capacity or not delta:
+            return
+        with self._cond:
+            self._refill(time.monotonic())
+            self._tokens = min(self.token_capacity, self._tokens - delta)
+            self._cond.notify_all()
+
+    def get_stats(self):
+        with self._cond:
+            return {
+                'queue_length': len(self._queue),
+                'acquired': self.acquired,
+                'avg_wait': self.total_wait / self.acquired if self.acquired else None,
+                'max_wait': self.max_wait,
+                'last_wait': self.last_wait,
+                'timeouts': self.timeouts,
+                'available_requests': self._requests if self.request_capacity else None,
+                'available_tokens': self._tokens if self.token_capacity else None,
+            }
@@ -0,0 +1,122 @@
+# src/chatty_app/resilience.py
+"""Deadlines, Wiederholungen mit Backoff und abgesicherte (hedged) Aufrufe für Netzwerk-APIs."""
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# HTTP-Statuscodes, bei denen eine Wiederholung sinnvoll ist (Quota, Überlast, Timeout)
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+# google.api_core.exceptions, ohne das Paket importieren zu müssen
+RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "BadGateway", "GatewayTimeout", "DeadlineExceeded", "RetryError",
+}
+
+
+class DeadlineExceeded(Exception):
+    """Die Gesamtfrist für eine Anfrage ist abgelaufen."""
+
+
+class Deadline:
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0.0
+
+    def extend(self, seconds):
+        """Verschiebt die Frist, z.B. um eine Wartezeit, die nicht angerechnet werden soll."""
+        self.expires_at += seconds
+
+
+def is_retryable(error):
+    if isinstance(error, DeadlineExceeded):
+        # Die eigene Gesamtfrist ist abgelaufen (nicht zu verwechseln mit dem gleichnamigen 504 der API)
+        return False
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and code in RETRYABLE_STATUS_CODES:
+        return True
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """Exponentieller Backoff mit vollem Jitter: zufällig zwischen 0 und base * 2^attempt."""
+    return random.uniform(0.0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def call_with_retries(fn, deadline, max_attempts, base_delay, max_delay, attempt_timeout=None,
+                      on_retry=None, should_retry=None):
+    """Ruft fn(timeout) auf und wiederholt bei vorübergehenden Fehlern, solange die Frist reicht.
+
+    timeout ist die für diesen Versuch verbleibende Zeit. on_retry(error, attempt, delay) wird vor
+    jeder Wiederholung aufgerufen. Nicht wiederholbare Fehler werden sofort weitergereicht, ebenso
+    alle Fehler, für die should_retry(error) False liefert.
+    """
+    attempt = 0
+    while True:
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("Zeitlimit für die Anfrage überschritten.")
+        timeout = min(remaining, attempt_timeout) if attempt_timeout else remaining
+        try:
+            return fn(timeout)
+        except Exception as e:
+            attempt += 1
+            if attempt >= max_attempts or not is_retryable(e) or (should_retry and not should_retry(e)):
+                raise
+            delay = backoff_delay(attempt - 1, base_delay, max_delay)
+            if delay >= deadline.remaining():
+                raise
+            if on_retry:
+                on_retry(e, attempt, delay)
+            time.sleep(delay)
+
+
+# Eigener kleiner Pool: Verlierer eines Hedge-Rennens laufen im Hintergrund zu Ende
+_hedge_executor = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _get_hedge_executor():
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_executor_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+    return _hedge_executor
+
+
+def hedged_call(fn, hedge_delay, timeout, on_hedge=None, hedge_fn=None):
+    """Startet fn(); ist nach hedge_delay Sekunden kein Ergebnis da, läuft parallel ein zweiter Aufruf.
+
+    Gibt (Ergebnis, hedge_gewonnen) des zuerst erfolgreichen Aufrufs zurück. fn darf keine
+    Seiteneffekte haben, die sich bei doppelter Ausführung widersprechen. Schlagen beide
+    Aufrufe fehl, wird der Fehler des ersten Aufrufs (nicht des Hedges) weitergereicht. hedge_fn ersetzt fn für den zweiten Aufruf.
+    """
+    deadline = Deadline(timeout)
+    executor = _get_hedge_executor()
+    primary = executor.submit(fn)
+    done, _ = wait([primary], timeout=min(hedge_delay, deadline.remaining()))
+    if done:
+        return primary.result(), False
+    if deadline.expired():
+        raise DeadlineExceeded("Zeitlimit für die Anfrage überschritten.")
+    if on_hedge:
+        on_hedge()
+    hedge = executor.submit(hedge_fn or fn)
+    pending = {primary, hedge}
+    while pending:
+        done, pending = wait(pending, timeout=deadline.remaining(), return_when=FIRST_COMPLETED)
+        if not done:
+            raise DeadlineExceeded("Zeitlimit für die Anfrage überschritten.")
+        for future in done:
+            if future.exception() is None:
+                return future.result(), future is hedge
+    # Der Hedge scheitert oft nur am fehlenden Kontingent; aussagekräftig ist der Fehler der ersten Anfrage
+    raise primary.exception()
@@ -0,0 +1,128 @@
+# src/chatty_app/response_cache.py
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n.,!?;:…\"'()"
+
+
+def normalize_prompt(prompt):
+    """Normalisiert eine Eingabe, damit "Hallo!" und " hallo" denselben Schlüssel ergeben."""
+    text = _WHITESPACE_RE.sub(" ", prompt.casefold())
+    return text.strip(_EDGE_PUNCTUATION)
+
+
+def make_cache_key(prompt, history_tail):
+    """Schlüssel aus normalisierter Eingabe und Fingerabdruck des Verlaufsendes.
+
+    history_tail ist eine Liste von (Rolle, Text)-Paaren.
+    """
+    digest = hashlib.sha256()
+    for role, text in history_tail:
+        digest.update(role.encode("utf-8") + b"\x1f" + text.encode("utf-8") + b"\x1e")
+    digest.update(b"\x1d" + normalize_prompt(prompt).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """Zweistufiger Antwort-Cache: LRU im Speicher, optional persistent in SQLite.
+
+    Einträge verfallen nach ttl Sekunden. Auch auf der Platte bleiben höchstens max_entries
+    Einträge; verfallene und die ältesten werden beim Schreiben entfernt.
+    Treffer und Fehlschläge werden gezählt.
+    """
+
+    def __init__(self, max_entries=256, ttl=3600.0, disk_path=None):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl)
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (response, expires_at)
+        self._conn = None
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            self._conn = sqlite3.connect(disk_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS response_cache_expires ON response_cache (expires_at)")
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                response, expires_at = item
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return response
+                del self._memory[key]
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT response, expires_at FROM response_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[1] > now:
+                    self._remember_locked(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+                if row:
+                    self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+    def put(self, key, response):
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember_locked(key, response, expires_at)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("BEGIN")
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO response_cache (key, response, expires_at) VALUES (?, ?, ?)",
+                        (key, response, expires_at)
+                    )
+                    self._conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+                    # Alle Einträge haben dieselbe ttl: die zuerst verfallenden sind die ältesten
+                    self._conn.execute(
+                        "DELETE FROM response_cache WHERE key IN ("
+                        "SELECT key FROM response_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,)
+                    )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM response_cache")
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._memory),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None,
+            }
+
+    def _remember_locked(self, key, response, expires_at):
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
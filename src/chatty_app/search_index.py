@@ -0,0 +1,164 @@
+# src/chatty_app/search_index.py
+import os
+import re
+import sqlite3
+import threading
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from . import config
+
+SearchHit = namedtuple("SearchHit", "doc_id speaker message timestamp snippet")
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _timestamp_to_us(timestamp):
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp is None:
+        return None
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    delta = timestamp - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _timestamp_from_us(value):
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value // 1_000_000, tz=timezone.utc).replace(microsecond=value % 1_000_000)
+
+
+def build_match_query(text):
+    """Macht aus einer Benutzereingabe eine FTS5-Abfrage: alle Wörter müssen (als Wortanfang) vorkommen.
+
+    Sonderzeichen der FTS5-Syntax werden so nie als Operatoren interpretiert. None bei leerer Eingabe.
+    """
+    tokens = _TOKEN.findall(text or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+class SearchIndex:
+    """Lokaler Volltextindex (SQLite FTS5) über die Gesprächseinträge aller Benutzer dieses Rechners.
+
+    Einträge kommen mit ihrer Log-Dokument-ID, erneutes Hinzufügen (z.B. beim Nachholen älterer
+    Einträge) ist daher idempotent. Suchen laufen nur lokal, Treffer werden nach bm25 sortiert.
+    """
+
+    def __init__(self, path, synchronous="NORMAL"):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY,
+                doc_id TEXT NOT NULL UNIQUE,
+                username TEXT,
+                speaker TEXT,
+                timestamp_us INTEGER,
+                message TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                message, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+            );
+            -- Nur tatsächlich eingefügte Zeilen (nicht die per OR IGNORE übergangenen) landen im Index
+            CREATE TRIGGER IF NOT EXISTS messages_after_insert AFTER INSERT ON messages BEGIN
+                INSERT INTO messages_fts(rowid, message) VALUES (new.id, new.message);
+            END;
+            CREATE TABLE IF NOT EXISTS backfilled_users (username TEXT PRIMARY KEY);
+        """)
+
+    @staticmethod
+    def _row(doc_id, record):
+        return (doc_id, record.get('username'), record.get('speaker'),
+                _timestamp_to_us(record.get('timestamp')), record.get('message') or "")
+
+    def add(self, doc_id, record):
+        """Nimmt einen Log-Eintrag (dict mit 'username', 'speaker', 'message', 'timestamp') auf."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO messages (doc_id, username, speaker, timestamp_us, message) VALUES (?, ?, ?, ?, ?)",
+                self._row(doc_id, record)
+            )
+
+    def add_many(self, entries):
+        """Nimmt (doc_id, record)-Paare in einer Transaktion auf. Gibt die Anzahl neuer Einträge zurück."""
+        rows = [self._row(doc_id, record) for doc_id, record in entries]
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                cursor = self._conn.executemany(
+                    "INSERT OR IGNORE INTO messages (doc_id, username, speaker, timestamp_us, message) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return cursor.rowcount
+
+    def search(self, username, text, limit=20):
+        """Gibt die besten Treffer des Benutzers als SearchHit-Liste zurück (bester zuerst)."""
+        query = build_match_query(text)
+        if query is None:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT m.doc_id, m.speaker, m.message, m.timestamp_us,
+                       snippet(messages_fts, 0, '', '', '…', 12)
+                FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+                WHERE messages_fts MATCH ? AND m.username = ?
+                ORDER BY bm25(messages_fts)
+                LIMIT ?
+                """,
+                (query, username, int(limit))
+            ).fetchall()
+        return [SearchHit(doc_id, speaker, message, _timestamp_from_us(timestamp_us), snippet)
+                for doc_id, speaker, message, timestamp_us, snippet in rows]
+
+    def is_backfilled(self, username):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM backfilled_users WHERE username = ?", (username,)
+            ).fetchone() is not None
+
+    def mark_backfilled(self, username):
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO backfilled_users (username) VALUES (?)", (username,))
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Öffnet den Suchindex beim ersten Zugriff (oder None, falls deaktiviert/fehlerhaft)."""
+    global _index
+    if _index is None and config.SEARCH_INDEX_ENABLED:
+        with _index_lock:
+            if _index is None:
+                try:
+                    _index = SearchIndex(config.SEARCH_INDEX_PATH)
+                except Exception as e:
+                    print(f"Fehler beim Öffnen des Suchindex '{config.SEARCH_INDEX_PATH}': {e}")
+                    return None
+    return _index
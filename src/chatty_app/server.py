@@ -0,0 +1,268 @@
+# src/chatty_app/server.py
+"""Headless-Modus: HTTP für Registrierung/Login, WebSocket für gestreamte Antworten.
+
+Ein Prozess bedient viele Benutzer gleichzeitig (eine Gemini-Sitzung pro Benutzer, siehe
+gemini_interface). Skaliert wird über zusätzliche Server-Prozesse statt Desktop-Installationen.
+
+Protokoll:
+    POST /api/register, POST /api/login  {"username", "password"} -> {"ok", "message", "token", "username"}
+    POST /api/logout                     {"token"}
+    GET  /ws?token=...                   Client sendet {"type": "message", "text": ...};
+                                         Server sendet "greeting", "chunk"*, dann "done" oder "error"
+    GET  /healthz, GET /metrics          Status bzw. Metriken im Prometheus-Textformat
+"""
+import asyncio
+import functools
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from aiohttp import WSMsgType, web
+
+from . import auth
+from . import config
+from . import conversation_snapshot
+from . import firebase_logger
+from . import gemini_interface
+from . import metrics
+from .user_directory import canonical_user_id
+
+
+class TokenStore:
+    """Login-Tokens -> (Anzeigename, Benutzer-ID) mit Ablaufzeit. Wird nur im Event-Loop benutzt."""
+
+    def __init__(self, ttl):
+        self.ttl = float(ttl)
+        self._tokens = {}
+
+    def issue(self, username, user_id):
+        token = secrets.token_urlsafe(32)
+        self._tokens[token] = (username, user_id, time.monotonic() + self.ttl)
+        return token
+
+    def resolve(self, token):
+        entry = self._tokens.get(token)
+        if entry is None:
+            return None
+        username, user_id, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._tokens[token]
+            return None
+        return username, user_id
+
+    def revoke(self, token):
+        return self._tokens.pop(token, None) is not None
+
+
+EXECUTOR_KEY = web.AppKey("executor", ThreadPoolExecutor)
+TOKENS_KEY = web.AppKey("tokens", TokenStore)
+
+# Markiert in der Chunk-Warteschlange das Ende einer Antwort
+_END_OF_TURN = object()
+
+
+async def _run_blocking(app, fn, *args, **kwargs):
+    """Führt blockierende Firestore-/Gemini-Aufrufe im Thread-Pool aus, der Event-Loop bleibt frei."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app[EXECUTOR_KEY], functools.partial(fn, *args, **kwargs))
+
+
+async def _log(app, speaker, message, username, timestamp=None):
+    """log_to_firestore im Thread-Pool: Journal bzw. Backend werden blockierend geschrieben."""
+    return await _run_blocking(app, firebase_logger.log_to_firestore, speaker, message, username=username, timestamp=timestamp)
+
+
+async def _read_json(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def _read_credentials(request):
+    data = await _read_json(request)
+    return str(data.get('username', '')).strip(), str(data.get('password', ''))
+
+
+async def handle_register(request):
+    username, password = await _read_credentials(request)
+    if not username or not password:
+        return web.json_response({'ok': False, 'message': "Bitte Benutzername und Passwort eingeben."}, status=400)
+    success, message, user_doc_id = await _run_blocking(request.app, auth.register_user, username, password)
+    if not success:
+        return web.json_response({'ok': False, 'message': message}, status=400)
+    await _log(request.app, "System", "Benutzer registriert.", username=username)
+    token = request.app[TOKENS_KEY].issue(username, user_doc_id)
+    return web.json_response({'ok': True, 'message': message, 'token': token, 'username': username})
+
+
+async def handle_login(request):
+    username, password = await _read_credentials(request)
+    if not username or not password:
+        return web.json_response({'ok': False, 'message': "Bitte Benutzername und Passwort eingeben."}, status=400)
+    success, message, user_info = await _run_blocking(request.app, auth.verify_user, username, password)
+    if not success:
+        return web.json_response({'ok': False, 'message': message}, status=401)
+    await _log(request.app, "System", "Login erfolgreich.", username=user_info)
+    token = request.app[TOKENS_KEY].issue(user_info, canonical_user_id(username))
+    return web.json_response({'ok': True, 'message': message, 'token': token, 'username': user_info})
+
+
+async def handle_logout(request):
+    data = await _read_json(request)
+    revoked = request.app[TOKENS_KEY].revoke(str(data.get('token', '')))
+    return web.json_response({'ok': revoked})
+
+
+async def handle_health(request):
+    storage = firebase_logger.get_storage()
+    return web.json_response({'ok': True, 'storage': storage.name if storage else None})
+
+
+async def handle_metrics(request):
+    return web.Response(text=metrics.registry.to_prometheus_text(), content_type="text/plain")
+
+
+async def _send(ws, message_type, **fields):
+    """Sendet ein JSON-Objekt; eine bereits geschlossene Verbindung ist kein Fehler."""
+    if ws.closed:
+        return False
+    try:
+        await ws.send_json(dict(fields, type=message_type))
+        return True
+    except ConnectionResetError:
+        return False
+
+
+def _save_snapshot(user_id, entries):
+    conversation_snapshot.save_turn(user_id, gemini_interface.get_history(user_id), entries)
+
+
+async def _run_turn(app, ws, username, user_id, user_input):
+    """Eine Gesprächsrunde wie in ChattyApp: loggen, Antwort streamen, Ergebnis loggen."""
+    started = time.perf_counter()
+    user_timestamp = datetime.now(timezone.utc)
+    await _log(app, "Du", user_input, username=username, timestamp=user_timestamp)
+    loop = asyncio.get_running_loop()
+    chunks = asyncio.Queue()
+
+    def stream():
+        try:
+            return gemini_interface.stream_message_to_gemini(
+                user_input, user_id=user_id,
+                progress_callback=lambda text: loop.call_soon_threadsafe(chunks.put_nowait, text)
+            )
+        finally:
+            loop.call_soon_threadsafe(chunks.put_nowait, _END_OF_TURN)
+
+    future = loop.run_in_executor(app[EXECUTOR_KEY], stream)
+    first_chunk = True
+    while True:
+        chunk = await chunks.get()
+        if chunk is _END_OF_TURN:
+            break
+        if first_chunk:
+            metrics.observe("chatty_turn_first_chunk_seconds", time.perf_counter() - started)
+            first_chunk = False
+        # Auch wenn der Client weg ist, wird die Antwort zu Ende empfangen und geloggt
+        await _send(ws, "chunk", text=chunk)
+    try:
+        success, response_or_error = await future
+    except Exception as e:
+        success, response_or_error = False, str(e)
+    timestamp = datetime.now(timezone.utc)
+    if success:
+        await _log(app, "Chatty", response_or_error, username=username, timestamp=timestamp)
+        await _send(ws, "done", text=response_or_error, timestamp=timestamp.isoformat())
+        reply = conversation_snapshot.TranscriptEntry("Chatty", response_or_error, "bot", timestamp, None, None)
+    else:
+        await _log(app, "Fehler", response_or_error, username=username, timestamp=timestamp)
+        await _send(ws, "error", message=response_or_error, timestamp=timestamp.isoformat())
+        reply = conversation_snapshot.TranscriptEntry("Chatty Fehler", response_or_error, "error", timestamp, None, None)
+    # Ohne Größen gespeichert; die Desktop-App layoutet diese Einträge beim Wiederherstellen
+    user_entry = conversation_snapshot.TranscriptEntry(username, user_input, "user", user_timestamp, None, None)
+    await _run_blocking(app, _save_snapshot, user_id, [user_entry, reply])
+    metrics.observe("chatty_turn_seconds", time.perf_counter() - started, outcome="ok" if success else "error")
+    metrics.inc("chatty_turns_total", outcome="ok" if success else "error")
+
+
+async def handle_chat_socket(request):
+    identity = request.app[TOKENS_KEY].resolve(request.query.get('token', ''))
+    if identity is None:
+        raise web.HTTPUnauthorized(text="Ungültiges oder abgelaufenes Token.")
+    username, user_id = identity
+    ws = web.WebSocketResponse(heartbeat=30.0)
+    await ws.prepare(request)
+
+    success, error_msg = await _run_blocking(request.app, gemini_interface.initialize_gemini, user_id)
+    if not success:
+        await _log(request.app, "System", f"Initialisierungsfehler Gemini: {error_msg}", username=username)
+        await _send(ws, "error", message=error_msg)
+        await ws.close()
+        return ws
+    # Begrüßung aus der Persona, wie im Chat-Bildschirm der Desktop-App
+    if config.INITIAL_HISTORY and len(config.INITIAL_HISTORY) > 1 and config.INITIAL_HISTORY[1]['role'] == 'model':
+        greeting = config.INITIAL_HISTORY[1]['parts'][0]
+        timestamp = datetime.now(timezone.utc)
+        await _log(request.app, "Chatty", greeting, username=username, timestamp=timestamp)
+        await _send(ws, "greeting", text=greeting, timestamp=timestamp.isoformat())
+
+    async for msg in ws:
+        if msg.type == WSMsgType.TEXT:
+            try:
+                data = msg.json()
+            except ValueError:
+                data = None
+            text = str(data.get('text', '')).strip() if isinstance(data, dict) and data.get('type') == 'message' else ""
+            if not text:
+                await _send(ws, "error", message="Erwartet: {\"type\": \"message\", \"text\": ...}")
+                continue
+            # Nachrichten einer Verbindung werden nacheinander beantwortet
+            await _run_turn(request.app, ws, username, user_id, text)
+        elif msg.type == WSMsgType.ERROR:
+            print(f"WebSocket-Fehler ({username}): {ws.exception()}")
+            break
+    return ws
+
+
+async def _on_startup(app):
+    if firebase_logger.get_storage() is None:
+        success, error_msg = await _run_blocking(app, firebase_logger.initialize_storage)
+        if not success:
+            raise RuntimeError(f"Storage nicht initialisiert: {error_msg}")
+    firebase_logger.start_log_writer()
+    metrics.start_periodic_export()
+
+
+async def _on_cleanup(app):
+    await _run_blocking(app, firebase_logger.stop_log_writer)
+    metrics.stop_periodic_export()
+    app[EXECUTOR_KEY].shutdown(wait=False, cancel_futures=True)
+
+
+def create_app(worker_threads=None):
+    # Der Suchindex ist ein lokaler Index der Desktop-App; ein Server würde darin die Gespräche aller Benutzer sammeln
+    config.SEARCH_INDEX_ENABLED = False
+    app = web.Application()
+    app[EXECUTOR_KEY] = ThreadPoolExecutor(
+        max_workers=worker_threads or config.SERVER_WORKER_THREADS, thread_name_prefix="chatty-server"
+    )
+    app[TOKENS_KEY] = TokenStore(config.SERVER_TOKEN_TTL_S)
+    app.router.add_post("/api/register", handle_register)
+    app.router.add_post("/api/login", handle_login)
+    app.router.add_post("/api/logout", handle_logout)
+    app.router.add_get("/ws", handle_chat_socket)
+    app.router.add_get("/healthz", handle_health)
+    app.router.add_get("/metrics", handle_metrics)
+    app.on_startup.append(_on_startup)
+    app.on_cleanup.append(_on_cleanup)
+    return app
+
+
+def run_server(host=None, port=None, worker_threads=None):
+    host = host or config.SERVER_HOST
+    port = port or config.SERVER_PORT
+    print(f"Chatty-Server läuft auf http://{host}:{port} (WebSocket: /ws)")
+    web.run_app(create_app(worker_threads), host=host, port=port, print=None)
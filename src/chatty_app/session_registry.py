@@ -0,0 +1,103 @@
+# src/chatty_app/session_registry.py
+import threading
+import time
+from collections import OrderedDict
+
+
+class SessionEntry:
+    """Eine Chat-Sitzung samt Sperre, damit Nachrichten einer Sitzung nacheinander gesendet werden."""
+
+    def __init__(self, session):
+        self.session = session
+        self.lock = threading.RLock()
+        self.last_used = time.monotonic()
+
+
+class SessionRegistry:
+    """Hält Chat-Sitzungen pro Benutzer-ID, verdrängt nach LRU und Leerlauf-TTL.
+
+    session_factory(user_id, **kwargs) erzeugt eine neue Sitzung, wenn für den Benutzer noch keine existiert.
+    """
+
+    def __init__(self, session_factory, max_sessions=100, idle_ttl=1800.0):
+        self._session_factory = session_factory
+        self.max_sessions = max(1, int(max_sessions))
+        self.idle_ttl = float(idle_ttl)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get_or_create(self, user_id, **factory_kwargs):
+        """Gibt den SessionEntry des Benutzers zurück und legt ihn bei Bedarf an.
+
+        factory_kwargs werden nur beim Anlegen an session_factory weitergereicht.
+        """
+        with self._lock:
+            self._evict_idle_locked()
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry.last_used = time.monotonic()
+                self._entries.move_to_end(user_id)
+                return entry
+        # Außerhalb der Sperre erzeugen, damit andere Benutzer nicht warten müssen
+        new_entry = SessionEntry(self._session_factory(user_id, **factory_kwargs))
+        with self._lock:
+            entry = self._entries.setdefault(user_id, new_entry)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+            return entry
+
+    def get(self, user_id):
+        """Gibt den SessionEntry zurück (oder None), ohne eine neue Sitzung anzulegen."""
+        with self._lock:
+            self._evict_idle_locked()
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry.last_used = time.monotonic()
+                self._entries.move_to_end(user_id)
+            return entry
+
+    def put(self, user_id, session):
+        """Ersetzt die Sitzung eines Benutzers (z.B. nach dem Wiederherstellen eines Verlaufs)."""
+        entry = SessionEntry(session)
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+        return entry
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def evict_idle(self):
+        """Entfernt Sitzungen, die länger als idle_ttl unbenutzt waren. Gibt deren Anzahl zurück."""
+        with self._lock:
+            return self._evict_idle_locked()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, user_id):
+        with self._lock:
+            return user_id in self._entries
+
+    def _evict_idle_locked(self):
+        if self.idle_ttl <= 0:
+            return 0
+        deadline = time.monotonic() - self.idle_ttl
+        # Einträge liegen in LRU-Reihenfolge, die ältesten stehen vorne
+        expired = []
+        for user_id, entry in self._entries.items():
+            if entry.last_used >= deadline:
+                break
+            expired.append(user_id)
+        for user_id in expired:
+            del self._entries[user_id]
+        return len(expired)
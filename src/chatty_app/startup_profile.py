@@ -0,0 +1,126 @@
+# src/chatty_app/startup_profile.py
+"""Misst die Kaltstartzeit von Chatty bis zum ersten Zeichnen des Fensters.
+
+Der Elternprozess startet das Startskript erneut mit `python -X importtime`,
+das Kind meldet beim ersten Paint-Event seine Phasenzeiten und beendet sich.
+Dieses Modul importiert nur die Standardbibliothek, damit es die Messung nicht verfälscht.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+CHILD_ENV_VAR = "CHATTY_PROFILE_STARTUP_CHILD"
+REPORT_MARKER = "CHATTY_STARTUP_PROFILE "
+# Module, die bis zum ersten Zeichnen NICHT geladen sein sollten
+HEAVY_MODULES = ("google.generativeai", "firebase_admin", "google.cloud.firestore", "PIL")
+
+
+def is_child_process():
+    return os.environ.get(CHILD_ENV_VAR) == "1"
+
+
+class PhaseRecorder:
+    """Sammelt Zeitpunkte (time.time()) der Startphasen im Kindprozess."""
+
+    def __init__(self):
+        self.phases = {}
+
+    def mark(self, name):
+        self.phases[name] = time.time()
+
+
+def install_first_paint_hook(app, recorder):
+    """Meldet beim ersten Paint-Event die Messwerte an den Elternprozess und beendet das Kind."""
+    from PyQt6.QtCore import QObject, QEvent
+
+    class _FirstPaintFilter(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and 'first_paint' not in recorder.phases:
+                recorder.mark('first_paint')
+                report = {
+                    'phases': recorder.phases,
+                    'heavy_modules_loaded': [m for m in HEAVY_MODULES if m in sys.modules],
+                }
+                sys.stdout.write(REPORT_MARKER + json.dumps(report) + "\n")
+                sys.stdout.flush()
+                sys.stderr.flush()
+                # Hintergrund-Threads (Firebase-Init, Vorladen) nicht abwarten
+                os._exit(0)
+            return False
+
+    app._first_paint_filter = _FirstPaintFilter()
+    app.installEventFilter(app._first_paint_filter)
+
+
+def _parse_importtime(stderr_text):
+    """Wertet die Ausgabe von `-X importtime` aus: Liste von (modul, self_us, cumulative_us, tiefe)."""
+    entries = []
+    for line in stderr_text.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+            entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        except ValueError:
+            continue
+    return entries
+
+
+def run_profiled(script_path, extra_args=(), top=15, output_path=None, budget_ms=None):
+    """Startet script_path als Kindprozess mit -X importtime und gibt den Exit-Code zurück.
+
+    Exit-Code 1 bedeutet: das Kaltstart-Budget wurde überschritten oder die Messung schlug fehl.
+    """
+    env = dict(os.environ, **{CHILD_ENV_VAR: "1"})
+    spawn_time = time.time()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", script_path, *extra_args],
+        env=env, capture_output=True, text=True
+    )
+    report = None
+    for line in proc.stdout.splitlines():
+        if line.startswith(REPORT_MARKER):
+            report = json.loads(line[len(REPORT_MARKER):])
+        else:
+            print(line)
+    if report is None:
+        print("Fehler: Startprofil konnte nicht ermittelt werden (kein Paint-Event gemeldet).")
+        print(proc.stderr[-2000:])
+        return 1
+
+    phases_ms = {name: round((ts - spawn_time) * 1000, 1) for name, ts in report['phases'].items()}
+    imports = _parse_importtime(proc.stderr)
+    top_level = sorted((e for e in imports if e[3] == 0), key=lambda e: e[2], reverse=True)
+    cold_start_ms = phases_ms['first_paint']
+
+    print("\n=== Chatty Startprofil ===")
+    for name, ms in sorted(phases_ms.items(), key=lambda item: item[1]):
+        print(f"  {name:<24} {ms:>9.1f} ms")
+    print(f"\nTeuerste Imports (kumulativ, Top {top}):")
+    for name, self_us, cumulative_us, _ in top_level[:top]:
+        print(f"  {cumulative_us / 1000:>9.1f} ms  (selbst {self_us / 1000:>7.1f} ms)  {name}")
+    if report['heavy_modules_loaded']:
+        print(f"\nWarnung: vor dem ersten Zeichnen geladen: {', '.join(report['heavy_modules_loaded'])}")
+
+    result = {
+        'cold_start_ms': cold_start_ms,
+        'phases_ms': phases_ms,
+        'heavy_modules_loaded': report['heavy_modules_loaded'],
+        'imports': [
+            {'module': name, 'self_us': self_us, 'cumulative_us': cumulative_us, 'depth': depth}
+            for name, self_us, cumulative_us, depth in imports
+        ],
+    }
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nStartprofil gespeichert unter {output_path}")
+
+    if budget_ms is not None and cold_start_ms > budget_ms:
+        print(f"\nKaltstart-Budget überschritten: {cold_start_ms:.1f} ms > {budget_ms} ms")
+        return 1
+    print(f"\nKaltstart bis zum ersten Zeichnen: {cold_start_ms:.1f} ms")
+    return 0
@@ -0,0 +1,111 @@
+# src/chatty_app/storage.py
+"""Speicher-Schnittstelle für Chat-Logs und Benutzer.
+
+Implementierungen:
+    FirestoreStorage (storage_firestore): Cloud Firestore, braucht den Service Account Key.
+    SQLiteStorage (storage_sqlite): lokale SQLite-Datei im WAL-Modus, z.B. für Einzelplatz-Installationen und Tests.
+Welche verwendet wird, legt config.STORAGE_BACKEND fest.
+
+Log-Einträge werden als dict mit 'speaker', 'message', 'username' und 'timestamp' (ISO-8601 mit Zeitzone)
+übergeben und als LogRecord mit 'timestamp' als datetime zurückgegeben.
+"""
+from . import config
+
+
+class UserAlreadyExists(Exception):
+    """create_user() für eine bereits vergebene Benutzer-ID."""
+
+
+class LogRecord(dict):
+    """Ein Log-Eintrag als dict. 'timestamp_str' wird erst beim ersten Zugriff formatiert."""
+
+    def __init__(self, data, doc_id=None):
+        super().__init__(data)
+        self.doc_id = doc_id
+
+    def __missing__(self, key):
+        if key == 'timestamp_str':
+            timestamp = dict.get(self, 'timestamp')
+            if hasattr(timestamp, 'strftime'):
+                value = timestamp.strftime("%Y-%m-%d %H:%M:%S")
+                self[key] = value
+                return value
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class StorageBackend:
+    """Basisklasse aller Backends. Fehler werden als Ausnahmen weitergereicht."""
+
+    name = None
+    # Entfernte Backends bekommen lokales Journal und Batch-Writer vorgeschaltet (siehe firebase_logger)
+    remote = False
+
+    def initialize(self):
+        """Stellt die Verbindung her. Gibt (Erfolg, Fehlermeldung) zurück."""
+        return True, None
+
+    def write_logs(self, entries):
+        """Schreibt Log-Einträge, entries ist eine Liste von (doc_id, record).
+
+        Über die doc_id ist erneutes Schreiben (z.B. aus dem Journal) idempotent.
+        """
+        raise NotImplementedError
+
+    def get_logs_page(self, username=None, start_time=None, end_time=None, page_size=50, start_after=None,
+                      descending=True):
+        """Gibt (LogRecords, Cursor) zurück, sortiert nach 'timestamp'.
+
+        start_after ist der Cursor der vorigen Seite oder ein dict {'timestamp': datetime}; der
+        zurückgegebene Cursor ist None, wenn keine weiteren Einträge folgen.
+        """
+        raise NotImplementedError
+
+    def get_logs_in_commit_order(self, page_size=500, after=None):
+        """Gibt eine Seite [(Position, LogRecord)] in der Reihenfolge zurück, in der die Einträge gespeichert wurden.
+
+        Anders als 'timestamp' wächst die Position auch für Einträge, die verspätet ankommen (Batch-Writer,
+        Journal nach einem Ausfall). Positionen sind JSON-fähige dicts; after setzt strikt danach fort.
+        Eine Seite mit weniger als page_size Einträgen ist die letzte.
+        """
+        raise NotImplementedError
+
+    def latest_commit_position(self):
+        """Position des zuletzt gespeicherten Eintrags (oder None bei leerer Collection)."""
+        raise NotImplementedError
+
+    def get_user(self, user_id):
+        """Gibt die Benutzerdaten als dict zurück (oder None, falls der Benutzer nicht existiert)."""
+        raise NotImplementedError
+
+    def create_user(self, user_id, data):
+        """Legt einen Benutzer an (setzt 'first_seen' und 'last_seen'); UserAlreadyExists, falls vergeben."""
+        raise NotImplementedError
+
+    def upsert_user(self, user_id, data):
+        """Aktualisiert Felder und 'last_seen' eines Benutzers bzw. legt ihn an. True, wenn er neu ist."""
+        raise NotImplementedError
+
+    def touch_user(self, user_id):
+        """Setzt nur 'last_seen' auf die aktuelle Zeit."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def create_storage(kind=None):
+    """Erzeugt das in config.STORAGE_BACKEND ("firestore" oder "sqlite") gewählte Backend."""
+    kind = kind or config.STORAGE_BACKEND
+    if kind == "firestore":
+        from .storage_firestore import FirestoreStorage
+        return FirestoreStorage()
+    if kind == "sqlite":
+        from .storage_sqlite import SQLiteStorage
+        return SQLiteStorage(config.SQLITE_STORAGE_PATH, synchronous=config.SQLITE_STORAGE_SYNCHRONOUS)
+    raise ValueError(f"Unbekanntes Storage-Backend '{kind}' (erwartet: 'firestore' oder 'sqlite').")
@@ -0,0 +1,154 @@
+# src/chatty_app/storage_firestore.py
+import os
+from datetime import datetime
+
+from . import config
+from .lazy_imports import lazy_module
+from .storage import LogRecord, StorageBackend, UserAlreadyExists
+
+# Das Firebase SDK wird erst bei initialize() bzw. beim ersten Zugriff importiert
+firebase_admin = lazy_module("firebase_admin")
+credentials = lazy_module("firebase_admin.credentials")
+firestore = lazy_module("firebase_admin.firestore")
+api_exceptions = lazy_module("google.api_core.exceptions")
+
+
+class FirestoreStorage(StorageBackend):
+    """Cloud Firestore: Collections config.FIREBASE_LOG_COLLECTION_NAME und config.FIREBASE_USERS_COLLECTION_NAME.
+
+    Jeder Aufruf ist ein RPC; firebase_logger schaltet deshalb Journal und Batch-Writer davor.
+    """
+
+    name = "firestore"
+    remote = True
+
+    def __init__(self, db=None):
+        self.db = db
+
+    def initialize(self):
+        if self.db is not None:
+            return True, None
+        if firebase_admin._apps:
+            self.db = firestore.client()
+            print("Firebase war bereits initialisiert.")
+            return True, None
+        try:
+            if not os.path.exists(config.FIREBASE_SERVICE_ACCOUNT_KEY_PATH):
+                error_msg = f"Firebase Service Account Key nicht gefunden unter: {config.FIREBASE_SERVICE_ACCOUNT_KEY_PATH}"
+                print(f"Fehler: {error_msg}")
+                return False, error_msg
+            cred = credentials.Certificate(config.FIREBASE_SERVICE_ACCOUNT_KEY_PATH)
+            firebase_admin.initialize_app(cred)
+            self.db = firestore.client()
+            print("Firebase erfolgreich initialisiert.")
+            return True, None
+        except ValueError as ve:
+            error_msg = f"Fehler bei Firebase-Initialisierung (ungültiger Key?): {ve}"
+            print(error_msg)
+            return False, error_msg
+        except Exception as e:
+            error_msg = f"Allgemeiner Fehler bei Firebase-Initialisierung: {e}"
+            print(error_msg)
+            return False, error_msg
+
+    # --- Logs ---
+    @staticmethod
+    def to_document(record):
+        """Journal-Eintrag -> Firestore-Dokument ('timestamp' als datetime, dazu die Serverzeit)."""
+        log_data = dict(record)
+        log_data['timestamp'] = datetime.fromisoformat(record['timestamp'])
+        log_data['server_timestamp'] = firestore.SERVER_TIMESTAMP
+        return log_data
+
+    def write_logs(self, entries):
+        collection_ref = self.db.collection(config.FIREBASE_LOG_COLLECTION_NAME)
+        # WriteBatch erlaubt höchstens 500 Operationen
+        for start in range(0, len(entries), 500):
+            batch = self.db.batch()
+            for doc_id, record in entries[start:start + 500]:
+                batch.set(collection_ref.document(doc_id), self.to_document(record))
+            batch.commit()
+
+    def _build_logs_query(self, username=None, start_time=None, end_time=None, descending=True):
+        """Filter nach Benutzer plus Sortierung nach Zeit benötigen die zusammengesetzten Indizes
+        aus firestore.indexes.json."""
+        query = self.db.collection(config.FIREBASE_LOG_COLLECTION_NAME)
+        if username is not None:
+            query = query.where(filter=firestore.FieldFilter('username', '==', username))
+        if start_time is not None:
+            query = query.where(filter=firestore.FieldFilter('timestamp', '>=', start_time))
+        if end_time is not None:
+            query = query.where(filter=firestore.FieldFilter('timestamp', '<', end_time))
+        direction = firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING
+        return query.order_by('timestamp', direction=direction)
+
+    def get_logs_page(self, username=None, start_time=None, end_time=None, page_size=50, start_after=None,
+                      descending=True):
+        # Der Cursor ist der DocumentSnapshot des letzten Eintrags
+        query = self._build_logs_query(username, start_time, end_time, descending).limit(page_size)
+        if start_after is not None:
+            query = query.start_after(start_after)
+        docs = list(query.stream())
+        records = [LogRecord(doc.to_dict(), doc.id) for doc in docs]
+        next_cursor = docs[-1] if len(docs) == page_size else None
+        return records, next_cursor
+
+    def _commit_order_query(self, descending=False):
+        # 'server_timestamp' setzt Firestore beim Commit; gleiche Werte (ein Batch) trennt die Dokument-ID.
+        # Einträge von vor dem Batch-Writer haben das Feld nicht, sie erfasst nur ein Vollexport.
+        direction = firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING
+        return (self.db.collection(config.FIREBASE_LOG_COLLECTION_NAME)
+                .order_by('server_timestamp', direction=direction)
+                .order_by('__name__', direction=direction))
+
+    def _commit_position(self, doc):
+        server_timestamp = doc.get('server_timestamp')
+        return {'server_timestamp': server_timestamp.isoformat(), 'doc_id': doc.id}
+
+    def get_logs_in_commit_order(self, page_size=500, after=None):
+        query = self._commit_order_query().limit(page_size)
+        if after is not None:
+            collection_ref = self.db.collection(config.FIREBASE_LOG_COLLECTION_NAME)
+            query = query.start_after({
+                'server_timestamp': datetime.fromisoformat(after['server_timestamp']),
+                '__name__': collection_ref.document(after['doc_id']),
+            })
+        return [(self._commit_position(doc), LogRecord(doc.to_dict(), doc.id)) for doc in query.stream()]
+
+    def latest_commit_position(self):
+        docs = list(self._commit_order_query(descending=True).limit(1).stream())
+        return self._commit_position(docs[0]) if docs else None
+
+    # --- Benutzer ---
+    def _user_ref(self, user_id):
+        return self.db.collection(config.FIREBASE_USERS_COLLECTION_NAME).document(user_id)
+
+    @staticmethod
+    def last_seen_update():
+        return {'last_seen': firestore.SERVER_TIMESTAMP}
+
+    def get_user(self, user_id):
+        user_doc = self._user_ref(user_id).get()
+        return user_doc.to_dict() if user_doc.exists else None
+
+    def create_user(self, user_id, data):
+        try:
+            # create() schlägt fehl, wenn das Dokument existiert: Prüfen und Anlegen in einem Aufruf
+            self._user_ref(user_id).create(
+                {**data, 'first_seen': firestore.SERVER_TIMESTAMP, 'last_seen': firestore.SERVER_TIMESTAMP}
+            )
+        except api_exceptions.AlreadyExists:
+            raise UserAlreadyExists(user_id)
+
+    def upsert_user(self, user_id, data):
+        user_ref = self._user_ref(user_id)
+        try:
+            # Bestehende Benutzer (der Normalfall) brauchen so nur einen Aufruf statt get() + update()
+            user_ref.update({**data, 'last_seen': firestore.SERVER_TIMESTAMP})
+            return False
+        except api_exceptions.NotFound:
+            user_ref.create({**data, 'first_seen': firestore.SERVER_TIMESTAMP, 'last_seen': firestore.SERVER_TIMESTAMP})
+            return True
+
+    def touch_user(self, user_id):
+        self._user_ref(user_id).set(self.last_seen_update(), merge=True)
@@ -0,0 +1,212 @@
+# src/chatty_app/storage_sqlite.py
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+from .storage import LogRecord, StorageBackend, UserAlreadyExists
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _to_micros(value):
+    """datetime oder ISO-String -> Mikrosekunden seit 1970 (UTC). Ganzzahlen sortieren exakt, anders als ISO-Strings."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(micros):
+    return _EPOCH + timedelta(microseconds=micros) if micros is not None else None
+
+
+class SQLiteStorage(StorageBackend):
+    """Lokale SQLite-Datei im WAL-Modus.
+
+    Die Log-Abfragen (Benutzer + Zeitraum, sortiert nach Zeit, seitenweise) laufen über den
+    Index auf (username, timestamp_us, seq); Cursor sind (timestamp_us, seq) und damit auch bei
+    gleichen Zeitstempeln eindeutig.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path, synchronous="NORMAL"):
+        self.path = path
+        self.synchronous = synchronous
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def initialize(self):
+        if self._conn is not None:
+            return True, None
+        try:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS chat_logs (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    doc_id TEXT NOT NULL UNIQUE,
+                    username TEXT,
+                    speaker TEXT,
+                    message TEXT,
+                    timestamp_us INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS chat_logs_username_timestamp ON chat_logs (username, timestamp_us, seq);
+                CREATE INDEX IF NOT EXISTS chat_logs_timestamp ON chat_logs (timestamp_us, seq);
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    first_seen_us INTEGER,
+                    last_seen_us INTEGER
+                );
+            """)
+        except sqlite3.Error as e:
+            error_msg = f"Fehler beim Öffnen der lokalen Datenbank '{self.path}': {e}"
+            print(error_msg)
+            return False, error_msg
+        self._conn = conn
+        print(f"Lokale Datenbank geöffnet: {self.path}")
+        return True, None
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # --- Logs ---
+    def write_logs(self, entries):
+        rows = [
+            (doc_id, record.get('username'), record.get('speaker'), record.get('message'), _to_micros(record['timestamp']))
+            for doc_id, record in entries
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO chat_logs (doc_id, username, speaker, message, timestamp_us) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+
+    def get_logs_page(self, username=None, start_time=None, end_time=None, page_size=50, start_after=None,
+                      descending=True):
+        conditions, params = [], []
+        if username is not None:
+            conditions.append("username = ?")
+            params.append(username)
+        if start_time is not None:
+            conditions.append("timestamp_us >= ?")
+            params.append(_to_micros(start_time))
+        if end_time is not None:
+            conditions.append("timestamp_us < ?")
+            params.append(_to_micros(end_time))
+        if start_after is not None:
+            op = "<" if descending else ">"
+            after_us = _to_micros(start_after['timestamp'])
+            after_seq = start_after.get('seq')
+            if after_seq is None:
+                # Nur ein Zeitpunkt (z.B. aus der Chat-Ansicht): alles strikt davor bzw. danach
+                conditions.append(f"timestamp_us {op} ?")
+                params.append(after_us)
+            else:
+                conditions.append(f"(timestamp_us, seq) {op} (?, ?)")
+                params.extend((after_us, after_seq))
+        direction = "DESC" if descending else "ASC"
+        query = "SELECT seq, doc_id, username, speaker, message, timestamp_us FROM chat_logs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY timestamp_us {direction}, seq {direction} LIMIT ?"
+        params.append(int(page_size))
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        records = [
+            LogRecord({'username': username_, 'speaker': speaker, 'message': message,
+                       'timestamp': _from_micros(timestamp_us)}, doc_id)
+            for _, doc_id, username_, speaker, message, timestamp_us in rows
+        ]
+        next_cursor = None
+        if len(rows) == page_size:
+            next_cursor = {'timestamp': records[-1]['timestamp'], 'seq': rows[-1][0]}
+        return records, next_cursor
+
+    def get_logs_in_commit_order(self, page_size=500, after=None):
+        # seq (AUTOINCREMENT) vergibt SQLite in Einfügereihenfolge, erneut geschriebene doc_ids behalten ihre
+        after_seq = after['seq'] if after else 0
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, doc_id, username, speaker, message, timestamp_us FROM chat_logs "
+                "WHERE seq > ? ORDER BY seq LIMIT ?",
+                (after_seq, int(page_size))
+            ).fetchall()
+        return [
+            ({'seq': seq}, LogRecord({'username': username, 'speaker': speaker, 'message': message,
+                                      'timestamp': _from_micros(timestamp_us)}, doc_id))
+            for seq, doc_id, username, speaker, message, timestamp_us in rows
+        ]
+
+    def latest_commit_position(self):
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(seq) FROM chat_logs").fetchone()
+        return {'seq': row[0]} if row and row[0] is not None else None
+
+    # --- Benutzer ---
+    @staticmethod
+    def _now_micros():
+        return _to_micros(datetime.now(timezone.utc))
+
+    def get_user(self, user_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, first_seen_us, last_seen_us FROM users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        data = json.loads(row[0])
+        data['first_seen'] = _from_micros(row[1])
+        data['last_seen'] = _from_micros(row[2])
+        return data
+
+    def create_user(self, user_id, data):
+        now = self._now_micros()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT INTO users (user_id, data, first_seen_us, last_seen_us) VALUES (?, ?, ?, ?)",
+                    (user_id, json.dumps(data, ensure_ascii=False), now, now)
+                )
+        except sqlite3.IntegrityError:
+            raise UserAlreadyExists(user_id)
+
+    def upsert_user(self, user_id, data):
+        now = self._now_micros()
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                row = self._conn.execute("SELECT data FROM users WHERE user_id = ?", (user_id,)).fetchone()
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO users (user_id, data, first_seen_us, last_seen_us) VALUES (?, ?, ?, ?)",
+                        (user_id, json.dumps(data, ensure_ascii=False), now, now)
+                    )
+                    return True
+                merged = {**json.loads(row[0]), **data}
+                self._conn.execute(
+                    "UPDATE users SET data = ?, last_seen_us = ? WHERE user_id = ?",
+                    (json.dumps(merged, ensure_ascii=False), now, user_id)
+                )
+                return False
+
+    def touch_user(self, user_id):
+        now = self._now_micros()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO users (user_id, data, first_seen_us, last_seen_us) VALUES (?, '{}', ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET last_seen_us = excluded.last_seen_us",
+                (user_id, now, now)
+            )
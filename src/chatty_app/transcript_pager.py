@@ -0,0 +1,176 @@
+# src/chatty_app/transcript_pager.py
+from datetime import timedelta
+
+from PyQt6.QtCore import QObject
+
+from . import config
+from . import firebase_logger
+from . import workers
+
+# Gesprächseinträge in chat_logs -> Art der Blase; System-Einträge werden nicht angezeigt
+_SPEAKER_KINDS = {"Du": "user", "Chatty": "bot", "Fehler": "error"}
+# Höchstens so viele Abfragen pro Seite, falls eine Seite fast nur System-Einträge enthält
+MAX_QUERIES_PER_PAGE = 5
+
+
+def _record_to_entry(record, display_name):
+    kind = _SPEAKER_KINDS.get(record.get('speaker'))
+    if kind is None:
+        return None
+    if kind == "user":
+        speaker = display_name
+    elif kind == "error":
+        speaker = "Chatty Fehler"
+    else:
+        speaker = "Chatty"
+    return speaker, record.get('message', ''), kind, record.get('timestamp')
+
+
+def fetch_transcript_page(username, anchor_timestamp=None, older=True, page_size=30):
+    """Lädt Gesprächseinträge des Benutzers vor (older=True) bzw. nach anchor_timestamp.
+
+    Läuft im Hintergrund-Thread. Gibt (Einträge in zeitlicher Reihenfolge, erschöpft) zurück;
+    erschöpft ist True, wenn in dieser Richtung keine weiteren Einträge existieren.
+    """
+    # Gepufferte Einträge zuerst schreiben, sonst fehlen die letzten Nachrichten in der Abfrage
+    firebase_logger.flush_logs(timeout=2.0)
+    cursor = {'timestamp': anchor_timestamp} if anchor_timestamp is not None else None
+    entries = []
+    exhausted = False
+    for _ in range(MAX_QUERIES_PER_PAGE):
+        records, cursor = firebase_logger.get_logs_page(
+            username=username, page_size=page_size, start_after=cursor, descending=older
+        )
+        for record in records:
+            entry = _record_to_entry(record, username)
+            if entry is not None:
+                entries.append(entry)
+        if cursor is None:
+            exhausted = True
+            break
+        if len(entries) >= page_size:
+            break
+    if older:
+        entries.reverse()
+    return entries, exhausted
+
+
+class TranscriptPager(QObject):
+    """Blättert in der ChatTranscriptView durch gespeicherte Gespräche aus chat_logs.
+
+    Ältere Seiten werden erst geladen, wenn der Benutzer nach oben scrollt. Die Ansicht hält
+    höchstens max_rows Nachrichten: beim Zurückblättern fallen die neuesten heraus (sie werden
+    beim Herunterscrollen nachgeladen), bei neuen Nachrichten die ältesten.
+    """
+
+    def __init__(self, view, page_size=None, max_rows=None, parent=None):
+        super().__init__(parent)
+        self.view = view
+        self.page_size = page_size or config.TRANSCRIPT_PAGE_SIZE
+        self.max_rows = max(max_rows or config.TRANSCRIPT_MAX_ROWS, 2 * self.page_size)
+        self._username = None
+        self._generation = 0
+        self._loading = False
+        self._has_older = False
+        self._has_newer = False
+        view.top_reached.connect(self._load_older)
+        view.bottom_reached.connect(self._load_newer)
+
+    def reset(self, username=None):
+        """Beginnt für username neu; ohne Benutzer (oder ohne Firebase) wird nicht geblättert."""
+        self._generation += 1
+        self._username = username
+        self._loading = False
+        self._has_older = username is not None
+        self._has_newer = False
+
+    def is_live(self):
+        """True, wenn die neuesten Nachrichten angezeigt werden."""
+        return not self._has_newer
+
+    def append_live(self, speaker, text, kind, timestamp=None):
+        """Hängt eine neue Nachricht an und springt vorher ggf. zurück zum aktuellen Gespräch."""
+        if self._has_newer:
+            # Zwischen Ausschnitt und neuer Nachricht fehlen Einträge: neu aufsetzen,
+            # ältere Nachrichten lassen sich wieder nach oben nachladen
+            self._generation += 1
+            self._loading = False
+            self._has_newer = False
+            self._has_older = self._username is not None
+            self.view.clear()
+        message = self.view.append_message(speaker, text, kind, timestamp)
+        overflow = self.view.message_count() - self.max_rows
+        if overflow > 0:
+            self.view.remove_first_messages(overflow)
+            self._has_older = self._username is not None
+        return message
+
+    def jump_to(self, timestamp):
+        """Zeigt das Gespräch ab timestamp (z.B. einen Suchtreffer) als obersten Eintrag.
+
+        Ältere und neuere Nachrichten werden wie gewohnt beim Scrollen nachgeladen.
+        Gibt False zurück, wenn ohne Benutzer nicht geblättert werden kann.
+        """
+        if self._username is None or timestamp is None:
+            return False
+        self._generation += 1
+        self._loading = False
+        self._has_older = True
+        # Bis die Seite da ist, gilt der Ausschnitt als nicht aktuell (neue Nachrichten setzen neu auf)
+        self._has_newer = True
+        self.view.clear()
+        # Der Cursor schließt seinen Zeitpunkt aus, der Treffer selbst soll dabei sein
+        self._start_fetch(timestamp - timedelta(microseconds=1), older=False)
+        return True
+
+    def _load_older(self):
+        if self._loading or not self._has_older:
+            return
+        # Nachrichten ohne Zeitstempel (nicht geloggt) taugen nicht als Cursor; ohne Cursor käme die neueste Seite
+        anchor = self.view.oldest_timestamp()
+        if anchor is None and self.view.message_count():
+            return
+        self._start_fetch(anchor, older=True)
+
+    def _load_newer(self):
+        if self._loading or not self._has_newer:
+            return
+        last = self.view.last_message()
+        if last is None or last.timestamp is None:
+            return
+        self._start_fetch(last.timestamp, older=False)
+
+    def _start_fetch(self, anchor_timestamp, older):
+        self._loading = True
+        generation = self._generation
+        workers.run_in_background(
+            fetch_transcript_page, self._username, anchor_timestamp, older, self.page_size,
+            on_result=lambda result: self._on_page_loaded(generation, older, result),
+            on_error=lambda error: self._on_page_failed(generation, error)
+        )
+
+    def _on_page_loaded(self, generation, older, result):
+        if generation != self._generation:
+            return
+        self._loading = False
+        entries, exhausted = result
+        if older:
+            self._has_older = not exhausted
+            self.view.prepend_messages(entries)
+            overflow = self.view.message_count() - self.max_rows
+            if overflow > 0:
+                self.view.remove_last_messages(overflow)
+                self._has_newer = True
+        else:
+            self._has_newer = not exhausted
+            self.view.append_messages(entries)
+            overflow = self.view.message_count() - self.max_rows
+            if overflow > 0:
+                self.view.remove_first_messages(overflow)
+                self._has_older = True
+
+    def _on_page_failed(self, generation, error):
+        if generation != self._generation:
+            return
+        self._loading = False
+        print(f"Fehler beim Nachladen des Chatverlaufs: {error}")
@@ -2,12 +2,13 @@
 import sys
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
-    QTextEdit, QScrollArea, QSizePolicy, QFrame
+    QScrollArea, QSizePolicy, QFrame
 )
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QPixmap
 from . import config
 from . import gui_utils
+from .chat_view import ChatTranscriptView
 
 def create_start_widget(login_callback, register_callback):
     main_widget = QWidget()
@@ -83,7 +84,7 @@ def create_start_widget(login_callback, register_callback):
     }
     return widgets
 
-def create_chat_widget(back_callback, send_callback):
+def create_chat_widget(back_callback, send_callback, search_callback=None):
     main_widget = QWidget()
     main_layout = QVBoxLayout(main_widget)
     main_layout.setContentsMargins(10, 5, 10, 10)
@@ -113,11 +114,18 @@ def create_chat_widget(back_callback, send_callback):
     top_bar_layout.addWidget(top_logo_label, 0, Qt.AlignmentFlag.AlignCenter)
     top_bar_layout.addStretch(1)
 
+    search_entry = QLineEdit()
+    search_entry.setPlaceholderText("Verlauf durchsuchen...")
+    search_entry.setObjectName("SearchEntry")
+    search_entry.setClearButtonEnabled(True)
+    if search_callback:
+        search_entry.returnPressed.connect(search_callback)
+    top_bar_layout.addWidget(search_entry, 0)
+
     main_layout.addWidget(top_bar_widget)
 
-    chat_window = QTextEdit()
+    chat_window = ChatTranscriptView()
     chat_window.setObjectName("ChatWindow")
-    chat_window.setReadOnly(True)
     main_layout.addWidget(chat_window, 1)
 
     input_widget = QWidget()
@@ -143,6 +151,7 @@ def create_chat_widget(back_callback, send_callback):
         "chat_window": chat_window,
         "entry": entry,
         "send_button": send_button,
-        "exit_button": exit_button
+        "exit_button": exit_button,
+        "search_entry": search_entry
     }
     return widgets
\ No newline at end of file
@@ -0,0 +1,180 @@
+# src/chatty_app/user_directory.py
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+
+@functools.lru_cache(maxsize=4096)
+def canonical_user_id(username):
+    """Die eine Benutzer-ID (Dokument-ID) zu einem Benutzernamen, oder None bei ungültigen Namen.
+
+    Kleinbuchstaben; " " wird zu "_", "." zu "_dot_", "@" zu "_at_", andere Sonderzeichen entfallen.
+    """
+    if not username:
+        return None
+    sanitized = username.lower().replace(" ", "_").replace(".", "_dot_").replace("@", "_at_")
+    sanitized = "".join(c for c in sanitized if c.isalnum() or c == '_')
+    return sanitized or None
+
+
+class UserDirectory:
+    """Benutzerdokumente mit In-Memory-Cache (TTL) vor dem Storage-Backend.
+
+    Wiederholte Logins lesen das Dokument aus dem Cache; eigene Schreibzugriffe (create/upsert)
+    aktualisieren ihn direkt. 'last_seen' wird pro Benutzer höchstens alle last_seen_debounce
+    Sekunden geschrieben; ein zurückgehaltenes Update schreibt ein Timer, sobald das Fenster
+    abgelaufen ist, beim Beenden holt flush_last_seen() alle offenen nach.
+
+    get_storage() liefert das aktuelle Backend; wechselt es, wird der Cache verworfen.
+    write_last_seen(user_id) schreibt 'last_seen' (z.B. über den Batch-Writer).
+    """
+
+    def __init__(self, get_storage, write_last_seen, ttl=300.0, max_entries=1000, last_seen_debounce=60.0):
+        self._get_storage = get_storage
+        self._write_last_seen = write_last_seen
+        self.ttl = float(ttl)
+        self.max_entries = max(1, int(max_entries))
+        self.last_seen_debounce = float(last_seen_debounce)
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # user_id -> (gültig bis, Daten)
+        self._storage = None
+        # user_id -> time.monotonic() des letzten Schreibens; wie der Cache auf max_entries begrenzt
+        self._last_seen_written = OrderedDict()
+        self._last_seen_pending = {}  # user_id -> frühester Zeitpunkt für das nächste Schreiben
+        self._last_seen_timer = None
+        self.hits = 0
+        self.misses = 0
+
+    def _storage_or_raise(self):
+        storage = self._get_storage()
+        if storage is None:
+            raise RuntimeError("Storage nicht initialisiert.")
+        if storage is not self._storage:
+            with self._lock:
+                self._cache.clear()
+                self._storage = storage
+        return storage
+
+    def _remember(self, user_id, data):
+        with self._lock:
+            self._cache[user_id] = (time.monotonic() + self.ttl, dict(data))
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def get(self, user_id, refresh=False):
+        """Benutzerdaten als dict (oder None, falls der Benutzer nicht existiert).
+
+        refresh=True liest am Cache vorbei, z.B. wenn sich das Dokument woanders geändert haben kann.
+        """
+        storage = self._storage_or_raise()
+        if not refresh:
+            with self._lock:
+                cached = self._cache.get(user_id)
+                if cached is not None and cached[0] > time.monotonic():
+                    self._cache.move_to_end(user_id)
+                    self.hits += 1
+                    return dict(cached[1])
+        with self._lock:
+            self.misses += 1
+        data = storage.get_user(user_id)
+        # Fehlende Benutzer werden nicht gecacht, sie könnten gleich (auch von einem anderen Prozess) angelegt werden
+        if data is None:
+            self.invalidate(user_id)
+            return None
+        self._remember(user_id, data)
+        return dict(data)
+
+    def create(self, user_id, data):
+        """Legt einen Benutzer an; UserAlreadyExists, falls vergeben (siehe StorageBackend.create_user)."""
+        self._storage_or_raise().create_user(user_id, data)
+        self._remember(user_id, data)
+        with self._lock:
+            # create_user setzt 'last_seen' bereits
+            self._mark_written_locked(user_id, time.monotonic())
+
+    def upsert(self, user_id, data):
+        """Aktualisiert bzw. legt einen Benutzer an. True, wenn er neu ist."""
+        is_new = self._storage_or_raise().upsert_user(user_id, data)
+        with self._lock:
+            cached = self._cache.get(user_id)
+            self._mark_written_locked(user_id, time.monotonic())
+        if is_new:
+            self._remember(user_id, data)
+        elif cached is not None:
+            self._remember(user_id, {**cached[1], **data})
+        return is_new
+
+    def _mark_written_locked(self, user_id, now):
+        self._last_seen_written[user_id] = now
+        self._last_seen_written.move_to_end(user_id)
+        self._last_seen_pending.pop(user_id, None)
+        # Ältere Einträge liegen ohnehin außerhalb des Fensters (oder sind noch vorgemerkt)
+        while len(self._last_seen_written) > self.max_entries:
+            self._last_seen_written.popitem(last=False)
+
+    def touch(self, user_id):
+        """Setzt 'last_seen'; innerhalb von last_seen_debounce Sekunden nach dem letzten Schreiben
+        wird das Update zurückgehalten und am Ende des Fensters geschrieben.
+        """
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_seen_written.get(user_id)
+            if last is not None and now - last < self.last_seen_debounce:
+                self._last_seen_pending.setdefault(user_id, last + self.last_seen_debounce)
+                self._schedule_locked()
+                return
+            self._mark_written_locked(user_id, now)
+        self._write_last_seen(user_id)
+
+    def _schedule_locked(self):
+        if self._last_seen_timer is not None or not self._last_seen_pending:
+            return
+        delay = max(0.0, min(self._last_seen_pending.values()) - time.monotonic())
+        self._last_seen_timer = threading.Timer(delay, self._write_due_last_seen)
+        self._last_seen_timer.daemon = True
+        self._last_seen_timer.start()
+
+    def _write_due_last_seen(self):
+        """Timer: schreibt die zurückgehaltenen Updates, deren Fenster abgelaufen ist."""
+        now = time.monotonic()
+        with self._lock:
+            self._last_seen_timer = None
+            due = [user_id for user_id, due_at in self._last_seen_pending.items() if due_at <= now]
+            for user_id in due:
+                self._mark_written_locked(user_id, now)
+            self._schedule_locked()
+        for user_id in due:
+            self._write_last_seen(user_id)
+
+    def flush_last_seen(self):
+        """Schreibt alle zurückgehaltenen 'last_seen'-Updates (z.B. beim Beenden). Gibt deren Anzahl zurück."""
+        now = time.monotonic()
+        with self._lock:
+            if self._last_seen_timer is not None:
+                self._last_seen_timer.cancel()
+                self._last_seen_timer = None
+            pending = list(self._last_seen_pending)
+            for user_id in pending:
+                self._mark_written_locked(user_id, now)
+        for user_id in pending:
+            self._write_last_seen(user_id)
+        return len(pending)
+
+    def invalidate(self, user_id=None):
+        """Verwirft den Cache-Eintrag eines Benutzers (bzw. ohne user_id den ganzen Cache)."""
+        with self._lock:
+            if user_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(user_id, None)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'cached_users': len(self._cache),
+                'hits': self.hits,
+                'misses': self.misses,
+                'last_seen_pending': len(self._last_seen_pending),
+            }
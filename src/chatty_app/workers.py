@@ -0,0 +1,56 @@
+# src/chatty_app/workers.py
+import traceback
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+# Laufende Worker referenzieren, damit Python die Signal-Objekte nicht vorzeitig aufräumt
+_active_workers = set()
+
+
+class WorkerSignals(QObject):
+    """Signale eines Hintergrund-Workers. Werden im GUI-Thread zugestellt."""
+    result = pyqtSignal(object)
+    progress = pyqtSignal(object)
+    error = pyqtSignal(str)
+    finished = pyqtSignal()
+
+
+class FunctionWorker(QRunnable):
+    """Führt eine (blockierende) Funktion im QThreadPool aus und meldet das Ergebnis per Signal."""
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+
+def run_in_background(fn, *args, on_result=None, on_error=None, on_finished=None, on_progress=None, **kwargs):
+    """Startet fn(*args, **kwargs) im globalen QThreadPool.
+
+    Die Callbacks werden über Qt-Signale im GUI-Thread aufgerufen, der GUI-Thread
+    blockiert also nie auf Netzwerk-I/O. Ist on_progress gesetzt, erhält fn ein
+    zusätzliches Keyword-Argument 'progress_callback' für Zwischenergebnisse.
+    """
+    worker = FunctionWorker(fn, *args, **kwargs)
+    if on_progress:
+        worker.kwargs['progress_callback'] = worker.signals.progress.emit
+        worker.signals.progress.connect(on_progress)
+    if on_result: worker.signals.result.connect(on_result)
+    if on_error: worker.signals.error.connect(on_error)
+    if on_finished: worker.signals.finished.connect(on_finished)
+    _active_workers.add(worker)
+    worker.signals.finished.connect(lambda: _active_workers.discard(worker))
+    QThreadPool.globalInstance().start(worker)
+    return worker